@@ -0,0 +1,112 @@
+"""Micro-benchmark of the completion cleaner on large generated documents.
+
+Compares the original loop-based `_clean_content` (kept here as a baseline)
+with `services.content_cleaner.clean_content` on 100 KB - 1 MB documents,
+reporting time and peak allocated memory (tracemalloc).
+
+    python -m benchmarks.bench_content_cleaner
+"""
+import argparse
+import time
+import tracemalloc
+from services.content_cleaner import WRAPPER_TEXTS, clean_content
+
+
+def legacy_clean_content(content):
+    """The cleaner as it was before services/content_cleaner.py"""
+    if not content:
+        return ""
+    for text in WRAPPER_TEXTS:
+        if content.lower().startswith(text.lower()):
+            content = content[len(text):]
+            break
+    if '```' in content:
+        parts = content.split('```')
+        for i, part in enumerate(parts):
+            part = part.strip()
+            if part.lower().startswith('html'):
+                if i + 1 < len(parts):
+                    html_content = parts[i + 1].strip()
+                    html_content = html_content.strip()
+                    html_content = html_content.strip('"\'')
+                    lines = [line.strip() for line in html_content.splitlines() if line.strip()]
+                    if lines:
+                        for line in lines:
+                            if line.startswith('<') and line.endswith('>'):
+                                return line
+                        return lines[0]
+                    return ""
+        if len(parts) >= 2:
+            code_content = parts[1].strip()
+            if '\n' in code_content:
+                code_content = code_content[code_content.find('\n') + 1:]
+            code_content = code_content.strip()
+            if code_content:
+                return code_content
+    content = content.strip()
+    content = content.strip('"\'')
+    lines = [line.strip() for line in content.splitlines() if line.strip()]
+    return "\n".join(lines)
+
+
+SECTION = """
+<h2>Solution Approach</h2>
+    <p>We walk the array once and keep a hash map from value to index.</p>
+
+<pre><code class="language-go">
+func twoSum(nums []int, target int) []int {
+    seen := make(map[int]int, len(nums))
+    for i, n := range nums {
+        if j, ok := seen[target-n]; ok {
+            return []int{j, i}
+        }
+        seen[n] = i
+    }
+    return nil
+}
+</code></pre>
+"""
+
+
+def make_document(size, kind):
+    body = SECTION * (size // len(SECTION) + 1)
+    body = "<h1>Solving Two Sum in Go</h1>\n" + body[:size]
+    if kind == "plain":
+        return body
+    if kind == "wrapped":
+        return "Here's a WordPress-formatted HTML blog post about Two Sum:\n\n" + body
+    # A code block that is not marked as html
+    return "Here's the code\n```go\n" + body + "\n```\nHope this helps!"
+
+
+def measure(func, document, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(document)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(document)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+
+def main(repeat):
+    print(f"{'document':<18} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} "
+          f"{'legacy peak KB':>15} {'new peak KB':>12}")
+    for kind in ("plain", "wrapped", "fenced"):
+        for size in (100_000, 250_000, 500_000, 1_000_000):
+            document = make_document(size, kind)
+            assert clean_content(document) == legacy_clean_content(document)
+            legacy_ms, legacy_kb = measure(legacy_clean_content, document, repeat)
+            new_ms, new_kb = measure(clean_content, document, repeat)
+            print(f"{kind + ' ' + str(size // 1000) + ' KB':<18} {legacy_ms:>10.2f} {new_ms:>8.2f} "
+                  f"{legacy_ms / new_ms:>7.1f}x {legacy_kb:>15.0f} {new_kb:>12.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the completion cleaner')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,265 @@
+"""End-to-end throughput, stage latency and memory against local stub upstreams.
+
+Starts the stubs of `benchmarks.stubs` (LeetCode GraphQL, DeepSeek chat
+completions, Ghost and WordPress admin APIs), points the services at them
+through LEETCODE_GRAPHQL_URL, DEEPSEEK_API_URL and GHOST_URL / WP_URL, and
+drives `generate_blog_post` one post after the other, then
+`generate_blog_posts` as one batch. Local stores live in a temporary
+DATA_DIR.
+
+Reports throughput, p50/p99 latency per post and per stage (the stages of
+the stage duration metric: fetch, prompt, generate, deepseek, clean,
+beautify, convert, publish), requests per upstream and memory, and writes
+the results as JSON (benchmarks/results/e2e-<commit>.json by default).
+`--compare` prints the change from an earlier results file.
+
+    python -m benchmarks.bench_e2e --posts 10 --batch 50 --latency 0.5 --rate-limited 0.05
+    python -m benchmarks.bench_e2e --compare benchmarks/results/e2e-1a2b3c4.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from benchmarks.stubs import StubUpstreams
+from services.metrics import STAGE_SECONDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else None
+
+
+def latency_summary(seconds):
+    return {
+        'count': len(seconds),
+        'mean_ms': sum(seconds) / len(seconds) * 1000 if seconds else None,
+        'p50_ms': percentile(seconds, 0.5) * 1000 if seconds else None,
+        'p99_ms': percentile(seconds, 0.99) * 1000 if seconds else None,
+    }
+
+
+def max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+@contextlib.contextmanager
+def recorded_stages():
+    """Every duration observed into the stage metric while the block runs, by stage"""
+    samples = defaultdict(list)
+    observe = STAGE_SECONDS.observe
+
+    def record(value, **labels):
+        samples[labels['stage']].append(value)
+        observe(value, **labels)
+
+    STAGE_SECONDS.observe = record
+    try:
+        yield samples
+    finally:
+        del STAGE_SECONDS.observe
+
+
+def configure(stubs, args, data_dir):
+    """Point a fresh Config at the stubs"""
+    from config.config import Config
+    from services.resilience import reset_upstreams
+    os.environ.update(stubs.environment())
+    os.environ.update({
+        'DATA_DIR': data_dir,
+        'BLOG_PLATFORM': args.platform,
+        'DEEPSEEK_API_KEY': 'benchmark',
+        'GHOST_API_KEY': 'benchmark:' + 'ab' * 32,
+        'WP_USERNAME': 'benchmark',
+        'WP_APP_PASS': 'benchmark',
+        'DEEPSEEK_STREAM': 'true' if args.stream else 'false',
+        'DEEPSEEK_CACHE': 'false',
+        'LEETCODE_CATALOG': 'false',
+        'PUBLISHED_INDEX_SEED': 'false',
+        'POST_LANGUAGES': args.languages,
+        'UPSTREAM_RATE_LIMITS': args.rate_limits,
+        'BATCH_FETCH_CONCURRENCY': str(args.fetch_concurrency),
+        'BATCH_GENERATE_CONCURRENCY': str(args.generate_concurrency),
+        'BATCH_PUBLISH_CONCURRENCY': str(args.publish_concurrency),
+        'GENERATE_CONCURRENCY': str(args.generate_concurrency),
+    })
+    Config.reset_instance()
+    reset_upstreams()
+
+
+async def run_scenario(stubs, drive, verbose):
+    """Run `drive()`, which returns (posts published, posts failed, per-post seconds)"""
+    requests_before = dict(stubs.requests)
+    rate_limited_before = stubs.rate_limited_responses
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    with recorded_stages() as stages, output:
+        published, failed, post_seconds = await drive()
+    seconds = time.perf_counter() - started
+    return {
+        'posts': published,
+        'failed': failed,
+        'seconds': seconds,
+        'posts_per_minute': published / seconds * 60 if seconds else 0,
+        'post_latency': latency_summary(post_seconds),
+        'stages': {stage: latency_summary(values) for stage, values in sorted(stages.items())},
+        'upstream_requests': {upstream: count - requests_before.get(upstream, 0)
+                              for upstream, count in stubs.requests.items()},
+        'rate_limited_responses': stubs.rate_limited_responses - rate_limited_before,
+        'max_rss_mb': max_rss_mb(),
+    }
+
+
+async def benchmark(args):
+    stubs = await StubUpstreams(
+        problems=args.problems, latency=args.latency, first_token=args.first_token, chunks=args.chunks,
+        rate_limited=args.rate_limited, retry_after=args.retry_after, post_sections=args.sections, seed=args.seed
+    ).start()
+    from services import storage
+    from services.http_session import http_pool
+    scenarios = {}
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            configure(stubs, args, data_dir)
+            from server import generate_blog_post, generate_blog_posts
+
+            async def sequential():
+                published = failed = 0
+                post_seconds = []
+                for _ in range(args.posts):
+                    started = time.perf_counter()
+                    try:
+                        await generate_blog_post(sampling=args.sampling)
+                        published += 1
+                        post_seconds.append(time.perf_counter() - started)
+                    except Exception:
+                        failed += 1
+                return published, failed, post_seconds
+
+            async def batch():
+                results = await generate_blog_posts(args.batch, sampling=args.sampling)
+                published = sum(1 for result in results if result['status'] == 'success')
+                return published, len(results) - published, []
+
+            if args.posts:
+                scenarios['sequential'] = await run_scenario(stubs, sequential, args.verbose)
+            if args.batch:
+                scenarios['batch'] = await run_scenario(stubs, batch, args.verbose)
+            storage.close_all()
+    finally:
+        await http_pool.close()
+        await stubs.stop()
+    return scenarios
+
+
+def format_ms(value):
+    return f"{value:8.1f}" if value is not None else f"{'-':>8}"
+
+
+def report(results):
+    for name, scenario in results['scenarios'].items():
+        print(f"\n{name}: {scenario['posts']} posts ({scenario['failed']} failed) in {scenario['seconds']:.2f} s, "
+              f"{scenario['posts_per_minute']:.1f} posts/min, max RSS {scenario['max_rss_mb']:.0f} MB")
+        requests = ', '.join(f"{upstream} {count}" for upstream, count in sorted(scenario['upstream_requests'].items()))
+        print(f"  requests: {requests}; {scenario['rate_limited_responses']} answered with 429")
+        print(f"  {'stage':<10} {'count':>6} {'p50 ms':>8} {'p99 ms':>8}")
+        rows = dict(scenario['stages'])
+        if scenario['post_latency']['count']:
+            rows['post'] = scenario['post_latency']
+        for stage, summary in rows.items():
+            print(f"  {stage:<10} {summary['count']:>6} {format_ms(summary['p50_ms'])} {format_ms(summary['p99_ms'])}")
+
+
+def compare(results, baseline):
+    """Print throughput and latency changes from an earlier results file"""
+    print(f"\nCompared with {baseline['commit']} ({baseline['created_at']}):")
+
+    def change(old, new):
+        if old is None or new is None:
+            return f"{'-':>8}"
+        return f"{(new - old) / old:+8.0%}" if old else f"{'-':>8}"
+
+    for name, scenario in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        print(f"  {name}: {before['posts_per_minute']:.1f} -> {scenario['posts_per_minute']:.1f} posts/min "
+              f"({change(before['posts_per_minute'], scenario['posts_per_minute']).strip()})")
+        for stage, summary in scenario['stages'].items():
+            old = before['stages'].get(stage)
+            if old:
+                print(f"    {stage:<10} p50 {change(old['p50_ms'], summary['p50_ms'])}  "
+                      f"p99 {change(old['p99_ms'], summary['p99_ms'])}")
+
+
+def main(args):
+    scenarios = asyncio.run(benchmark(args))
+    results = {
+        'commit': git_commit(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'verbose')},
+        'scenarios': scenarios,
+    }
+    report(results)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e-{results['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark post generation end to end against local stub upstreams')
+    parser.add_argument('--posts', type=int, default=10, help='Posts generated one after the other (0: skip)')
+    parser.add_argument('--batch', type=int, default=50, help='Posts generated as one batch (0: skip)')
+    parser.add_argument('--platform', choices=['ghost', 'wordpress'], default='ghost', help='Blog platform stub to publish to')
+    parser.add_argument('--languages', default='go', help='POST_LANGUAGES of the generated posts')
+    parser.add_argument('--sampling', choices=['page', 'uniform'], default='uniform', help='LeetCode problem sampling')
+    parser.add_argument('--problems', type=int, default=1000, help='Problems served by the LeetCode stub')
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds DeepSeek takes per completion')
+    parser.add_argument('--first-token', type=float, default=0.1, help='Seconds to the first streamed token')
+    parser.add_argument('--chunks', type=int, default=40, help='Chunks a streamed completion is sent in')
+    parser.add_argument('--stream', action=argparse.BooleanOptionalAction, default=True,
+                        help='Stream completions (DEEPSEEK_STREAM)')
+    parser.add_argument('--rate-limited', type=float, default=0.0,
+                        help='Fraction of completion requests answered with a 429')
+    parser.add_argument('--retry-after', type=float, default=0, help='Retry-After seconds sent with injected 429s')
+    parser.add_argument('--sections', type=int, default=16, help='Sections per generated post (about 600 bytes each)')
+    parser.add_argument('--rate-limits', default='',
+                        help='UPSTREAM_RATE_LIMITS to apply (default: unlimited, to measure the pipeline itself)')
+    parser.add_argument('--fetch-concurrency', type=int, default=4, help='BATCH_FETCH_CONCURRENCY')
+    parser.add_argument('--generate-concurrency', type=int, default=2,
+                        help='BATCH_GENERATE_CONCURRENCY and GENERATE_CONCURRENCY')
+    parser.add_argument('--publish-concurrency', type=int, default=2, help='BATCH_PUBLISH_CONCURRENCY')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the stubs\' random choices')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/e2e-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare with')
+    parser.add_argument('--verbose', action='store_true', help='Show the output of the services')
+    main(parser.parse_args())
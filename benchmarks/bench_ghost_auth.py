@@ -0,0 +1,126 @@
+"""Per-publish overhead of Ghost Admin API authentication.
+
+Publishes posts to a local stub Ghost server, once signing a new JWT for
+every request (the old behaviour) and once with the cached `GhostAdminAuth`
+token, and reports the time spent building auth headers and the publish
+latency per post.
+
+    python -m benchmarks.bench_ghost_auth --posts 1000
+"""
+import os
+
+# The benchmark measures auth overhead, not the Ghost rate limit
+os.environ['UPSTREAM_RATE_LIMITS'] = ''
+
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+import jwt
+from aiohttp import web
+from config.config import Config
+from services.ghost_service import GhostService
+from services.http_session import http_pool
+
+API_KEY = "6489f0d1a2b3c4d5e6f70819:" + "5f" * 32
+
+
+def legacy_auth_headers(api_key):
+    """The old `GhostService._auth_headers`: split, decode and sign on every call"""
+    id, secret = api_key.split(':')
+    now = int(time.time())
+    header = {'alg': 'HS256', 'typ': 'JWT', 'kid': id}
+    payload = {'iat': now, 'exp': now + 120, 'aud': '/admin/'}
+    try:
+        secret_bytes = bytes.fromhex(secret)
+    except ValueError:
+        secret_bytes = secret.encode()
+    token = jwt.encode(payload, secret_bytes, algorithm='HS256', headers=header)
+    return {
+        "Authorization": f"Ghost {token}",
+        "Content-Type": "application/json",
+        "Accept-Version": "v5.0"
+    }
+
+
+class LegacyGhostService(GhostService):
+    def _auth_headers(self):
+        return legacy_auth_headers(self.api_key)
+
+
+async def _create_post(request):
+    body = await request.json()
+    post = body["posts"][0]
+    return web.json_response({"posts": [{"id": "1", "url": f"/{post['slug']}/", "title": post["title"]}]}, status=201)
+
+
+async def start_stub_ghost():
+    app = web.Application()
+    app.router.add_post('/ghost/api/admin/posts/', _create_post)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def time_auth_headers(service, posts):
+    """Microseconds per `_auth_headers` call"""
+    started = time.perf_counter()
+    for _ in range(posts):
+        service._auth_headers()
+    return (time.perf_counter() - started) / posts * 1e6
+
+
+async def time_publishes(service, posts):
+    """Milliseconds per publish"""
+    samples = []
+    # Keep the per-post log lines out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(posts):
+            started = time.perf_counter()
+            await service.execute(f"Benchmark Post {i}", "<p>Benchmark content</p>")
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(name, auth_us, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<14} auth={auth_us:8.2f} us/call  publish mean={statistics.mean(samples):6.3f} ms  "
+          f"p50={statistics.median(samples):6.3f} ms  p99={p99:6.3f} ms")
+    return auth_us, statistics.mean(samples)
+
+
+async def main(posts):
+    runner, url = await start_stub_ghost()
+    config = Config()
+    config.ghost_url = url
+    config.ghost_api_key = API_KEY
+    legacy, cached = LegacyGhostService(), GhostService()
+    try:
+        # Warm up the connection pool and both code paths
+        await time_publishes(legacy, 10)
+        await time_publishes(cached, 10)
+
+        results = {}
+        for name, service in (("per-request", legacy), ("cached token", cached)):
+            auth_us = time_auth_headers(service, posts)
+            results[name] = summarize(name, auth_us, await time_publishes(service, posts))
+    finally:
+        await http_pool.close()
+        await runner.cleanup()
+
+    (legacy_auth, legacy_mean), (cached_auth, cached_mean) = results.values()
+    print(f"{posts} posts; auth overhead per publish: {legacy_auth:.2f} us -> {cached_auth:.2f} us "
+          f"({legacy_auth / cached_auth:.1f}x less), publish latency {legacy_mean:.3f} ms -> {cached_mean:.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark Ghost Admin API authentication')
+    parser.add_argument('--posts', type=int, default=1000, help='Number of posts to publish per variant')
+    args = parser.parse_args()
+    asyncio.run(main(args.posts))
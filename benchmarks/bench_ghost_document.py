@@ -0,0 +1,85 @@
+"""Ghost post payload size and build time, raw HTML card vs converted mobiledoc.
+
+Builds the Ghost Admin API request body for generated-style posts of
+growing size, once as before (the HTML twice: as `html` and inside a
+mobiledoc HTML card) and once with `html_to_mobiledoc`, and reports the
+request body size and the time to build it.
+
+    python -m benchmarks.bench_ghost_document --sections 10,100,1000
+"""
+import argparse
+import json
+import time
+from services.ghost_document import html_to_mobiledoc
+
+SECTION = """<h2>Step {i}: Build the Index</h2>
+<p>Walk the array once and remember where every value was seen, so the
+<strong>complement</strong> of each number is found in <code>O(1)</code> with a
+<a href="https://go.dev/blog/maps">Go map</a> &amp; no nested loop.</p>
+<ul>
+<li>Time: <code>O(n)</code></li>
+<li>Space: <code>O(n)</code> for the map</li>
+</ul>
+<pre><code class="language-go">
+func twoSum{i}(nums []int, target int) []int {{
+    seen := make(map[int]int, len(nums))
+    for i, n := range nums {{
+        if j, ok := seen[target-n]; ok {{
+            return []int{{j, i}}
+        }}
+        seen[n] = i
+    }}
+    return nil
+}}
+</code></pre>
+"""
+
+
+def make_post(sections):
+    return '<h1>Solving the LeetCode "Two Sum" Problem in Go</h1>\n' + "".join(
+        SECTION.format(i=i) for i in range(sections)
+    )
+
+
+def legacy_body(content):
+    """The request body as `GhostService.execute` built it before"""
+    mobiledoc = {
+        "version": "0.3.1",
+        "atoms": [],
+        "cards": [["html", {"html": content}]],
+        "markups": [],
+        "sections": [[10, 0]]
+    }
+    return json.dumps({"posts": [{"title": "Two Sum", "html": content, "mobiledoc": json.dumps(mobiledoc)}]})
+
+
+def mobiledoc_body(content):
+    mobiledoc = json.dumps(html_to_mobiledoc(content), separators=(",", ":"))
+    return json.dumps({"posts": [{"title": "Two Sum", "mobiledoc": mobiledoc}]})
+
+
+def measure(build, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = build(content)
+        best = min(best, time.perf_counter() - started)
+    return len(body.encode()), best * 1000
+
+
+def main(sizes, repeat):
+    print(f"{'sections':>8} {'html':>9} {'legacy body':>12} {'mobiledoc body':>15} {'legacy':>10} {'convert':>10}")
+    for sections in sizes:
+        content = make_post(sections)
+        legacy_bytes, legacy_ms = measure(legacy_body, content, repeat)
+        new_bytes, new_ms = measure(mobiledoc_body, content, repeat)
+        print(f"{sections:>8} {len(content) // 1024:>6} KB {legacy_bytes // 1024:>9} KB {new_bytes // 1024:>12} KB "
+              f"{legacy_ms:>7.2f} ms {new_ms:>7.2f} ms  ({new_bytes / legacy_bytes:.0%} of the legacy body)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Ghost mobiledoc converter')
+    parser.add_argument('--sections', default='10,100,1000', help='Comma-separated post sizes, in sections')
+    parser.add_argument('--repeat', type=int, default=10, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+    main([int(size) for size in args.sections.split(',')], args.repeat)
@@ -0,0 +1,151 @@
+"""Benchmark of the Go formatter over a corpus of generated-style snippets.
+
+Compares the brace counter `_beautify_go_code_in_html` used before
+services/go_formatter.py (kept here as a baseline) with
+`beautify_go_code_in_html`, cold and with the per-code cache warm, and
+reports how many snippets the brace counter indents differently.
+
+    python -m benchmarks.bench_go_formatter
+"""
+import argparse
+import re
+import time
+from services.go_formatter import beautify_go_code_in_html, format_go_code
+
+
+def legacy_beautify_go_code_in_html(html):
+    """The brace counter as it was in DeepSeekService"""
+    def simple_indent_go_code(code):
+        indent = 0
+        result = []
+        for line in code.splitlines():
+            stripped = line.strip()
+            if stripped == "":
+                result.append("")
+                continue
+            if stripped.startswith("}"):
+                indent -= 1
+            result.append("    " * indent + stripped)
+            if stripped.endswith("{"):
+                indent += 1
+        return "\n".join(result)
+
+    def format_code(match):
+        return f'<pre><code class="language-go">\n{simple_indent_go_code(match.group(1))}\n</code></pre>'
+    return re.sub(
+        r'<pre><code class="language-go">\s*(.*?)\s*</code></pre>',
+        lambda m: format_code(m),
+        html,
+        flags=re.DOTALL
+    )
+
+
+SNIPPETS = [
+    """func twoSum(nums []int, target int) []int {
+seen := make(map[int]int, len(nums))
+for i, n := range nums {
+if j, ok := seen[target-n]; ok {
+return []int{j, i}
+}
+seen[n] = i
+}
+return nil
+}""",
+    """func isValid(s string) bool {
+pairs := map[rune]rune{')': '(', ']': '[', '}': '{'}
+stack := []rune{}
+for _, c := range s {
+switch c {
+case '(', '[', '{':
+stack = append(stack, c)
+default:
+if len(stack) == 0 || stack[len(stack)-1] != pairs[c] {
+return false
+}
+stack = stack[:len(stack)-1]
+}
+}
+return len(stack) == 0
+}""",
+    """func format(name string) string {
+// Wrap the name in braces: {name}
+return fmt.Sprintf("{%s}", name)
+}""",
+    """func walk(root *TreeNode, visit func(*TreeNode)) {
+if root == nil {
+return
+}
+walk(root.Left, func(n *TreeNode) {
+visit(n)
+})
+visit(root)
+walk(root.Right, visit)
+}""",
+    """const usage = `usage: solve {input}
+  prints the answer }`
+
+func main() {
+/* read input {
+   one line per case */
+var n int
+fmt.Scan(&n)
+fmt.Println(solve(n))
+}""",
+    """func search(grid [][]byte) int {
+count := 0
+outer:
+for i := range grid {
+for j := range grid[i] {
+if grid[i][j] == '}' {
+continue outer
+}
+count++
+}
+}
+return count
+}""",
+]
+
+
+def make_post(snippets):
+    return "\n".join(
+        f'<h2>Step {i}</h2>\n<pre><code class="language-go">\n{code}\n</code></pre>'
+        for i, code in enumerate(snippets)
+    )
+
+
+def measure(func, html, repeat, clear_cache=False):
+    best = float("inf")
+    for _ in range(repeat):
+        if clear_cache:
+            format_go_code.cache_clear()
+        start = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(repeat, copies):
+    differing = sum(
+        legacy_beautify_go_code_in_html(make_post([code])) != beautify_go_code_in_html(make_post([code]))
+        for code in SNIPPETS
+    )
+    print(f"Snippets the brace counter indents differently: {differing}/{len(SNIPPETS)}")
+
+    html = make_post(SNIPPETS * copies)
+    legacy_ms = measure(legacy_beautify_go_code_in_html, html, repeat)
+    cold_ms = measure(beautify_go_code_in_html, html, repeat, clear_cache=True)
+    beautify_go_code_in_html(html)
+    warm_ms = measure(beautify_go_code_in_html, html, repeat)
+    print(f"{len(SNIPPETS) * copies} blocks, {len(html) // 1024} KB")
+    print(f"{'legacy brace counter':<22} {legacy_ms:>8.2f} ms")
+    print(f"{'lexer, cold cache':<22} {cold_ms:>8.2f} ms")
+    print(f"{'lexer, warm cache':<22} {warm_ms:>8.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Go code formatter')
+    parser.add_argument('--repeat', type=int, default=20, help='Timing repetitions (best is reported)')
+    parser.add_argument('--copies', type=int, default=50, help='Times the corpus is repeated in the post')
+    args = parser.parse_args()
+    main(args.repeat, args.copies)
@@ -0,0 +1,98 @@
+"""Compare per-run HTTP latency with fresh sessions vs the shared session pool.
+
+Starts three local stub servers standing in for LeetCode, DeepSeek and the blog
+platform, then replays the request pattern of one pipeline run (one call to
+each host) many times.
+
+    python -m benchmarks.bench_http_session --runs 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import aiohttp
+from aiohttp import web
+from services.http_session import HttpSessionPool
+
+
+async def _handler(request):
+    await request.read()
+    return web.json_response({"ok": True})
+
+
+async def start_stub_hosts(count=3):
+    """Start `count` stub HTTP servers on localhost and return (runners, urls)"""
+    runners, urls = [], []
+    for _ in range(count):
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', _handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        runners.append(runner)
+        urls.append(f"http://localhost:{port}/")
+    return runners, urls
+
+
+async def run_fresh_sessions(urls):
+    """One pipeline run the old way: a new ClientSession per upstream call"""
+    for url in urls:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(url, json={"q": "x"}) as response:
+                await response.read()
+
+
+async def run_pooled(pool, urls):
+    """One pipeline run through the shared pool"""
+    session = await pool.get_session()
+    for url in urls:
+        async with session.post(url, json={"q": "x"}) as response:
+            await response.read()
+
+
+async def measure(run, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<16} mean={statistics.mean(samples):7.3f} ms  "
+          f"p50={statistics.median(samples):7.3f} ms  p99={p99:7.3f} ms")
+    return statistics.mean(samples)
+
+
+async def main(runs):
+    runners, urls = await start_stub_hosts()
+    pool = HttpSessionPool()
+    try:
+        # Warm up both paths so import/JIT-ish costs are excluded
+        await run_fresh_sessions(urls)
+        await run_pooled(pool, urls)
+
+        fresh = await measure(lambda: run_fresh_sessions(urls), runs)
+        pooled = await measure(lambda: run_pooled(pool, urls), runs)
+    finally:
+        await pool.close()
+        for runner in runners:
+            await runner.cleanup()
+
+    print(f"{runs} runs x {len(urls)} upstream calls per run")
+    fresh_mean = summarize("fresh sessions", fresh)
+    pooled_mean = summarize("pooled session", pooled)
+    print(f"per-run latency reduction: {fresh_mean - pooled_mean:.3f} ms "
+          f"({(1 - pooled_mean / fresh_mean) * 100:.1f}%)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the shared HTTP session pool')
+    parser.add_argument('--runs', type=int, default=200, help='Number of simulated pipeline runs')
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,87 @@
+"""Import time of the web process, as a regression gate.
+
+Imports `server` in fresh interpreters under `python -X importtime` and
+reports the median cumulative import time of the module and its slowest
+direct imports. Exits with status 1 when the median is over `--max-ms`,
+or when a dependency that is only needed once work starts (aiohttp,
+APScheduler, PyJWT, python-dotenv) is loaded by the import.
+
+    python -m benchmarks.bench_import_time --runs 5 --max-ms 500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULE = 'server'
+# Loaded on first use: with the first HTTP session, by the scheduler leader,
+# by the first Ghost token and by the first Config()
+LAZY_MODULES = ('aiohttp', 'apscheduler', 'jwt', 'dotenv')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import(module):
+    """(depth, name, cumulative microseconds) of every import of `import module` in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise Exception(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append(((len(name) - len(name.lstrip(' '))) // 2, name.strip(), int(cumulative)))
+    return imports
+
+
+def module_imports(imports, module):
+    """Cumulative microseconds of `module` and of each of its direct imports"""
+    # -X importtime lists the imports of a module right before the module itself, one level deeper
+    end = next(i for i, (_, name, _) in enumerate(imports) if name == module)
+    depth, _, total = imports[end]
+    children = {}
+    for level, name, cumulative in reversed(imports[:end]):
+        if level <= depth:
+            break
+        if level == depth + 1:
+            children[name] = cumulative
+    return total, children
+
+
+def main(runs, max_ms, top):
+    samples = [measure_import(MODULE) for _ in range(runs)]
+    measured = [module_imports(imports, MODULE) for imports in samples]
+    totals = sorted(total / 1000 for total, _ in measured)
+    median = statistics.median(totals)
+    children = {
+        name: statistics.median(imports.get(name, 0) for _, imports in measured) / 1000
+        for name in measured[0][1]
+    }
+
+    print(f"import {MODULE}: median {median:.1f} ms over {runs} runs (min {totals[0]:.1f} ms, max {totals[-1]:.1f} ms)")
+    for name, ms in sorted(children.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<40} {ms:>8.1f} ms")
+
+    failures = []
+    eager = sorted({name.split('.')[0] for imports in samples for _, name, _ in imports} & set(LAZY_MODULES))
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    if max_ms and median > max_ms:
+        failures.append(f"median {median:.1f} ms is over the {max_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure and gate the import time of the web process')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to import in (median is reported)')
+    parser.add_argument('--max-ms', type=float, default=500, help='Largest allowed median import time (0: no limit)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest direct imports to list')
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.max_ms, args.top))
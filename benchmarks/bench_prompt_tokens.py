@@ -0,0 +1,236 @@
+"""Prompt tokens saved by compacting the LeetCode problem HTML.
+
+Builds the Go prompt for every problem of a sample catalog, once with the
+raw `content` HTML (the old behaviour) and once with `compact_problem`,
+and reports the estimated prompt tokens per problem and in total, plus
+the normalization time.
+
+By default a built-in sample of LeetCode-style problems is used; with
+`--catalog` the problems whose content is stored in the local problem
+catalog (DATA_DIR/leetcode_catalog.db) are used instead.
+
+    python -m benchmarks.bench_prompt_tokens --budget 600
+"""
+import argparse
+import time
+from services.problem_normalizer import compact_problem, estimate_tokens
+from strategies.go_post_strategy import GoPostStrategy
+
+SAMPLES = [
+    {
+        "title": "Two Sum",
+        "difficulty": "Easy",
+        "topicTags": [{"name": "Array"}, {"name": "Hash Table"}],
+        "content": """<p>Given an array of integers&nbsp;<code>nums</code>&nbsp;and an integer&nbsp;<code>target</code>, return <em>indices of the two numbers such that they add up to <code>target</code></em>.</p>
+
+<p>You may assume that each input would have <strong><em>exactly</em> one solution</strong>, and you may not use the <em>same</em> element twice.</p>
+
+<p>You can return the answer in any order.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [2,7,11,15], target = 9
+<strong>Output:</strong> [0,1]
+<strong>Explanation:</strong> Because nums[0] + nums[1] == 9, we return [0, 1].
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [3,2,4], target = 6
+<strong>Output:</strong> [1,2]
+</pre>
+
+<p><strong class="example">Example 3:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [3,3], target = 6
+<strong>Output:</strong> [0,1]
+</pre>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li><code>2 &lt;= nums.length &lt;= 10<sup>4</sup></code></li>
+	<li><code>-10<sup>9</sup> &lt;= nums[i] &lt;= 10<sup>9</sup></code></li>
+	<li><code>-10<sup>9</sup> &lt;= target &lt;= 10<sup>9</sup></code></li>
+	<li><strong>Only one valid answer exists.</strong></li>
+</ul>
+
+<p>&nbsp;</p>
+<strong>Follow-up:&nbsp;</strong>Can you come up with an algorithm that is less than <code>O(n<sup>2</sup>)</code><font face="monospace">&nbsp;</font>time complexity?""",
+    },
+    {
+        "title": "Reverse Linked List",
+        "difficulty": "Easy",
+        "topicTags": [{"name": "Linked List"}, {"name": "Recursion"}],
+        "content": """<p>Given the <code>head</code> of a singly linked list, reverse the list, and return <em>the reversed list</em>.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+<img alt="" src="https://assets.leetcode.com/uploads/2021/02/19/rev1ex1.jpg" style="width: 542px; height: 222px;" />
+<pre>
+<strong>Input:</strong> head = [1,2,3,4,5]
+<strong>Output:</strong> [5,4,3,2,1]
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+<img alt="" src="https://assets.leetcode.com/uploads/2021/02/19/rev1ex2.jpg" style="width: 182px; height: 222px;" />
+<pre>
+<strong>Input:</strong> head = [1,2]
+<strong>Output:</strong> [2,1]
+</pre>
+
+<p><strong class="example">Example 3:</strong></p>
+
+<pre>
+<strong>Input:</strong> head = []
+<strong>Output:</strong> []
+</pre>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li>The number of nodes in the list is the range <code>[0, 5000]</code>.</li>
+	<li><code>-5000 &lt;= Node.val &lt;= 5000</code></li>
+</ul>
+
+<p>&nbsp;</p>
+<p><strong>Follow up:</strong> A linked list can be reversed either iteratively or recursively. Could you implement both?</p>""",
+    },
+    {
+        "title": "Longest Palindromic Substring",
+        "difficulty": "Medium",
+        "topicTags": [{"name": "Two Pointers"}, {"name": "String"}, {"name": "Dynamic Programming"}],
+        "content": """<p>Given a string <code>s</code>, return <em>the longest</em> <span data-keyword="palindromic-string"><em>palindromic</em></span> <span data-keyword="substring-nonempty"><em>substring</em></span> in <code>s</code>.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+
+<div class="example-block">
+<p><strong>Input:</strong> <span class="example-io">s = &quot;babad&quot;</span></p>
+
+<p><strong>Output:</strong> <span class="example-io">&quot;bab&quot;</span></p>
+
+<p><strong>Explanation:</strong> &quot;aba&quot; is also a valid answer.</p>
+</div>
+
+<p><strong class="example">Example 2:</strong></p>
+
+<div class="example-block">
+<p><strong>Input:</strong> <span class="example-io">s = &quot;cbbd&quot;</span></p>
+
+<p><strong>Output:</strong> <span class="example-io">&quot;bb&quot;</span></p>
+</div>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li><code>1 &lt;= s.length &lt;= 1000</code></li>
+	<li><code>s</code> consist of only digits and English letters.</li>
+</ul>""",
+    },
+    {
+        "title": "Number of Islands",
+        "difficulty": "Medium",
+        "topicTags": [{"name": "Array"}, {"name": "Depth-First Search"}, {"name": "Breadth-First Search"},
+                      {"name": "Union Find"}, {"name": "Matrix"}],
+        "content": """<p>Given an <code>m x n</code> 2D binary grid <code>grid</code> which represents a map of <code>&#39;1&#39;</code>s (land) and <code>&#39;0&#39;</code>s (water), return <em>the number of islands</em>.</p>
+
+<p>An <strong>island</strong> is surrounded by water and is formed by connecting adjacent lands horizontally or vertically. You may assume all four edges of the grid are all surrounded by water.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+
+<pre>
+<strong>Input:</strong> grid = [
+  [&quot;1&quot;,&quot;1&quot;,&quot;1&quot;,&quot;1&quot;,&quot;0&quot;],
+  [&quot;1&quot;,&quot;1&quot;,&quot;0&quot;,&quot;1&quot;,&quot;0&quot;],
+  [&quot;1&quot;,&quot;1&quot;,&quot;0&quot;,&quot;0&quot;,&quot;0&quot;],
+  [&quot;0&quot;,&quot;0&quot;,&quot;0&quot;,&quot;0&quot;,&quot;0&quot;]
+]
+<strong>Output:</strong> 1
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+
+<pre>
+<strong>Input:</strong> grid = [
+  [&quot;1&quot;,&quot;1&quot;,&quot;0&quot;,&quot;0&quot;,&quot;0&quot;],
+  [&quot;1&quot;,&quot;1&quot;,&quot;0&quot;,&quot;0&quot;,&quot;0&quot;],
+  [&quot;0&quot;,&quot;0&quot;,&quot;1&quot;,&quot;0&quot;,&quot;0&quot;],
+  [&quot;0&quot;,&quot;0&quot;,&quot;0&quot;,&quot;1&quot;,&quot;1&quot;]
+]
+<strong>Output:</strong> 3
+</pre>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li><code>m == grid.length</code></li>
+	<li><code>n == grid[i].length</code></li>
+	<li><code>1 &lt;= m, n &lt;= 300</code></li>
+	<li><code>grid[i][j]</code> is <code>&#39;0&#39;</code> or <code>&#39;1&#39;</code>.</li>
+</ul>""",
+    },
+]
+
+
+class RawContentStrategy(GoPostStrategy):
+    """The prompt as it was built before: the problem HTML inserted unchanged"""
+
+    def problem_fields(self, problem_data):
+        return {**super().problem_fields(problem_data), 'content': problem_data.get('content') or ''}
+
+
+def prompt_tokens(prompt):
+    return estimate_tokens(prompt.prefix) + estimate_tokens(prompt.body)
+
+
+def load_catalog(limit):
+    from services.problem_catalog import ProblemCatalog
+    catalog = ProblemCatalog()
+    rows = catalog.conn.execute(
+        "SELECT title_slug FROM problems WHERE content IS NOT NULL LIMIT ?", (limit,)
+    ).fetchall()
+    return [catalog.get(row[0]) for row in rows]
+
+
+def main(budget, use_catalog, limit):
+    problems = load_catalog(limit) if use_catalog else SAMPLES
+    if not problems:
+        print("No problem content stored in the catalog; run without --catalog for the built-in sample")
+        return
+    raw_strategy, compact_strategy = RawContentStrategy(budget), GoPostStrategy(budget)
+
+    raw_total = compact_total = 0
+    started = time.perf_counter()
+    for problem in problems:
+        compact_problem(problem['content'], budget)
+    normalize_ms = (time.perf_counter() - started) / len(problems) * 1000
+
+    print(f"{'problem':<40} {'raw prompt':>11} {'compact':>8} {'saved':>6}")
+    for problem in problems:
+        raw = prompt_tokens(raw_strategy.build_prompt(problem))
+        compact = prompt_tokens(compact_strategy.build_prompt(problem))
+        raw_total += raw
+        compact_total += compact
+        print(f"{problem['title'][:40]:<40} {raw:>11} {compact:>8} {1 - compact / raw:>6.0%}")
+    print(f"{len(problems)} problems, budget {budget or 'none'}: {raw_total} -> {compact_total} estimated prompt tokens "
+          f"({raw_total - compact_total} saved, {1 - compact_total / raw_total:.0%}); "
+          f"normalization {normalize_ms:.2f} ms per problem")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report prompt tokens saved by compacting LeetCode problems')
+    parser.add_argument('--budget', type=int, default=600, help='PROMPT_PROBLEM_TOKENS to apply (0: no limit)')
+    parser.add_argument('--catalog', action='store_true', help='Use problems stored in the local problem catalog')
+    parser.add_argument('--limit', type=int, default=200, help='Most catalog problems to use')
+    args = parser.parse_args()
+    main(args.budget, args.catalog, args.limit)
@@ -0,0 +1,219 @@
+"""Local aiohttp stand-ins for the upstream APIs, for end-to-end benchmarks.
+
+`StubUpstreams` serves the LeetCode GraphQL API, DeepSeek chat completions
+(regular or streamed, with a configurable latency and injected 429s) and
+the Ghost and WordPress admin APIs, each on its own localhost port like
+separate hosts, and counts the requests every upstream received.
+"""
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from aiohttp import web
+
+TOPICS = ["Array", "Hash Table", "Two Pointers", "String", "Dynamic Programming", "Graph"]
+
+PROBLEM_CONTENT = """<p>Given an array of integers&nbsp;<code>nums</code>&nbsp;and an integer&nbsp;<code>target</code>, return <em>the answer for problem {i}</em>.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+<pre>
+<strong>Input:</strong> nums = [2,7,11,15], target = 9
+<strong>Output:</strong> [0,1]
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+<pre>
+<strong>Input:</strong> nums = [3,2,4], target = 6
+<strong>Output:</strong> [1,2]
+</pre>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+<ul>
+	<li><code>2 &lt;= nums.length &lt;= 10<sup>4</sup></code></li>
+	<li><code>-10<sup>9</sup> &lt;= nums[i] &lt;= 10<sup>9</sup></code></li>
+</ul>"""
+
+POST_SECTION = """<h2>Step {i}: Build the Index</h2>
+<p>Walk the array once and remember where every value was seen, so the
+<strong>complement</strong> of each number is found in <code>O(1)</code> with a
+<a href="https://go.dev/blog/maps">Go map</a> &amp; no nested loop.</p>
+<ul>
+<li>Time: <code>O(n)</code></li>
+<li>Space: <code>O(n)</code> for the map</li>
+</ul>
+<pre><code class="language-go">
+func twoSum{i}(nums []int, target int) []int {{
+seen := make(map[int]int, len(nums))
+for i, n := range nums {{
+if j, ok := seen[target-n]; ok {{
+return []int{{j, i}}
+}}
+seen[n] = i
+}}
+return nil
+}}
+</code></pre>
+"""
+
+_TITLE_RE = re.compile(r"- Title: (.*)")
+
+
+def make_problems(count):
+    return [{
+        "title": f"Stub Problem {i}",
+        "titleSlug": f"stub-problem-{i}",
+        "difficulty": "Medium",
+        "acRate": 40 + i % 50,
+        "paidOnly": False,
+        "topicTags": [{"name": name, "slug": name.lower().replace(" ", "-")}
+                      for name in (TOPICS[i % len(TOPICS)], TOPICS[(i + 1) % len(TOPICS)])],
+        "content": PROBLEM_CONTENT.format(i=i),
+    } for i in range(count)]
+
+
+def make_completion(title, sections):
+    """A completion shaped like DeepSeek's: a wrapper sentence, then the post HTML with unindented Go code"""
+    return (
+        "Here's the blog post:\n\n"
+        f'<h1>Solving the LeetCode "{title}" Problem in Go</h1>\n'
+        '<p class="meta">Difficulty: Medium | Tags: Array, Hash Table</p>\n'
+        + "".join(POST_SECTION.format(i=i) for i in range(sections))
+    )
+
+
+class StubUpstreams:
+    """LeetCode, DeepSeek, Ghost and WordPress stubs on localhost.
+
+    DeepSeek answers after `latency` seconds; streamed completions send
+    their first token after `first_token` seconds and the rest in `chunks`
+    pieces spread over the remaining latency. A `rate_limited` fraction of
+    completion requests is answered with a 429 and `Retry-After:
+    retry_after` instead. Random choices are seeded, so runs are repeatable.
+    """
+
+    def __init__(self, problems=1000, latency=0.5, first_token=0.1, chunks=40, rate_limited=0.0,
+                 retry_after=0, post_sections=16, seed=0):
+        self.problems = make_problems(problems)
+        self.by_slug = {problem["titleSlug"]: problem for problem in self.problems}
+        self.latency = latency
+        self.first_token = min(first_token, latency)
+        self.chunks = max(1, chunks)
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.post_sections = post_sections
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.rate_limited_responses = 0
+        self.urls = {}
+        self._runners = []
+        self._post_ids = 0
+
+    async def start(self):
+        for name, routes in (
+            ("leetcode", [("POST", "/graphql", self.leetcode)]),
+            ("deepseek", [("POST", "/v1/chat/completions", self.deepseek)]),
+            ("ghost", [("POST", "/ghost/api/admin/posts/", self.ghost)]),
+            ("wordpress", [("POST", "/wp-json/wp/v2/posts", self.wordpress),
+                           ("POST", "/wp-json/batch/v1", self.wordpress_batch)]),
+        ):
+            app = web.Application(client_max_size=16 * 1024 * 1024)
+            for method, path, handler in routes:
+                app.router.add_route(method, path, handler)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self._runners.append(runner)
+            self.urls[name] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
+
+    def environment(self):
+        """Settings that point the services at the stubs"""
+        return {
+            "LEETCODE_GRAPHQL_URL": f"{self.urls['leetcode']}/graphql",
+            "DEEPSEEK_API_URL": f"{self.urls['deepseek']}/v1/chat/completions",
+            "GHOST_URL": self.urls["ghost"],
+            "WP_URL": self.urls["wordpress"],
+        }
+
+    async def leetcode(self, request):
+        self.requests["leetcode"] += 1
+        body = await request.json()
+        query, variables = body["query"], body.get("variables") or {}
+        if "question(titleSlug" in query:
+            problem = self.by_slug.get(variables.get("titleSlug"))
+            return web.json_response({"data": {"question": {"content": problem["content"]} if problem else None}})
+
+        skip, limit = variables.get("skip", 0), variables.get("limit", 50)
+        question_list = {"totalNum": len(self.problems)}
+        if "data {" in query:
+            fields = [field for field in ("title", "titleSlug", "difficulty", "acRate", "paidOnly", "topicTags",
+                                          "content") if field in query]
+            question_list["data"] = [
+                {field: problem[field] for field in fields} for problem in self.problems[skip:skip + limit]
+            ]
+        return web.json_response({"data": {"problemsetQuestionList": question_list}})
+
+    async def deepseek(self, request):
+        self.requests["deepseek"] += 1
+        payload = await request.json()
+        if self.rate_limited and self.random.random() < self.rate_limited:
+            self.rate_limited_responses += 1
+            return web.json_response({"error": {"message": "Rate limit reached"}}, status=429,
+                                     headers={"Retry-After": str(self.retry_after)})
+
+        match = _TITLE_RE.search(payload["messages"][-1]["content"])
+        completion = make_completion(match.group(1) if match else "Stub Problem", self.post_sections)
+        if not payload.get("stream"):
+            await asyncio.sleep(self.latency)
+            return web.json_response({"choices": [{"message": {"role": "assistant", "content": completion}}]})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(self.first_token)
+        size = -(-len(completion) // self.chunks)
+        pause = (self.latency - self.first_token) / self.chunks
+        for start in range(0, len(completion), size):
+            chunk = {"choices": [{"delta": {"content": completion[start:start + size]}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(pause)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def _next_post_id(self):
+        self._post_ids += 1
+        return self._post_ids
+
+    async def ghost(self, request):
+        self.requests["ghost"] += 1
+        post = (await request.json())["posts"][0]
+        post_id = self._next_post_id()
+        return web.json_response({"posts": [{
+            "id": str(post_id), "title": post["title"], "slug": post.get("slug"),
+            "status": post.get("status"), "url": f"{self.urls['ghost']}/{post.get('slug')}/"
+        }]}, status=201)
+
+    def _wordpress_post(self, body):
+        post_id = self._next_post_id()
+        return {"id": post_id, "title": {"rendered": body["title"]}, "status": body.get("status"),
+                "link": f"{self.urls['wordpress']}/?p={post_id}"}
+
+    async def wordpress(self, request):
+        self.requests["wordpress"] += 1
+        return web.json_response(self._wordpress_post(await request.json()), status=201)
+
+    async def wordpress_batch(self, request):
+        self.requests["wordpress"] += 1
+        batch = await request.json()
+        return web.json_response({"responses": [
+            {"status": 201, "body": self._wordpress_post(item["body"])} for item in batch["requests"]
+        ]}, status=207)
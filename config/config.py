@@ -1,5 +1,4 @@
 import os
-from dotenv import load_dotenv
 import time
 
 class Config:
@@ -12,9 +11,14 @@ class Config:
         return cls._instance
 
     def _load_config(self):
+        from dotenv import load_dotenv
         load_dotenv()
         # DeepSeek configuration (optional)
         self.deepseek_api_key = os.getenv('DEEPSEEK_API_KEY')
+
+        # Upstream endpoints; only changed to point at stand-ins, e.g. the benchmark stubs
+        self.deepseek_api_url = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.com/v1/chat/completions')
+        self.leetcode_graphql_url = os.getenv('LEETCODE_GRAPHQL_URL', 'https://leetcode.com/graphql')
         
         # Blog platform selection
         self.blog_platform = os.getenv('BLOG_PLATFORM', 'ghost')  # Default to Ghost
@@ -29,7 +33,77 @@ class Config:
         # Ghost configuration
         self.ghost_url = os.getenv('GHOST_URL')
         self.ghost_api_key = os.getenv('GHOST_API_KEY')
+        # mobiledoc: converted locally; html: sent as HTML for Ghost to convert
+        self.ghost_content_format = os.getenv('GHOST_CONTENT_FORMAT', 'mobiledoc').lower()
         
+        # Local storage configuration (":memory:" keeps local stores in memory)
+        self.data_dir = os.getenv('DATA_DIR') or 'data'
+
+        # LeetCode problem catalog configuration
+        self.leetcode_catalog = os.getenv('LEETCODE_CATALOG', 'false').lower() == 'true'
+        self.leetcode_catalog_max_age = int(os.getenv('LEETCODE_CATALOG_MAX_AGE', '86400'))
+
+        # DeepSeek streaming configuration
+        self.deepseek_stream = os.getenv('DEEPSEEK_STREAM', 'true').lower() == 'true'
+        self.deepseek_stall_timeout = float(os.getenv('DEEPSEEK_STALL_TIMEOUT', '30'))
+
+        # Estimated tokens of problem text allowed in a prompt (0: no limit)
+        self.prompt_problem_tokens = int(os.getenv('PROMPT_PROBLEM_TOKENS', '600'))
+
+        # Languages a post is written in; several publish one linked post per language
+        self.post_languages = [
+            language.strip().lower() for language in os.getenv('POST_LANGUAGES', 'go').split(',') if language.strip()
+        ] or ['go']
+        # DeepSeek generations in flight at once across all languages and runs
+        self.generate_concurrency = int(os.getenv('GENERATE_CONCURRENCY', '3'))
+
+        # DeepSeek response cache configuration
+        self.deepseek_cache = os.getenv('DEEPSEEK_CACHE', 'true').lower() == 'true'
+        self.deepseek_cache_ttl = float(os.getenv('DEEPSEEK_CACHE_TTL', '604800'))  # 7 days
+        self.deepseek_cache_max_bytes = int(os.getenv('DEEPSEEK_CACHE_MAX_BYTES', str(100 * 1024 * 1024)))
+
+        # Seed the published-problem index from existing blog posts on first use
+        self.published_index_seed = os.getenv('PUBLISHED_INDEX_SEED', 'false').lower() == 'true'
+
+        # Per-stage concurrency of batch generation
+        self.batch_fetch_concurrency = int(os.getenv('BATCH_FETCH_CONCURRENCY', '4'))
+        self.batch_generate_concurrency = int(os.getenv('BATCH_GENERATE_CONCURRENCY', '2'))
+        self.batch_publish_concurrency = int(os.getenv('BATCH_PUBLISH_CONCURRENCY', '2'))
+
+        # Requests per second allowed to each upstream, as name=rate pairs (0 or unlisted: unlimited)
+        self.upstream_rate_limits = {
+            name.strip(): float(rate)
+            for name, rate in (
+                item.split('=') for item in
+                os.getenv('UPSTREAM_RATE_LIMITS', 'leetcode=2,deepseek=1,ghost=2,wordpress=2').split(',')
+                if item.strip()
+            )
+        }
+        # Consecutive failures after which an upstream is not called for CIRCUIT_RESET_TIMEOUT seconds
+        self.circuit_failure_threshold = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+        self.circuit_reset_timeout = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+
+        # Posts generated ahead of the cron schedule (0: generate at the slot); see docs/USAGE.md
+        self.prefetch_posts = int(os.getenv('PREFETCH_POSTS', '0'))
+        # Ghost only: hand prefetched posts to Ghost as scheduled posts for the upcoming slots
+        self.prefetch_schedule = os.getenv('PREFETCH_SCHEDULE', 'false').lower() == 'true'
+
+        # Generation jobs that may wait for the worker before triggers are rejected
+        self.job_queue_size = int(os.getenv('JOB_QUEUE_SIZE', '10'))
+
+        # Seconds without a checkpoint after which a running pipeline run counts as interrupted
+        self.pipeline_resume_after = float(os.getenv('PIPELINE_RESUME_AFTER', '900'))
+        # Attempts after which an unfinished pipeline run is abandoned instead of resumed
+        self.pipeline_max_attempts = int(os.getenv('PIPELINE_MAX_ATTEMPTS', '3'))
+
+        # Missed cron slots younger than this many seconds are caught up on startup,
+        # at most SCHEDULER_CATCHUP_LIMIT of them (the most recent ones)
+        self.scheduler_misfire_grace = int(os.getenv('SCHEDULER_MISFIRE_GRACE', '3600'))
+        self.scheduler_catchup_limit = int(os.getenv('SCHEDULER_CATCHUP_LIMIT', '3'))
+
+        # Seconds the scheduler leader may go without renewing its lease before another process takes over
+        self.scheduler_lease_ttl = float(os.getenv('SCHEDULER_LEASE_TTL', '30'))
+
         # Schedule configuration
         self.cron_schedule = os.getenv('CRON_SCHEDULE', '00:00')  # Default to midnight UTC if not set
         self.cron_schedules = [time.strip() for time in self.cron_schedule.split(',')]
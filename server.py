@@ -1,21 +1,33 @@
-from flask import Flask, jsonify, send_from_directory, render_template
+from flask import Flask, Response, jsonify, request, send_from_directory, render_template
 import asyncio
 import argparse
+import atexit
+import html
 import json
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from services.leetcode_service import LeetCodeService
 from services.deepseek_service import DeepSeekService
+from services.batch_pipeline import BatchPipeline, ClaimedSlugs
 from services.blog_service import BlogServiceFactory
-from strategies.go_post_strategy import GoPostStrategy
+from services.pipeline_store import PipelineStore
+from services.published_index import PublishedIndex
+from services.response_cache import ResponseCache
+from strategies.languages import create_strategy
+from strategies.prompt_template import Prompt
 from config.config import Config
-import threading
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
+from services.http_session import http_pool
+from services.job_queue import JobQueueFull, JobWorker, job_stage
+from services.leader_election import LeaderElector, LeaderLease
+from services.metrics import registry as metrics_registry, stage_timer
+from services.status_snapshot import StatusSnapshot
 import logging
 import os
 
 app = Flask(__name__)
 
+# Largest batch a single trigger may request
+MAX_BATCH_SIZE = 50
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Generate blog posts from LeetCode problems')
     parser.add_argument('--difficulty', type=str, default='medium',
@@ -25,107 +37,541 @@ def parse_arguments():
                       help='Problem topics as JSON array')
     parser.add_argument('--companies', type=str, default='["google","amazon","facebook","microsoft","apple"]',
                       help='Company tags as JSON array')
+    parser.add_argument('--sampling', type=str, default='page',
+                      choices=['page', 'uniform'],
+                      help='Problem sampling: first page of matches, or uniform over all matches')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                      help='Always call DeepSeek instead of reusing a cached completion')
+    parser.add_argument('--count', type=int, default=0,
+                      help='Generate this many posts as a batch and exit instead of starting the server')
     return parser.parse_args()
 
-async def generate_blog_post(difficulty='medium', topics=None, companies=None):
-    """Generate a blog post from a LeetCode problem"""
-    try:
+class PostGenerator:
+    """The fetch, generate and publish steps of a post, sharing one set of services.
+
+    Problems are claimed as they are selected, so posts generated
+    concurrently from the same generator never cover the same problem.
+    Every stage output is checkpointed in a `PipelineStore`; a failed or
+    interrupted run with the same parameters is resumed after its last
+    completed stage instead of starting over. Runs generated ahead of time
+    wait in the store as "ready" until a cron slot publishes them.
+
+    With several POST_LANGUAGES, each problem is written up in every
+    language concurrently and published as a set of posts linking to each
+    other, with per-language checkpoints.
+    """
+
+    CLAIM_ATTEMPTS = 3
+
+    def __init__(self, difficulty='medium', topics=None, companies=None, sampling='page',
+                 use_cache=True):
         # Initialize configuration
-        config = Config()
-        config.validate_config()
+        self.config = Config()
+        self.config.validate_config()
 
         # Initialize services
-        leetcode_service = LeetCodeService()
-        deepseek_service = DeepSeekService()
-        blog_service = BlogServiceFactory.create()
+        self.leetcode_service = LeetCodeService()
+        self.deepseek_service = DeepSeekService(
+            cache=ResponseCache() if self.config.deepseek_cache else None,
+            stream=self.config.deepseek_stream,
+            stall_timeout=self.config.deepseek_stall_timeout
+        )
+        self.blog_service = BlogServiceFactory.create()
+        self.published_index = PublishedIndex()
+        self.pipeline_store = PipelineStore()
+        self.claimed = ClaimedSlugs(self.published_index)
 
-        # Initialize strategy
-        go_strategy = GoPostStrategy()
+        # Initialize strategies, one per post language
+        self.strategies = {
+            language: create_strategy(language, self.config.prompt_problem_tokens)
+            for language in self.config.post_languages
+        }
+        # DeepSeek generations in flight at once, across languages and concurrent runs
+        self.generate_limit = asyncio.Semaphore(self.config.generate_concurrency)
 
         # Parse topics and companies if they're strings
         if isinstance(topics, str):
             topics = json.loads(topics)
         if isinstance(companies, str):
             companies = json.loads(companies)
+        self.difficulty = difficulty
+        self.topics = topics
+        self.companies = companies
+        self.sampling = sampling
+        self.use_cache = use_cache
+        # Runs with the same parameters can resume each other
+        key = {
+            'difficulty': difficulty,
+            'topics': topics,
+            'companies': companies,
+            'sampling': sampling
+        }
+        if self.config.post_languages != ['go']:
+            key['languages'] = self.config.post_languages
+        self.run_key = json.dumps(key, sort_keys=True)
+        # Problems of buffered posts are taken until they are published
+        for problem in self.pipeline_store.checkpoints_of(self.run_key, 'ready', 'problem'):
+            if problem.get('titleSlug'):
+                self.claimed.claim(problem['titleSlug'])
 
-        # Fetch random LeetCode problem with interview filters
-        print("Fetching random LeetCode problem for interview preparation...")
-        problem_data = await leetcode_service.execute(
-            difficulty=difficulty,
-            topics=topics,
-            company_tags=companies
-        )
-        
-        if not problem_data:
-            raise Exception("Failed to fetch LeetCode problem")
-
-        # Print problem metadata
-        print(f"\nSelected Problem:")
-        print(f"Title: {problem_data['title']}")
-        print(f"Difficulty: {problem_data['difficulty']}")
-        print(f"Acceptance Rate: {problem_data['interview_metadata']['acceptance_rate']:.2f}%")
-        print(f"Companies: {', '.join(problem_data['interview_metadata']['companies'])}")
-        print(f"Topics: {', '.join(problem_data['interview_metadata']['topics'])}")
-
-        # Generate blog post content
-        print("\nGenerating blog post content...")
-        prompt = go_strategy.build_prompt(problem_data)
-        blog_content = await deepseek_service.execute(prompt)
-
-        # Publish to blog platform
-        print(f"\nPublishing to {config.blog_platform}...")
-        title = f"{problem_data['title']} - Go Solution"
-        result = await blog_service.execute(title, blog_content, status="publish")
-        
-        print(f"\nSuccessfully published post! Post ID: {result.get('id')}")
+    async def seed_published_index(self):
+        if self.config.published_index_seed and not self.published_index.seeded:
+            try:
+                added = await self.published_index.seed_from(self.blog_service)
+                print(f"Seeded published index with {added} existing posts")
+            except Exception as e:
+                print(f"Could not seed published index: {str(e)}")
+
+    def _resume_run(self):
+        """Claim an unfinished run whose problem is still free, if there is one"""
+        while True:
+            run = self.pipeline_store.resume(self.run_key)
+            if run is None:
+                return None
+            slug = run.get('problem', {}).get('titleSlug')
+            if slug and not self.claimed.claim(slug) and not run.has('publish'):
+                # The problem has been published by another run since
+                run.abandon()
+                continue
+            print(f"Resuming pipeline run {run.id} after its '{run.last_stage}' stage")
+            return run
+
+    async def fetch_problem(self, _=None):
+        """Start a run for a problem that is neither published nor claimed, or resume one"""
+        run = self._resume_run()
+        if run is not None:
+            return run
+
+        for attempt in range(self.CLAIM_ATTEMPTS):
+            # Fetch random LeetCode problem with interview filters, skipping published ones
+            print("Fetching random LeetCode problem for interview preparation...")
+            with job_stage('fetch'):
+                problem_data = await self.leetcode_service.execute(
+                    difficulty=self.difficulty,
+                    topics=self.topics,
+                    company_tags=self.companies,
+                    sampling=self.sampling,
+                    exclude=self.claimed
+                )
+
+            if not problem_data:
+                raise Exception("Failed to fetch LeetCode problem")
+
+            slug = problem_data.get('titleSlug')
+            if slug and not self.claimed.claim(slug):
+                # A concurrent fetch selected the same problem first
+                continue
+
+            # Print problem metadata
+            print(f"\nSelected Problem:")
+            print(f"Title: {problem_data['title']}")
+            print(f"Difficulty: {problem_data['difficulty']}")
+            print(f"Acceptance Rate: {problem_data['interview_metadata']['acceptance_rate']:.2f}%")
+            print(f"Companies: {', '.join(problem_data['interview_metadata']['companies'])}")
+            print(f"Topics: {', '.join(problem_data['interview_metadata']['topics'])}")
+
+            run = self.pipeline_store.start(self.run_key)
+            run.save('problem', problem_data)
+            return run
+        raise Exception("No unpublished problems found matching the criteria")
+
+    @property
+    def linked(self):
+        """Whether a problem is published as a linked set of posts, one per language"""
+        return len(self.strategies) > 1
+
+    def post_title(self, problem_data, strategy):
+        return f"{problem_data['title']} - {strategy.LANGUAGE} Solution"
+
+    async def generate_content(self, run):
+        """Build the prompts and generate the post HTML, skipping checkpointed steps"""
+        try:
+            if not self.linked:
+                strategy, = self.strategies.values()
+                await self._generate_post(run, strategy, '')
+            else:
+                # Languages that fail do not stop the others; their checkpoints are kept for a retry
+                results = await asyncio.gather(*(
+                    self._generate_post(run, strategy, f':{language}')
+                    for language, strategy in self.strategies.items()
+                ), return_exceptions=True)
+                errors = [
+                    f"{language}: {result}" for language, result in zip(self.strategies, results)
+                    if isinstance(result, Exception)
+                ]
+                if errors:
+                    raise Exception(f"Failed to generate posts ({'; '.join(errors)})")
+        except Exception as e:
+            run.fail(str(e))
+            raise
+        return run
+
+    async def _generate_post(self, run, strategy, suffix):
+        """Generate the post of one strategy into the run's `html{suffix}` checkpoint"""
+        problem_data = run.get('problem')
+        if not run.has('prompt' + suffix):
+            with stage_timer('prompt'):
+                prompt = strategy.build_prompt(problem_data)
+            run.save('prompt' + suffix, prompt.to_checkpoint())
+        if run.has('html' + suffix):
+            return
+        if run.has('completion' + suffix):
+            print(f"\nReusing the checkpointed {strategy.LANGUAGE} completion for {problem_data['title']}")
+            blog_content = self.deepseek_service.post_process(run.get('completion' + suffix))
+        else:
+            print(f"\nGenerating {strategy.LANGUAGE} blog post content for {problem_data['title']}...")
+            async with self.generate_limit:
+                with job_stage('generate'):
+                    blog_content = await self.deepseek_service.execute(
+                        Prompt.from_checkpoint(run.get('prompt' + suffix)),
+                        use_cache=self.use_cache,
+                        on_completion=lambda completion: run.save('completion' + suffix, completion)
+                    )
+        run.save('html' + suffix, blog_content)
+
+    async def buffer_post(self, run):
+        """Keep a generated run in the post buffer instead of publishing it"""
+        run.mark_ready()
+        print(f"\nBuffered post for {run.get('problem')['title']}")
+        return run
+
+    async def _publish(self, title, content, published_at):
+        if published_at is None:
+            return await self.blog_service.execute(title, content, status="publish")
+        result = await self.blog_service.execute(title, content, status="scheduled", published_at=published_at)
+        return {**result, 'scheduled_for': published_at}
+
+    async def _publish_linked_set(self, run, published_at):
+        """Publish one post per language, each linking to the others; returns the results by language"""
+        problem_data = run.get('problem')
+        titles = {
+            language: self.post_title(problem_data, strategy) for language, strategy in self.strategies.items()
+        }
+        urls = {language: self.blog_service.post_url(self.blog_service.slugify(title))
+                for language, title in titles.items()}
+
+        async def publish(language):
+            if not run.has(f'publish:{language}'):
+                links = ''.join(
+                    f'<li><a href="{html.escape(urls[other])}">{html.escape(titles[other])}</a></li>'
+                    for other in self.strategies if other != language
+                )
+                content = f"{run.get(f'html:{language}')}\n<h2>Other Languages</h2>\n<ul>{links}</ul>"
+                result = await self._publish(titles[language], content, published_at)
+                slug = self.blog_service.published_slug(result)
+                if slug and slug != self.blog_service.slugify(titles[language]):
+                    # e.g. "-2" appended because a post with the same slug exists
+                    print(f"Warning: '{titles[language]}' was published as '{slug}'; "
+                          f"links to it from the other languages will not resolve")
+                run.save(f'publish:{language}', result)
+            return run.get(f'publish:{language}')
+
+        results = await asyncio.gather(*(publish(language) for language in self.strategies), return_exceptions=True)
+        errors = [
+            f"{language}: {result}" for language, result in zip(self.strategies, results)
+            if isinstance(result, Exception)
+        ]
+        if errors:
+            raise Exception(f"Failed to publish posts ({'; '.join(errors)})")
+        return dict(zip(self.strategies, results))
+
+    async def publish_post(self, run, published_at=None):
+        """Publish the run's post, or schedule it on Ghost to go live at `published_at`"""
+        problem_data = run.get('problem')
+        try:
+            if run.has('publish'):
+                result = run.get('publish')
+            else:
+                # Publish to blog platform
+                print(f"\nPublishing to {self.config.blog_platform}...")
+                with job_stage('publish'):
+                    if self.linked:
+                        result = {'posts': await self._publish_linked_set(run, published_at)}
+                        if published_at is not None:
+                            result['scheduled_for'] = published_at
+                    else:
+                        strategy, = self.strategies.values()
+                        result = await self._publish(
+                            self.post_title(problem_data, strategy), run.get('html'), published_at
+                        )
+                run.save('publish', result)
+            if problem_data.get('titleSlug'):
+                # A linked set is recorded under the post of its first language
+                post = next(iter(result['posts'].values())) if self.linked else result
+                self.published_index.record_publish(problem_data['titleSlug'], self.config.blog_platform, post)
+        except Exception as e:
+            run.fail(str(e))
+            raise
+        if published_at is None:
+            run.complete()
+            if self.linked:
+                print(f"\nSuccessfully published {len(result['posts'])} linked posts!")
+            else:
+                print(f"\nSuccessfully published post! Post ID: {result.get('id')}")
+        else:
+            run.mark_scheduled()
+            print(f"\nScheduled post for {published_at}")
         return result
 
+    def scheduled_slots(self):
+        """Slots that already have a post scheduled on the platform"""
+        return {
+            result['scheduled_for']
+            for result in self.pipeline_store.checkpoints_of(self.run_key, 'scheduled', 'publish')
+            if result.get('scheduled_for')
+        }
+
+    async def schedule_ready_posts(self, slots):
+        """Schedule buffered posts for the given ISO slots that have none yet; returns how many"""
+        taken = self.scheduled_slots()
+        scheduled = 0
+        for slot in slots:
+            if slot in taken:
+                continue
+            run = self.pipeline_store.claim_ready(self.run_key)
+            if run is None:
+                break
+            await self.publish_post(run, published_at=slot)
+            scheduled += 1
+        return scheduled
+
+async def generate_blog_post(difficulty='medium', topics=None, companies=None, sampling='page',
+                             use_cache=True):
+    """Generate a blog post from a LeetCode problem"""
+    try:
+        generator = PostGenerator(difficulty, topics, companies, sampling, use_cache)
+        await generator.seed_published_index()
+        run = await generator.fetch_problem()
+        run = await generator.generate_content(run)
+        return await generator.publish_post(run)
+
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         raise
 
-def run_async_task():
-    """Run the async blog generator"""
+async def generate_blog_posts(count, difficulty='medium', topics=None, companies=None, sampling='page',
+                              use_cache=True):
+    """Generate `count` blog posts through a pipeline of concurrent stages.
+
+    LeetCode fetches, DeepSeek generations and publishes each run with their
+    own concurrency limit (BATCH_*_CONCURRENCY), so the batch takes about as
+    long as its slowest stage. Returns one result dict per post; see
+    `BatchPipeline.run`.
+    """
+    generator = PostGenerator(difficulty, topics, companies, sampling, use_cache)
+    await generator.seed_published_index()
+    config = generator.config
+    pipeline = BatchPipeline([
+        ('fetch', generator.fetch_problem, config.batch_fetch_concurrency),
+        ('generate', generator.generate_content, config.batch_generate_concurrency),
+        ('publish', generator.publish_post, config.batch_publish_concurrency),
+    ])
+    results = await pipeline.run(range(count))
+    published = sum(1 for result in results if result['status'] == 'success')
+    print(f"\nBatch finished: published {published} of {count} posts")
+    return results
+
+def schedule_mode(config):
+    """Whether prefetched posts are handed to the platform as scheduled posts"""
+    return config.prefetch_posts > 0 and config.prefetch_schedule and config.blog_platform == 'ghost'
+
+def cron_triggers():
+    """The CronTrigger of every CRON_SCHEDULE time, by scheduler job id"""
+    from apscheduler.triggers.cron import CronTrigger
+    triggers = {}
+    for schedule_time in Config().cron_schedules:
+        hour, minute = map(int, schedule_time.split(':'))
+        triggers[f'blog_generator_{hour:02d}_{minute:02d}'] = CronTrigger(hour=hour, minute=minute, timezone=timezone.utc)
+    return triggers
+
+def upcoming_slots(count, now=None):
+    """ISO times of the next `count` cron slots"""
+    now = now or datetime.now(timezone.utc)
+    slots = []
+    for trigger in cron_triggers().values():
+        slot = trigger.get_next_fire_time(None, now)
+        for _ in range(count):
+            slots.append(slot)
+            slot = trigger.get_next_fire_time(slot, slot + timedelta(seconds=1))
+    return [slot.isoformat() for slot in sorted(slots)[:count]]
+
+async def refill_post_buffer():
+    """Generate posts until PREFETCH_POSTS are buffered ahead of the schedule.
+
+    In schedule mode the buffered posts are also handed to Ghost as
+    scheduled posts for the upcoming slots, and scheduled posts count
+    towards the buffer.
+    """
+    config = Config()
+    generator = PostGenerator()
+    await generator.seed_published_index()
+    store = generator.pipeline_store
+    ahead = store.count(generator.run_key, 'ready')
+    slots = upcoming_slots(config.prefetch_posts) if schedule_mode(config) else []
+    ahead += len(generator.scheduled_slots() & set(slots))
+    missing = config.prefetch_posts - ahead
+    results = []
+    if missing > 0:
+        print(f"Prefetching {missing} post(s) into the buffer...")
+        pipeline = BatchPipeline([
+            ('fetch', generator.fetch_problem, config.batch_fetch_concurrency),
+            ('generate', generator.generate_content, config.batch_generate_concurrency),
+            ('buffer', generator.buffer_post, 1),
+        ])
+        results = await pipeline.run(range(missing))
+    scheduled = await generator.schedule_ready_posts(slots)
+    return {
+        'generated': sum(1 for result in results if result['status'] == 'success'),
+        'failed': sum(1 for result in results if result['status'] == 'error'),
+        'errors': [result['error'] for result in results if result['status'] == 'error'],
+        'scheduled': scheduled,
+        'buffered': store.count(generator.run_key, 'ready')
+    }
+
+async def publish_from_buffer():
+    """Cron slot in prefetch mode: publish a buffered post, then top the buffer up.
+
+    Generates the post on the spot when the buffer is empty. In schedule
+    mode nothing is published when Ghost already has a post for this slot.
+    """
+    config = Config()
+    generator = PostGenerator()
+    now = datetime.now(timezone.utc)
+    grace = timedelta(seconds=config.scheduler_misfire_grace)
+    covered = schedule_mode(config) and any(
+        now - grace <= datetime.fromisoformat(slot) <= now + timedelta(minutes=1)
+        for slot in generator.scheduled_slots()
+    )
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(generate_blog_post())
-    except Exception as e:
-        print(f"Error in async task: {str(e)}")
+        if covered:
+            print("The post for this slot is already scheduled on Ghost")
+            return {'published': 0, 'failed': 0, 'errors': [], 'scheduled': True}
+        run = generator.pipeline_store.claim_ready(generator.run_key)
+        if run is None:
+            print("Post buffer is empty; generating the post now")
+            await generate_blog_post()
+        else:
+            await generator.publish_post(run)
+        return {'published': 1, 'failed': 0, 'errors': []}
     finally:
-        loop.close()
+        enqueue_buffer_refill()
+
+async def run_generation_job(job):
+    """Job handler of the generation worker: one post, or a batch of `count` posts.
+
+    Prefetch mode adds buffer refills (`refill`) and cron slots that publish
+    from the buffer (`buffered`).
+    """
+    if job.params.get('refill'):
+        return await refill_post_buffer()
+    if job.params.get('buffered'):
+        return await publish_from_buffer()
+    count = job.params.get('count', 1)
+    if count > 1:
+        results = await generate_blog_posts(count)
+        published = sum(1 for result in results if result['status'] == 'success')
+        if not published:
+            raise Exception(f"None of the {count} posts could be published")
+        return {
+            'published': published,
+            'failed': count - published,
+            'errors': [result['error'] for result in results if result['status'] == 'error']
+        }
+    await generate_blog_post()
+    return {'published': 1, 'failed': 0, 'errors': []}
+
+# Sized from JOB_QUEUE_SIZE by `create_app`
+job_worker = JobWorker(run_generation_job)
+# Cron slots in prefetch mode publish a buffered post on their own worker, so
+# a slot never waits behind a buffer refill that is still generating posts
+publish_worker = JobWorker(run_generation_job)
+_worker_stop_registered = False
+
+def enqueue_generation(count=1, slots=None):
+    """Queue a generation job on the worker; returns the job and whether it was merged.
+
+    `slots` are the missed cron slots a catch-up job stands in for.
+    """
+    params = {'count': count}
+    if slots:
+        params['slots'] = slots
+    return job_worker.submit(params)
+
+def enqueue_buffered_publish(slot=None):
+    """Queue the publish of a buffered post for a cron slot on the publish worker.
+
+    `slot` is the ISO time of a missed slot that is caught up; it keeps the
+    jobs of different slots from merging.
+    """
+    params = {'buffered': True}
+    if slot:
+        params['slot'] = slot
+    return publish_worker.submit(params)
+
+def enqueue_buffer_refill():
+    """Queue a refill of the post buffer; identical queued refills merge"""
+    try:
+        job, _ = job_worker.submit({'refill': True})
+        print(f"Post buffer refill queued as job {job.id}")
+    except JobQueueFull as e:
+        print(f"Skipping post buffer refill: {str(e)}")
+
+def run_scheduled_generation():
+    try:
+        if Config().prefetch_posts:
+            # The post was generated ahead of time; the slot only publishes it
+            job, merged = enqueue_buffered_publish()
+        else:
+            job, merged = enqueue_generation()
+        print(f"Scheduled generation {'merged into' if merged else 'queued as'} job {job.id}")
+    except JobQueueFull as e:
+        print(f"Skipping scheduled generation: {str(e)}")
 
 scheduler = None
+scheduler_lease = None
+scheduler_elector = None
+run_ledger = None
+# What the status endpoints report; refreshed by scheduler events and the election heartbeat
+status_snapshot = StatusSnapshot(next_run=None, scheduler_leader=None)
+
+# Stands in for the request time in the cached index page
+_CURRENT_TIME_MARK = '__current_time__'
+
+def _conditional(make_response):
+    """Answer 304 when the client has the current status snapshot, else `make_response()`"""
+    etag = status_snapshot.etag
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = make_response()
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/')
 def home():
-    next_run_time = None
-    if scheduler:
-        jobs = scheduler.get_jobs()
-        if jobs:
-            next_run_time = min((job.next_run_time for job in jobs if job.next_run_time), default=None)
-    now_utc = datetime.now(timezone.utc)
-    return render_template(
-        'index.html',
-        current_time=now_utc.isoformat(),
-        next_run=next_run_time.isoformat() if next_run_time else None
-    )
+    def make_response():
+        page = status_snapshot.page('index', lambda state: render_template(
+            'index.html',
+            current_time=_CURRENT_TIME_MARK,
+            next_run=state['next_run']
+        ))
+        return Response(page.replace(_CURRENT_TIME_MARK, datetime.now(timezone.utc).isoformat()),
+                        mimetype='text/html')
+    return _conditional(make_response)
 
 @app.route('/api/status')
 def api_status():
-    next_run_time = None
-    if scheduler:
-        jobs = scheduler.get_jobs()
-        if jobs:
-            next_run_time = min((job.next_run_time for job in jobs if job.next_run_time), default=None)
-    now_utc = datetime.now(timezone.utc)
-    next_run_utc = next_run_time.astimezone(timezone.utc).isoformat() if next_run_time else None
-    return jsonify({
-        'status': 'running',
-        'message': 'Blog generator service is running',
-        'current_time': now_utc.isoformat(),
-        'next_run': next_run_utc,
-    })
+    def make_response():
+        state = status_snapshot.state
+        return jsonify({
+            'status': 'running',
+            'message': 'Blog generator service is running',
+            'current_time': datetime.now(timezone.utc).isoformat(),
+            'next_run': state['next_run'],
+            'scheduler_leader': state['scheduler_leader'],
+        })
+    return _conditional(make_response)
 
 @app.route('/health')
 def health():
@@ -136,45 +582,227 @@ def health():
 
 @app.route('/trigger', methods=['POST'])
 def trigger():
-    """Manually trigger the blog generator"""
+    """Manually trigger the blog generator; `?count=N` generates a batch of N posts"""
+    count = request.args.get('count', '1')
+    count = int(count) if count.isdigit() else 0
+    if not 1 <= count <= MAX_BATCH_SIZE:
+        return jsonify({
+            'status': 'error',
+            'message': f'count must be an integer between 1 and {MAX_BATCH_SIZE}'
+        }), 400
     try:
-        thread = threading.Thread(target=run_async_task)
-        thread.start()
+        job, merged = enqueue_generation(count)
+    except JobQueueFull as e:
         return jsonify({
-            'status': 'success',
-            'message': 'Blog generation started'
-        })
+            'status': 'error',
+            'message': str(e)
+        }), 429, {'Retry-After': '60'}
     except Exception as e:
         print(f"Error in trigger endpoint: {str(e)}")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
+    if merged:
+        message = 'Identical blog generation is already queued'
+    else:
+        message = 'Blog generation queued' if count == 1 else f'Generation of {count} blog posts queued'
+    return jsonify({
+        'status': 'success',
+        'message': message,
+        'job_id': job.id,
+        'merged': merged
+    }), 202, {'Location': f'/jobs/{job.id}'}
 
-def start_scheduler():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+@app.route('/metrics')
+def metrics():
+    """Stage durations and upstream request counters in the Prometheus text format"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """State and per-stage timings of a generation job"""
+    job = job_worker.get(job_id) or publish_worker.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown job: {job_id}'
+        }), 404
+    return jsonify(job.to_dict())
+
+def _publish_next_run(event=None):
+    """Share the next cron slot through the lease database, for every worker's status"""
+    now = datetime.now(timezone.utc)
+    run_times = [job.trigger.get_next_fire_time(None, now) for job in scheduler.get_jobs()] if scheduler else []
+    next_run_time = min((run_time for run_time in run_times if run_time), default=None)
+    next_run = next_run_time.astimezone(timezone.utc).isoformat() if next_run_time else None
+    scheduler_lease.set_state('next_run', next_run)
+    status_snapshot.update(next_run=next_run)
+
+def refresh_status():
+    """Reload the status snapshot from the lease database, e.g. what the leader published"""
+    if scheduler_lease is None:
+        return
+    leader = scheduler_lease.current_holder()
+    status_snapshot.update(
+        next_run=scheduler_lease.get_state('next_run'),
+        scheduler_leader=leader['holder'] if leader else None
     )
+
+def _record_fired_slots(event):
+    for slot in event.scheduled_run_times:
+        run_ledger.record(event.job_id, slot, 'fired')
+
+def _catch_up_missed_runs(missed):
+    """Queue the most recent missed slots as one batch; older ones are recorded as skipped.
+
+    The batch pipeline runs them with bounded per-stage concurrency instead
+    of firing every missed slot at once. In prefetch mode every slot queues
+    a publish from the post buffer instead, like the cron job does.
+    """
     logger = logging.getLogger('telegraf-scheduler')
     config = Config()
-    config.validate_config()
-    global scheduler
-    scheduler = BackgroundScheduler(timezone=timezone.utc)
-    for schedule_time in config.cron_schedules:
-        hour, minute = map(int, schedule_time.split(':'))
+    limit = config.scheduler_catchup_limit
+    caught_up = missed[-limit:] if limit > 0 else []
+    for job_id, slot in missed[:len(missed) - len(caught_up)]:
+        run_ledger.record(job_id, slot, 'skipped')
+        logger.info(f"Skipping missed run of {job_id} at {slot.isoformat()} (over SCHEDULER_CATCHUP_LIMIT)")
+    if not caught_up:
+        return
+    slots = [slot.isoformat() for _, slot in caught_up]
+    if config.prefetch_posts:
+        for (job_id, slot), iso_slot in zip(caught_up, slots):
+            try:
+                job, _ = enqueue_buffered_publish(iso_slot)
+            except JobQueueFull as e:
+                logger.info(f"Could not catch up missed run at {iso_slot}: {str(e)}")
+                return
+            run_ledger.record(job_id, slot, 'caught_up', job.id)
+            logger.info(f"Catching up missed run at {iso_slot} from the post buffer as job {job.id}")
+        return
+    try:
+        job, _ = enqueue_generation(len(caught_up), slots=slots)
+    except JobQueueFull as e:
+        logger.info(f"Could not catch up missed runs: {str(e)}")
+        return
+    for job_id, slot in caught_up:
+        run_ledger.record(job_id, slot, 'caught_up', job.id)
+    logger.info(f"Catching up {len(caught_up)} missed run(s) ({', '.join(slots)}) as job {job.id}")
+
+def _start_scheduling():
+    """Start the cron jobs; runs in the process that holds the scheduler lease.
+
+    Jobs live in a persistent store, so their next run times survive
+    restarts. Slots that passed while no scheduler was running are found
+    from those and the run ledger, and caught up within the misfire grace
+    time.
+    """
+    # APScheduler is only loaded in the process that holds the lease
+    from apscheduler.events import (
+        EVENT_JOB_ADDED, EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, EVENT_JOB_REMOVED, EVENT_JOB_SUBMITTED
+    )
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from services.scheduler_store import RunLedger, SQLiteJobStore, find_missed_slots
+    logger = logging.getLogger('telegraf-scheduler')
+    config = Config()
+    global scheduler, run_ledger
+    run_ledger = RunLedger()
+    jobstore = SQLiteJobStore()
+    triggers = cron_triggers()
+    missed = find_missed_slots(triggers, jobstore.stored_next_run_times(), run_ledger,
+                               datetime.now(timezone.utc), config.scheduler_misfire_grace)
+
+    scheduler = BackgroundScheduler(timezone=timezone.utc, jobstores={'default': jobstore})
+    for (job_id, trigger), schedule_time in zip(triggers.items(), config.cron_schedules):
         scheduler.add_job(
-            run_async_task,
-            CronTrigger(hour=hour, minute=minute),
-            name=f'blog_generator_{hour:02d}_{minute:02d}',
-            misfire_grace_time=3600
+            run_scheduled_generation,
+            trigger,
+            id=job_id,
+            name=job_id,
+            replace_existing=True,
+            coalesce=True,
+            misfire_grace_time=config.scheduler_misfire_grace
         )
         logger.info(f"Scheduled task for {schedule_time} UTC")
+    scheduler.add_listener(_record_fired_slots, EVENT_JOB_SUBMITTED)
+    scheduler.add_listener(
+        _publish_next_run,
+        EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_MISSED
+    )
     scheduler.start()
+    # Drop stored jobs of times that were removed from CRON_SCHEDULE
+    for job in scheduler.get_jobs():
+        if job.id not in triggers:
+            job.remove()
+    _publish_next_run()
     logger.info("Scheduler started successfully")
-    return scheduler
+    _catch_up_missed_runs(missed)
+    if config.prefetch_posts:
+        enqueue_buffer_refill()
 
-start_scheduler()
+def _stop_scheduling():
+    global scheduler
+    if scheduler:
+        scheduler.shutdown(wait=False)
+        scheduler = None
+        logging.getLogger('telegraf-scheduler').info("Scheduler stopped")
+
+def start_scheduler():
+    """Run the scheduler in exactly one process on the host.
+
+    Every process (e.g. each gunicorn worker) joins an election for the
+    scheduler lease; only the holder runs the cron jobs, and another process
+    takes over within SCHEDULER_LEASE_TTL seconds if the holder dies.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    config = Config()
+    config.validate_config()
+    global scheduler_lease, scheduler_elector
+    scheduler_lease = LeaderLease('scheduler', ttl=config.scheduler_lease_ttl)
+    scheduler_elector = LeaderElector(scheduler_lease, _start_scheduling, _stop_scheduling,
+                                      on_heartbeat=refresh_status)
+    scheduler_elector.start()
+    # Hand the lease over right away on a clean shutdown instead of waiting for it to expire
+    atexit.register(scheduler_elector.stop, 5)
+    return scheduler_elector
+
+def next_scheduled_run():
+    """ISO time of the next cron slot, as published by the scheduler leader"""
+    return status_snapshot.state['next_run']
+
+def create_app(start_scheduling=True):
+    """Configure the web process and return the Flask app.
+
+    Importing this module has no side effects; the web server calls this
+    (`gunicorn 'server:create_app()'`), which sizes the job queue and, with
+    `start_scheduling`, joins the scheduler election. The job workers are
+    stopped at exit.
+    """
+    global _worker_stop_registered
+    job_worker.max_pending = publish_worker.max_pending = Config().job_queue_size
+    if not _worker_stop_registered:
+        # Let the worker loops finish and close their pooled HTTP sessions on shutdown;
+        # registered first, so they run after the scheduler has stopped submitting
+        atexit.register(job_worker.stop, 5)
+        atexit.register(publish_worker.stop, 5)
+        _worker_stop_registered = True
+    if start_scheduling and scheduler_elector is None:
+        start_scheduler()
+    return app
+
+async def run_batch(args):
+    try:
+        return await generate_blog_posts(args.count, args.difficulty, args.topics, args.companies,
+                                         args.sampling, args.use_cache)
+    finally:
+        await http_pool.close()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=3001)
\ No newline at end of file
+    args = parse_arguments()
+    if args.count > 0:
+        asyncio.run(run_batch(args))
+    else:
+        create_app().run(host='0.0.0.0', port=3001)
\ No newline at end of file
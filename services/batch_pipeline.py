@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+Stage = Tuple[str, Callable[[Any], Awaitable[Any]], int]
+
+
+class ClaimedSlugs:
+    """Problem slugs to skip while a batch selects problems.
+
+    Contains everything in `base` (e.g. a `PublishedIndex`) plus the slugs
+    claimed by the batch so far, and can be passed as `exclude` to
+    `LeetCodeService.execute`.
+    """
+
+    def __init__(self, base=()):
+        self.base = base
+        self._claimed = set()
+
+    def __contains__(self, title_slug) -> bool:
+        return title_slug in self._claimed or title_slug in self.base
+
+    def __len__(self) -> int:
+        return len(self._claimed) + len(self.base)
+
+    def claim(self, title_slug: str) -> bool:
+        """Claim a slug for this batch; False if it was taken in the meantime"""
+        if title_slug in self:
+            return False
+        self._claimed.add(title_slug)
+        return True
+
+
+class BatchPipeline:
+    """Runs items through a sequence of async stages connected by queues.
+
+    Every stage is a `(name, func, concurrency)` tuple and gets its own pool
+    of `concurrency` workers, so the stages overlap and throughput is bounded
+    by the slowest stage instead of the sum of all of them. The queues in
+    between are bounded, so a fast stage cannot run arbitrarily far ahead of
+    a slow one. An item that fails in a stage is reported and does not stop
+    the others.
+    """
+
+    def __init__(self, stages: List[Stage], buffer: int = 2):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        for name, _, concurrency in stages:
+            if concurrency < 1:
+                raise ValueError(f"Concurrency of stage '{name}' must be at least 1")
+        self.stages = stages
+        self.buffer = buffer
+
+    async def run(self, items: Iterable[Any]) -> List[dict]:
+        """Process every item and return one result per item, in input order.
+
+        Results are dicts with `status` ('success' or 'error'), the final
+        stage's `result` or the `error` and failing `stage`, and the
+        `timings` in seconds of the stages the item went through.
+        """
+        items = list(items)
+        results: List[Optional[dict]] = [None] * len(items)
+        queues = [asyncio.Queue(maxsize=concurrency * self.buffer) for _, _, concurrency in self.stages]
+
+        async def worker(position: int):
+            name, func, _ = self.stages[position]
+            inbox = queues[position]
+            last = position == len(self.stages) - 1
+            while True:
+                entry = await inbox.get()
+                if entry is None:
+                    return
+                index, value, timings = entry
+                started = time.monotonic()
+                try:
+                    value = await func(value)
+                except Exception as e:
+                    timings[name] = time.monotonic() - started
+                    print(f"Batch item {index + 1} failed in {name}: {str(e)}")
+                    results[index] = {"status": "error", "stage": name, "error": str(e), "timings": timings}
+                    continue
+                timings[name] = time.monotonic() - started
+                if last:
+                    results[index] = {"status": "success", "result": value, "timings": timings}
+                else:
+                    await queues[position + 1].put((index, value, timings))
+
+        async def feed():
+            for index, item in enumerate(items):
+                await queues[0].put((index, item, {}))
+
+        pools = [
+            [asyncio.create_task(worker(position)) for _ in range(concurrency)]
+            for position, (_, _, concurrency) in enumerate(self.stages)
+        ]
+        try:
+            await feed()
+            # Shut the stages down in order once everything upstream is done
+            for position, pool in enumerate(pools):
+                for _ in pool:
+                    await queues[position].put(None)
+                await asyncio.gather(*pool)
+        finally:
+            for pool in pools:
+                for task in pool:
+                    task.cancel()
+        return results
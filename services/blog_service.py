@@ -1,4 +1,7 @@
+import asyncio
+import re
 from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple
 from services.base_service import BaseService
 from config.config import Config
 
@@ -9,6 +12,58 @@ class BlogService(BaseService, ABC):
         """Publish a blog post to the platform"""
         pass
 
+    async def publish_many(self, posts: Iterable[Tuple[str, str]], status: Optional[str] = None,
+                           concurrency: Optional[int] = None) -> List[dict]:
+        """Publish several (title, content) posts concurrently.
+
+        At most `concurrency` posts (BATCH_PUBLISH_CONCURRENCY by default) are
+        in flight at once, over the shared session and auth. Returns one dict
+        per post, in order: {"status": "success", "result": ...} or
+        {"status": "error", "error": "..."}; a failing post does not stop
+        the others. `status` defaults to the platform's `execute` default.
+        """
+        limit = asyncio.Semaphore(concurrency or Config().batch_publish_concurrency)
+
+        async def publish(title, content):
+            async with limit:
+                try:
+                    if status is None:
+                        result = await self.execute(title, content)
+                    else:
+                        result = await self.execute(title, content, status=status)
+                    return {"status": "success", "result": result}
+                except Exception as e:
+                    return {"status": "error", "error": str(e)}
+
+        return list(await asyncio.gather(*(publish(title, content) for title, content in posts)))
+
+    @staticmethod
+    def slugify(title: str) -> str:
+        """The URL slug a post with this title is published under.
+
+        Matches the platforms' own slugs: runs of dashes collapse into one and
+        no dash is left at either end ("Two Sum - Go Solution" becomes
+        "two-sum-go-solution").
+        """
+        slug = re.sub(r'[^a-z0-9-]', '', re.sub(r'\s+', '-', title.lower()))
+        return re.sub(r'-+', '-', slug).strip('-')
+
+    @staticmethod
+    def published_slug(result: dict) -> Optional[str]:
+        """The slug the platform gave a post, from its publish result"""
+        if 'slug' in result:
+            return result['slug']
+        posts = result.get('posts')
+        return posts[0].get('slug') if posts else None
+
+    def post_url(self, slug: str) -> str:
+        """The public URL of the post published under `slug`"""
+        raise NotImplementedError(f"{type(self).__name__} cannot link to posts")
+
+    async def list_post_titles(self):
+        """Return the titles of every post on the platform"""
+        raise NotImplementedError(f"{type(self).__name__} cannot list existing posts")
+
 class BlogServiceFactory:
     """Factory class to create the appropriate blog service"""
     @staticmethod
@@ -0,0 +1,248 @@
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+# Wrapper sentences the model sometimes puts before the HTML, most specific first
+WRAPPER_TEXTS = [
+    'Here\'s a WordPress-formatted HTML blog post for solving the LeetCode',
+    'Here\'s a WordPress-formatted HTML blog post for solving the "',
+    'Here\'s a WordPress-formatted HTML blog post about',
+    'Here\'s a WordPress-formatted HTML blog post',
+    'Here\'s a blog post about',
+    'Here\'s a blog post',
+    'Here\'s the blog post',
+    'Here\'s the content',
+    'Here\'s the HTML',
+    'Here\'s the post',
+    'Here\'s the article',
+    'Here\'s the solution',
+    'Here\'s the implementation',
+    'Here\'s the code',
+    'Here\'s the explanation',
+    'Here\'s the analysis',
+    'Here\'s the approach',
+    'Here\'s the strategy',
+    'Here\'s the method',
+    'Here\'s the technique',
+    'Here\'s the algorithm'
+]
+
+FENCE = '```'
+GO_BLOCK_OPEN = '<pre><code class="language-go">'
+GO_BLOCK_CLOSE = '</code></pre>'
+QUOTES = '"\''
+
+_MAX_WRAPPER_LENGTH = max(len(text) for text in WRAPPER_TEXTS)
+
+# Alternation keeps list order, so the first matching wrapper wins as before
+_WRAPPER_RE = re.compile('|'.join(re.escape(text) for text in WRAPPER_TEXTS), re.IGNORECASE)
+
+
+def _trim(text: str, start: int, end: int, quotes: bool = False) -> Tuple[int, int]:
+    """Bounds of text[start:end] after strip() and, optionally, strip(QUOTES)"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if quotes:
+        while start < end and text[start] in QUOTES:
+            start += 1
+        while end > start and text[end - 1] in QUOTES:
+            end -= 1
+    return start, end
+
+
+def _stripped_lines(text: str, start: int, end: int) -> List[str]:
+    """Non-empty stripped lines of the quote-trimmed text[start:end]"""
+    start, end = _trim(text, start, end, quotes=True)
+    if start == 0 and end == len(text):
+        block = text
+    else:
+        block = text[start:end]
+    return [line for line in map(str.strip, block.splitlines()) if line]
+
+
+def _starts_with_html(text: str, start: int, end: int) -> bool:
+    start, end = _trim(text, start, end)
+    return end - start >= 4 and text[start:start + 4].lower() == 'html'
+
+
+def clean_content(content: str) -> str:
+    """Clean and format the content from a DeepSeek completion.
+
+    Removes a leading wrapper sentence, extracts the content of a fenced
+    code block when there is one, and drops blank lines and surrounding
+    whitespace/quotes. Works on index bounds over the original string, so
+    the document is scanned once and only the returned text is copied.
+    """
+    if not content:
+        return ""
+
+    match = _WRAPPER_RE.match(content)
+    start = match.end() if match else 0
+    end = len(content)
+
+    fence = content.find(FENCE, start)
+    if fence != -1:
+        # Prefer the block that follows a segment marked as html
+        segment_start = start
+        first_fence = fence
+        while fence != -1:
+            if _starts_with_html(content, segment_start, fence):
+                block_start = fence + len(FENCE)
+                block_end = content.find(FENCE, block_start)
+                lines = _stripped_lines(content, block_start, end if block_end == -1 else block_end)
+                for line in lines:
+                    if line.startswith('<') and line.endswith('>'):
+                        return line
+                return lines[0] if lines else ""
+            segment_start = fence + len(FENCE)
+            fence = content.find(FENCE, segment_start)
+
+        # Otherwise use the first code block without its language identifier
+        block_start = first_fence + len(FENCE)
+        block_end = content.find(FENCE, block_start)
+        block_start, block_end = _trim(content, block_start, end if block_end == -1 else block_end)
+        newline = content.find('\n', block_start, block_end)
+        if newline != -1:
+            block_start, block_end = _trim(content, newline + 1, block_end)
+        if block_start < block_end:
+            return content[block_start:block_end]
+
+    return "\n".join(_stripped_lines(content, start, end))
+
+
+class StreamingPostProcessor:
+    """Cleans and beautifies a completion while it is still streaming in.
+
+    Produces exactly what `beautify(clean(full_text))` would. Plain HTML
+    output is cleaned line by line and every finished Go code block is
+    beautified as soon as it closes, so by the time the stream ends only the
+    last line is left to process. Fenced (```) output needs the whole document,
+    so once a fence shows up the processor falls back to the batch functions
+    at the end. `clean_seconds` and `beautify_seconds` add up the time spent
+    cleaning (line by line, or in `clean` for fenced output) and in
+    `beautify` over the whole document.
+    """
+
+    def __init__(self, clean: Callable[[str], str], beautify: Callable[[str], str]):
+        self._clean = clean
+        self._beautify = beautify
+        self._chunks: List[str] = []
+        self._fenced = False
+        self._prefix_done = False
+        self._head = ''
+        self._partial = ''          # Text after the last newline seen
+        self._held: Optional[str] = None  # Last non-empty line, may still be trimmed at the end
+        self._emitted_any = False
+        self._pending: List[str] = []   # Cleaned lines not yet beautified
+        self._segments: List[str] = []  # Cleaned and beautified output
+        self._tail = ''
+        self.clean_seconds = 0.0
+        self.beautify_seconds = 0.0
+
+    @property
+    def text(self) -> str:
+        """The raw completion received so far"""
+        return ''.join(self._chunks)
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        # Keep two characters of overlap so fences split across chunks are found
+        if not self._fenced and FENCE in self._tail + chunk:
+            self._fenced = True
+        self._tail = (self._tail + chunk)[-2:]
+        self._chunks.append(chunk)
+        if self._fenced:
+            return
+
+        with self._cleaning():
+            if not self._prefix_done:
+                self._head += chunk
+                if len(self._head) < _MAX_WRAPPER_LENGTH:
+                    return
+                chunk = self._strip_wrapper(self._head)
+                self._prefix_done = True
+                self._head = ''
+            self._consume(chunk)
+
+    def finish(self) -> str:
+        """Return the cleaned and beautified document"""
+        with self._cleaning():
+            return self._finish()
+
+    def _finish(self) -> str:
+        if self._fenced:
+            return self._beautify_segment(self._clean(self.text))
+        if not self._prefix_done:
+            self._consume(self._strip_wrapper(self._head))
+            self._prefix_done = True
+
+        # Trimming of the document end only ever reaches into the last non-empty line
+        tail = ((self._held or '') + '\n' + self._partial).rstrip().rstrip(QUOTES)
+        if not self._emitted_any:
+            tail = tail.lstrip().lstrip(QUOTES)
+        for line in tail.splitlines():
+            line = line.strip()
+            if line:
+                self._pending.append(line)
+        self._flush(final=True)
+        return '\n'.join(self._segments)
+
+    @staticmethod
+    def _strip_wrapper(head: str) -> str:
+        match = _WRAPPER_RE.match(head)
+        return head[match.end():] if match else head
+
+    def _consume(self, text: str):
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for raw in lines:
+            # Split on the same boundaries as str.splitlines
+            for line in (raw + '\n').splitlines():
+                if line.strip():
+                    self._hold(line)
+
+    def _hold(self, line: str):
+        if self._held is not None:
+            emitted = self._held
+            if not self._emitted_any:
+                emitted = emitted.lstrip().lstrip(QUOTES)
+                self._emitted_any = True
+            emitted = emitted.strip()
+            if emitted:
+                self._pending.append(emitted)
+                self._flush()
+        self._held = line
+
+    def _flush(self, final: bool = False):
+        """Beautify pending lines once no Go code block is left open"""
+        if not self._pending:
+            return
+        segment = '\n'.join(self._pending)
+        if not final:
+            last_open = segment.rfind(GO_BLOCK_OPEN)
+            if last_open != -1 and segment.find(GO_BLOCK_CLOSE, last_open) == -1:
+                return
+        self._segments.append(self._beautify_segment(segment))
+        self._pending = []
+
+    @contextmanager
+    def _cleaning(self):
+        """Add the time of the block, minus the beautifying done in it, to `clean_seconds`"""
+        started = time.perf_counter()
+        beautify_seconds = self.beautify_seconds
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.clean_seconds += elapsed - (self.beautify_seconds - beautify_seconds)
+
+    def _beautify_segment(self, html: str) -> str:
+        started = time.perf_counter()
+        try:
+            return self._beautify(html)
+        finally:
+            self.beautify_seconds += time.perf_counter() - started
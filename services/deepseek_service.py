@@ -1,10 +1,20 @@
-import aiohttp
 import asyncio
-from typing import Optional
+import json
+import time
+from typing import Callable, Optional
 from services.base_service import BaseService
+from services.content_cleaner import StreamingPostProcessor, clean_content
+from services.go_formatter import beautify_go_code_in_html
+from services.http_session import get_session
+from services.metrics import STAGE_SECONDS, UPSTREAM_BYTES, stage_timer, upstream
+from services.resilience import (
+    RETRY_STATUSES, CircuitOpenError, RetryableError, RetryPolicy, get_upstream, retryable_response
+)
+from services.response_cache import ResponseCache
 from config.config import Config
-import re
-import subprocess
+
+# Longest part of an error body that is logged
+MAX_LOGGED_BODY = 500
 
 class DeepSeekAPIError(Exception):
     """Custom exception for DeepSeek API errors."""
@@ -14,194 +24,187 @@ class DeepSeekAPIError(Exception):
         super().__init__(f"DeepSeek API Error (Status {status}): {message}")
 
 class DeepSeekService(BaseService):
-    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0):
+    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0,
+                 cache: Optional[ResponseCache] = None, stream: bool = False,
+                 stall_timeout: float = 30.0):
         config = Config()
         self.api_key = config.deepseek_api_key
-        self.api_url = "https://api.deepseek.com/v1/chat/completions"
+        self.api_url = config.deepseek_api_url
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.retry_policy = RetryPolicy(max_attempts=max_retries, base_delay=retry_delay)
+        self.cache = cache
+        self.stream = stream
+        self.stall_timeout = stall_timeout
 
     def _clean_content(self, content: str) -> str:
         """Clean and format the content from DeepSeek response.
-        
-        This method performs the following cleaning steps:
-        1. Removes common wrapper text prefixes
-        2. Extracts content from code blocks (both HTML and non-HTML)
-        3. Handles markdown formatting
-        4. Cleans up whitespace and newlines
-        
+
+        Removes wrapper text, extracts fenced code blocks and cleans up
+        whitespace; see `services.content_cleaner.clean_content`.
+
         Args:
             content (str): Raw content from DeepSeek response
-            
+
         Returns:
             str: Cleaned and formatted content
         """
-        if not content:
-            return ""
-            
-        # Remove any wrapper text before HTML
-        wrapper_texts = [
-            'Here\'s a WordPress-formatted HTML blog post for solving the LeetCode',
-            'Here\'s a WordPress-formatted HTML blog post for solving the "',
-            'Here\'s a WordPress-formatted HTML blog post about',
-            'Here\'s a WordPress-formatted HTML blog post',
-            'Here\'s a blog post about',
-            'Here\'s a blog post',
-            'Here\'s the blog post',
-            'Here\'s the content',
-            'Here\'s the HTML',
-            'Here\'s the post',
-            'Here\'s the article',
-            'Here\'s the solution',
-            'Here\'s the implementation',
-            'Here\'s the code',
-            'Here\'s the explanation',
-            'Here\'s the analysis',
-            'Here\'s the approach',
-            'Here\'s the strategy',
-            'Here\'s the method',
-            'Here\'s the technique',
-            'Here\'s the algorithm'
-        ]
-        
-        # Try to find and remove the wrapper text
-        for text in wrapper_texts:
-            if content.lower().startswith(text.lower()):
-                content = content[len(text):]
-                break
-        
-        # Handle code blocks
-        if '```' in content:
-            # Split by code block markers
-            parts = content.split('```')
-            
-            # Look for HTML content first
-            for i, part in enumerate(parts):
-                part = part.strip()
-                if part.lower().startswith('html'):
-                    # Get the next part which contains the HTML content
-                    if i + 1 < len(parts):
-                        html_content = parts[i + 1].strip()
-                        # Clean up whitespace and newlines
-                        html_content = html_content.strip()
-                        # Remove any trailing or leading quotes
-                        html_content = html_content.strip('"\'')
-                        # Clean up excessive newlines
-                        lines = [line.strip() for line in html_content.splitlines() if line.strip()]
-                        # If we have lines, return the first HTML-like line
-                        if lines:
-                            for line in lines:
-                                if line.startswith('<') and line.endswith('>'):
-                                    return line
-                            # If no HTML-like line found, return the first line
-                            return lines[0]
-                        return ""
-            
-            # If no HTML block found, try to get content from the first code block
-            if len(parts) >= 2:
-                # Skip any language identifier
-                code_content = parts[1].strip()
-                if '\n' in code_content:
-                    code_content = code_content[code_content.find('\n')+1:]
-                code_content = code_content.strip()
-                if code_content:
-                    return code_content
-        
-        # Clean up whitespace and newlines
-        content = content.strip()
-        
-        # Remove any trailing or leading quotes
-        content = content.strip('"\'')
-        
-        # Clean up excessive newlines
-        lines = [line.strip() for line in content.splitlines() if line.strip()]
-        
-        # Join all lines back together to preserve the full HTML content
-        return "\n".join(lines)
+        return clean_content(content)
 
     def _beautify_go_code_in_html(self, html):
-        def simple_indent_go_code(code):
-            indent = 0
-            result = []
-            for line in code.splitlines():
-                stripped = line.strip()
-                if stripped == "":
-                    result.append("")
-                    continue
-                if stripped.startswith("}"):
-                    indent -= 1
-                result.append("    " * indent + stripped)
-                if stripped.endswith("{"):
-                    indent += 1
-            return "\n".join(result)
-
-        def format_code(match):
-            code = match.group(1)
-            formatted_code = simple_indent_go_code(code)
-            return f'<pre><code class="language-go">\n{formatted_code}\n</code></pre>'
-        return re.sub(
-            r'<pre><code class="language-go">\s*(.*?)\s*</code></pre>',
-            lambda m: format_code(m),
-            html,
-            flags=re.DOTALL
-        )
-
-    async def _make_api_call(self, payload: dict) -> Optional[str]:
-        """Make an API call to DeepSeek with retry logic."""
-        for attempt in range(self.max_retries):
+        """Re-indent the code of every Go block; see `services.go_formatter`"""
+        return beautify_go_code_in_html(html)
+
+    async def _read_completion(self, response, started: float) -> str:
+        """Return the message content of a regular (non-streaming) completion"""
+        data = await response.json()
+        choices = data.get("choices", [])
+        if not choices:
+            return ""
+        return choices[0].get("message", {}).get("content", "")
+
+    async def _read_stream(self, response, started: float) -> StreamingPostProcessor:
+        """Consume a chat-completions SSE stream, post-processing chunks as they arrive.
+
+        Gives up with a timeout error (retried like other network errors) when
+        no data arrives for `stall_timeout` seconds.
+        """
+        import aiohttp
+        processor = StreamingPostProcessor(clean_content, beautify_go_code_in_html)
+        first_token = None
+        while True:
             try:
-                print(f"\nMaking API call (attempt {attempt + 1}/{self.max_retries})...")
-                async with aiohttp.ClientSession() as session:
-                    print(f"API URL: {self.api_url}")
-                    async with session.post(
-                        self.api_url,
-                        json=payload,
-                        headers=self.headers,
-                        timeout=60  # Increase timeout to 60 seconds
-                    ) as response:
-                        print(f"Response status: {response.status}")
-                        if response.status == 200:
-                            data = await response.json()
-                            print(f"Response data: {data}")
-                            choices = data.get("choices", [])
-                            if not choices:
-                                return ""
-                            return choices[0].get("message", {}).get("content", "")
-                        elif response.status == 429:  # Rate limit
-                            error_data = await response.text()
-                            print(f"Rate limit hit (attempt {attempt + 1}/{self.max_retries}): {error_data}")
-                            if attempt < self.max_retries - 1:
-                                await asyncio.sleep(self.retry_delay * (attempt + 1))  # Exponential backoff
-                                continue
-                        else:
-                            error_data = await response.text()
-                            print(f"API Error: {error_data}")
-                            raise DeepSeekAPIError(response.status, error_data)
-            except aiohttp.ClientError as e:
-                if attempt < self.max_retries - 1:
-                    print(f"Network error (attempt {attempt + 1}/{self.max_retries}): {str(e)}")
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-                    continue
-                raise DeepSeekAPIError(0, f"Network error after {self.max_retries} attempts: {str(e)}")
-        
-        raise DeepSeekAPIError(429, f"Rate limit persisted after {self.max_retries} attempts")
-
-    async def execute(self, prompt: str) -> str:
-        """Execute the DeepSeek API call and return formatted content."""
+                line = await asyncio.wait_for(response.content.readline(), self.stall_timeout)
+            except asyncio.TimeoutError:
+                raise aiohttp.ServerTimeoutError(f"Stream stalled for {self.stall_timeout}s")
+            if not line:
+                break
+            # Streamed bodies are read line by line, which the session's trace does not see
+            UPSTREAM_BYTES.inc(len(line), upstream="deepseek", direction="in")
+            line = line.strip()
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                break
+            choices = json.loads(data).get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                if first_token is None:
+                    first_token = time.monotonic() - started
+                    print(f"Time to first token: {first_token:.2f}s")
+                processor.feed(delta)
+        print(f"Stream finished in {time.monotonic() - started:.2f}s")
+        return processor
+
+    async def _make_api_call(self, payload: dict, read_response=None):
+        """Make an API call to DeepSeek with retry logic.
+
+        Goes through the shared "deepseek" upstream (see `services.resilience`):
+        requests are rate limited, 429s, 5xx gateway errors and network errors
+        are retried with jittered exponential backoff honouring Retry-After,
+        and calls fail fast while the circuit is open. `read_response` turns a
+        successful response into the result and defaults to reading a regular
+        completion.
+        """
+        import aiohttp
+        read_response = read_response or self._read_completion
+        if payload.get("stream"):
+            # Long generations stream for minutes; stalls are caught per chunk instead
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=60)
+        else:
+            timeout = aiohttp.ClientTimeout(total=60)
+
+        async def attempt():
+            print(f"\nMaking API call to {self.api_url}...")
+            session = await get_session()
+            started = time.monotonic()
+            async with session.post(
+                self.api_url,
+                json=payload,
+                headers=self.headers,
+                timeout=timeout,
+                trace_request_ctx=upstream("deepseek")
+            ) as response:
+                print(f"Response status: {response.status}")
+                if response.status == 200:
+                    return await read_response(response, started)
+                error_data = await response.text()
+                print(f"API Error: {error_data[:MAX_LOGGED_BODY]}")
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, error_data)
+                raise DeepSeekAPIError(response.status, error_data)
+
+        try:
+            return await get_upstream("deepseek").call(attempt, self.retry_policy)
+        except RetryableError as e:
+            if e.status == 429:
+                raise DeepSeekAPIError(429, f"Rate limit persisted after {self.max_retries} attempts")
+            raise DeepSeekAPIError(e.status, e.message)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DeepSeekAPIError(0, f"Network error after {self.max_retries} attempts: {str(e)}")
+        except CircuitOpenError as e:
+            raise DeepSeekAPIError(0, str(e))
+
+    def post_process(self, content: str) -> str:
+        """Turn a raw completion into the post HTML"""
+        with stage_timer("clean"):
+            html = self._clean_content(content)
+        with stage_timer("beautify"):
+            return self._beautify_go_code_in_html(html)
+
+    async def execute(self, prompt, use_cache: bool = True, stream: Optional[bool] = None,
+                      on_completion: Optional[Callable[[str], None]] = None) -> str:
+        """Execute the DeepSeek API call and return formatted content.
+
+        `prompt` is a string, sent as the only user message, or a
+        `strategies.prompt_template.Prompt`, whose static prefix goes first
+        as the system message so DeepSeek can serve it from its context cache.
+
+        Raw completions are stored in the response cache when one is
+        configured. `use_cache=False` skips the lookup and always calls the
+        model, but still refreshes the cached entry. With `stream` (defaults to
+        the service setting) the completion is streamed and post-processed
+        while it is generated. `on_completion` receives the raw completion
+        before it is post-processed, e.g. to checkpoint it.
+        """
         payload = {
             "model": "deepseek-chat",
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
+            "messages": [{"role": "user", "content": prompt}] if isinstance(prompt, str) else prompt.messages(),
             "temperature": 0.7,
             "max_tokens": 2000
         }
 
-        content = await self._make_api_call(payload)
-        cleaned = self._clean_content(content)
-        beautified = self._beautify_go_code_in_html(cleaned)
-        return beautified
\ No newline at end of file
+        content = None
+        processed = None
+        cache_key = ResponseCache.make_key(payload) if self.cache is not None else None
+        if cache_key and use_cache:
+            content = self.cache.get(cache_key)
+            if content is not None:
+                print("Using cached DeepSeek completion")
+
+        if content is None:
+            if self.stream if stream is None else stream:
+                with stage_timer("deepseek"):
+                    processor = await self._make_api_call({**payload, "stream": True}, self._read_stream)
+                content = processor.text
+                processed = processor.finish()
+                # Cleaning and beautifying ran segment by segment while the
+                # stream came in; record them once for the whole post
+                STAGE_SECONDS.observe(processor.clean_seconds, stage="clean")
+                STAGE_SECONDS.observe(processor.beautify_seconds, stage="beautify")
+            else:
+                with stage_timer("deepseek"):
+                    content = await self._make_api_call(payload)
+            if cache_key and content:
+                self.cache.set(cache_key, content)
+
+        if on_completion is not None and content:
+            on_completion(content)
+        if processed is None:
+            processed = self.post_process(content)
+        return processed
\ No newline at end of file
@@ -0,0 +1,318 @@
+import html
+import re
+from html.parser import HTMLParser
+from typing import List
+
+MOBILEDOC_VERSION = "0.3.1"
+
+# Mobiledoc section and marker type identifiers
+_MARKUP_SECTION = 1
+_LIST_SECTION = 3
+_CARD_SECTION = 10
+_TEXT_MARKER = 0
+_ATOM_MARKER = 1
+
+_TEXT_TAGS = {'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'aside'}
+_LIST_TAGS = {'ul', 'ol'}
+# Inline tags Ghost's editor knows, mapped to the markup it stores
+_MARKUP_TAGS = {
+    'strong': 'strong', 'b': 'strong', 'em': 'em', 'i': 'em', 'code': 'code',
+    'a': 'a', 'u': 'u', 's': 's', 'del': 's', 'strike': 's', 'sub': 'sub', 'sup': 'sup'
+}
+# Inline tags that only style their text, which is kept without them
+_TRANSPARENT_TAGS = {'span', 'small', 'mark', 'abbr', 'kbd', 'var', 'samp', 'cite', 'q', 'font', 'label'}
+# Block starts that end an open <p>
+_CLOSES_P = _TEXT_TAGS | _LIST_TAGS | {
+    'pre', 'div', 'table', 'hr', 'section', 'article', 'figure', 'form', 'dl', 'details', 'header', 'footer'
+}
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_LANGUAGE_RE = re.compile(r'(?:^|\s)(?:language|lang)-(\S+)')
+
+
+class MobiledocBuilder(HTMLParser):
+    """Converts post HTML into a Ghost mobiledoc document in one pass.
+
+    Headings, paragraphs and quotes become markup sections, `ul`/`ol` list
+    sections, `<pre>` blocks code cards and `<hr>`/`<img>` their Ghost
+    cards, with inline formatting kept as markups. A top-level block that
+    cannot be expressed in mobiledoc (a table, a nested list, a paragraph
+    with a class...) is kept verbatim in an HTML card. Feed HTML in chunks
+    with `feed`, then call `close` and read `mobiledoc`.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.atoms: List[list] = []
+        self.cards: List[list] = []
+        self.markups: List[list] = []
+        self.sections: List[list] = []
+        self._markup_index = {}
+        self._soft_return = None
+        self._reset_block()
+
+    def _reset_block(self):
+        self._kind = None  # 'text', 'list', 'code' or 'html'
+        self._block_tag = None
+        self._implicit = False  # A paragraph for text outside any block
+        self._stack: List[str] = []  # Open elements of the current block
+        self._raw: List[str] = []
+        self._fallback = False
+        self._markers: List[list] = []
+        self._items: List[List[list]] = []
+        self._open: List[int] = []  # Markups open at the current position, innermost last
+        self._pending: List[int] = []  # Markups opened since the last marker
+        self._code: List[str] = []
+        self._language = ''
+
+    @property
+    def mobiledoc(self) -> dict:
+        return {
+            "version": MOBILEDOC_VERSION,
+            "atoms": self.atoms,
+            "cards": self.cards,
+            "markups": self.markups,
+            "sections": self.sections
+        }
+
+    # Sections
+
+    def _add_card(self, name: str, payload: dict):
+        self.cards.append([name, payload])
+        self.sections.append([_CARD_SECTION, len(self.cards) - 1])
+
+    def _start_block(self, kind: str, tag: str, raw: str):
+        self._kind = kind
+        self._block_tag = tag
+        self._stack.append(tag)
+        self._raw.append(raw)
+
+    def _end_block(self):
+        if self._fallback:
+            self._add_card('html', {'html': ''.join(self._raw).strip()})
+        elif self._kind == 'text':
+            markers = self._finish_markers()
+            if markers:
+                self.sections.append([_MARKUP_SECTION, self._block_tag, markers])
+        elif self._kind == 'list':
+            self._finish_item()
+            if self._items:
+                self.sections.append([_LIST_SECTION, self._block_tag, self._items])
+        elif self._kind == 'code':
+            self._add_card('code', {'code': ''.join(self._code).strip('\n'), 'language': self._language})
+        elif self._kind == 'html':
+            self._add_card('html', {'html': ''.join(self._raw).strip()})
+        self._reset_block()
+
+    def _finish_markers(self) -> List[list]:
+        """Markers of the current paragraph or list item, with open markups closed"""
+        markers = self._markers
+        if markers and markers[-1][0] == _TEXT_MARKER:
+            markers[-1][3] = markers[-1][3].rstrip()
+            if not markers[-1][3] and not markers[-1][1] and not markers[-1][2]:
+                markers.pop()
+        if markers:
+            markers[-1][2] += len(self._open) - len(self._pending)
+        self._markers = []
+        self._open = []
+        self._pending = []
+        return markers
+
+    def _finish_item(self):
+        markers = self._finish_markers()
+        if markers:
+            self._items.append(markers)
+
+    # Markers
+
+    def _markup(self, tag: str, attrs: list) -> int:
+        markup = [tag]
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                markup.append(['href', href])
+        key = repr(markup)
+        index = self._markup_index.get(key)
+        if index is None:
+            index = self._markup_index[key] = len(self.markups)
+            self.markups.append(markup)
+        return index
+
+    def _add_marker(self, marker_type: int, value):
+        self._markers.append([marker_type, self._pending, 0, value])
+        self._pending = []
+
+    def _add_text(self, text: str):
+        text = _WHITESPACE_RE.sub(' ', text)
+        previous = self._markers[-1] if self._markers else None
+        if previous is None or previous[0] == _ATOM_MARKER or previous[3].endswith(' '):
+            text = text.lstrip()
+        if not text:
+            return
+        if previous is not None and previous[0] == _TEXT_MARKER and not self._pending and not previous[2]:
+            previous[3] += text
+        else:
+            self._add_marker(_TEXT_MARKER, text)
+
+    def _add_soft_return(self):
+        if self._soft_return is None:
+            self.atoms.append(['soft-return', '', {}])
+            self._soft_return = len(self.atoms) - 1
+        self._add_marker(_ATOM_MARKER, self._soft_return)
+
+    def _open_inline(self, tag: str, attrs: list):
+        self._stack.append(tag)
+        if tag in _MARKUP_TAGS:
+            index = self._markup(_MARKUP_TAGS[tag], attrs)
+            self._open.append(index)
+            self._pending.append(index)
+
+    def _close_inline(self, tag: str):
+        if tag in _MARKUP_TAGS:
+            index = self._open.pop()
+            if self._pending and self._pending[-1] == index:
+                # Nothing was written inside the markup
+                self._pending.pop()
+            elif self._markers:
+                self._markers[-1][2] += 1
+
+    # HTMLParser callbacks
+
+    def handle_starttag(self, tag, attrs):
+        raw = self.get_starttag_text()
+        if self._kind == 'text' and self._ends_paragraph(tag):
+            self._end_block()
+        if self._kind is None:
+            self._start_top_level(tag, attrs, raw)
+        elif self._kind == 'code':
+            self._code_starttag(tag, attrs, raw)
+        else:
+            self._raw.append(raw)
+            if self._fallback or self._kind == 'html':
+                if tag not in _VOID_TAGS:
+                    self._stack.append(tag)
+            elif tag in _MARKUP_TAGS or tag in _TRANSPARENT_TAGS:
+                self._open_inline(tag, attrs)
+            elif tag == 'br':
+                self._add_soft_return()
+            elif self._kind == 'list' and tag == 'li' and self._stack[-1] in ('li', self._block_tag):
+                # A new item, which also ends an unclosed one
+                self._finish_item()
+                self._stack = [self._block_tag, 'li']
+            else:
+                self._fallback = True
+                if tag not in _VOID_TAGS:
+                    self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def _ends_paragraph(self, tag) -> bool:
+        """Whether `tag` ends the current paragraph, as a block start ends an open <p>"""
+        if tag in _MARKUP_TAGS or tag in _TRANSPARENT_TAGS or tag == 'br':
+            return False
+        if self._implicit:
+            return not self._stack
+        return self._stack == ['p'] and tag in _CLOSES_P
+
+    def _start_top_level(self, tag, attrs, raw):
+        if tag in _VOID_TAGS:
+            attributes = dict(attrs)
+            if tag == 'hr':
+                self._add_card('hr', {})
+            elif tag == 'img' and attributes.get('src'):
+                self._add_card('image', {'src': attributes['src'], 'alt': attributes.get('alt') or ''})
+            elif tag != 'br':
+                self._add_card('html', {'html': raw})
+        elif tag in _TEXT_TAGS:
+            self._start_block('text', tag, raw)
+            self._fallback = bool(attrs)
+        elif tag in _LIST_TAGS:
+            self._start_block('list', tag, raw)
+            self._fallback = bool(attrs)
+        elif tag == 'pre':
+            self._start_block('code', tag, raw)
+        elif tag in _MARKUP_TAGS or tag in _TRANSPARENT_TAGS:
+            self._start_implicit_paragraph(raw)
+            self._open_inline(tag, attrs)
+        else:
+            self._start_block('html', tag, raw)
+
+    def _start_implicit_paragraph(self, raw: str):
+        self._kind = 'text'
+        self._block_tag = 'p'
+        self._implicit = True
+        self._raw.append(raw)
+
+    def _code_starttag(self, tag, attrs, raw):
+        if tag == 'pre':
+            self._stack.append(tag)
+        elif tag == 'code':
+            if not self._language:
+                match = _LANGUAGE_RE.search(dict(attrs).get('class') or '')
+                self._language = match.group(1) if match else ''
+        else:
+            # An unescaped "<" in the code, e.g. `a<b`
+            self._code.append(html.unescape(raw))
+
+    def handle_endtag(self, tag):
+        if self._kind == 'code':
+            if tag == 'pre':
+                self._stack.pop()
+                if not self._stack:
+                    self._end_block()
+            elif tag != 'code':
+                self._code.append(f'</{tag}>')
+            return
+        if self._kind is None or tag not in self._stack:
+            # Stray end tag
+            return
+        self._raw.append(f'</{tag}>')
+        while True:
+            open_tag = self._stack.pop()
+            if not self._fallback and self._kind in ('text', 'list'):
+                if self._kind == 'list' and open_tag == 'li':
+                    self._finish_item()
+                else:
+                    self._close_inline(open_tag)
+            if open_tag == tag:
+                break
+        if not self._stack and not self._implicit:
+            self._end_block()
+
+    def handle_data(self, data):
+        if self._kind is None:
+            if data.strip():
+                self._start_implicit_paragraph(html.escape(data, quote=False))
+                self._add_text(data)
+            return
+        if self._kind == 'code':
+            self._code.append(data)
+            return
+        self._raw.append(html.escape(data, quote=False))
+        if self._fallback or self._kind == 'html':
+            return
+        if self._kind == 'list' and len(self._stack) == 1:
+            # Whitespace between list items
+            return
+        if self._implicit and not self._stack and not data.strip() and '\n' in data:
+            # A line break between top-level elements ends the paragraph
+            self._end_block()
+            return
+        self._add_text(data)
+
+    def close(self):
+        super().close()
+        if self._kind is not None:
+            self._end_block()
+
+
+def html_to_mobiledoc(content: str) -> dict:
+    """Convert post HTML into a Ghost mobiledoc document; see `MobiledocBuilder`"""
+    builder = MobiledocBuilder()
+    builder.feed(content)
+    builder.close()
+    return builder.mobiledoc
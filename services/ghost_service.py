@@ -1,94 +1,152 @@
-import aiohttp
+import json
+import threading
+import time
 from services.blog_service import BlogService
+from services.http_session import get_session
+from services.ghost_document import html_to_mobiledoc
+from services.metrics import stage_timer, upstream
+from services.resilience import RETRY_STATUSES, RetryableError, get_upstream, retryable_response
 from config.config import Config
-import jwt
-import time
+
+
+class GhostAdminAuth:
+    """Admin API authentication: signs short-lived JWTs and reuses them.
+
+    The key is split and the secret decoded once. A token is signed with a
+    `lifetime` of at most 5 minutes (Ghost's limit) and handed out until
+    `refresh_margin` seconds before it expires, so bulk publishing signs a
+    handful of tokens instead of one per request. Safe to share across
+    coroutines and threads.
+    """
+
+    def __init__(self, api_key: str, lifetime: int = 300, refresh_margin: int = 60):
+        self.key_id, _, secret = (api_key or '').partition(':')
+        # Check if secret is in hex format (for testing environments)
+        try:
+            self.secret = bytes.fromhex(secret)
+        except ValueError:
+            # For testing, use the secret as-is if it's not hex
+            self.secret = secret.encode()
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self._header = {'alg': 'HS256', 'typ': 'JWT', 'kid': self.key_id}
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def token(self) -> str:
+        if not self.key_id or not self.secret:
+            raise ValueError("GHOST_API_KEY must have the format <id>:<secret>")
+        now = int(time.time())
+        with self._lock:
+            if self._token is None or now >= self._expires_at - self.refresh_margin:
+                self._expires_at = now + self.lifetime
+                import jwt
+                payload = {'iat': now, 'exp': self._expires_at, 'aud': '/admin/'}
+                self._token = jwt.encode(payload, self.secret, algorithm='HS256', headers=self._header)
+            return self._token
+
+    def headers(self) -> dict:
+        return {
+            "Authorization": f"Ghost {self.token()}",
+            "Content-Type": "application/json",
+            "Accept-Version": "v5.0"
+        }
+
 
 class GhostService(BlogService):
     def __init__(self):
         config = Config()
         self.base_url = config.ghost_url.rstrip('/')
         self.api_key = config.ghost_api_key
+        self.auth = GhostAdminAuth(self.api_key)
+        self.content_format = config.ghost_content_format
+
+    def _auth_headers(self):
+        return self.auth.headers()
 
-    async def execute(self, title, content, status="published"):
+    async def execute(self, title, content, status="published", published_at=None):
+        """Create a post; with status "scheduled", Ghost publishes it itself at `published_at`"""
         # Validate status - must be one of: 'published', 'draft', 'scheduled', 'sent'
         valid_statuses = ['published', 'draft', 'scheduled', 'sent']
         if status not in valid_statuses:
             print(f"Warning: Invalid status '{status}'. Defaulting to 'published'.")
             status = 'published'
-        # Generate a fresh JWT for every request
-        id, secret = self.api_key.split(':')
-        now = int(time.time())
-        iat = now
-        exp = now + 120  # 2 minutes after now
-        print(f"[GhostService JWT Debug] iat: {iat}, exp: {exp}, now: {now}")
-        header = {'alg': 'HS256', 'typ': 'JWT', 'kid': id}
-        payload = {
-            'iat': iat,
-            'exp': exp,
-            'aud': '/admin/'
-        }
-        # Check if secret is in hex format (for testing environments)
-        try:
-            secret_bytes = bytes.fromhex(secret)
-        except ValueError:
-            # For testing, use the secret as-is if it's not hex
-            secret_bytes = secret.encode()
-            
-        token = jwt.encode(payload, secret_bytes, algorithm='HS256', headers=header)
-        headers = {
-            "Authorization": f"Ghost {token}",
-            "Content-Type": "application/json",
-            "Accept-Version": "v5.0"
-        }
 
-        # Create a slug from the title
-        slug = title.lower().replace(' ', '-')
-        # Remove special characters from slug
-        import re
-        slug = re.sub(r'[^a-z0-9-]', '', slug)
-        
-        # Create a proper mobiledoc structure with the content
-        # This is a simplified approach - for complex content, a proper mobiledoc parser would be better
-        import json
-        
-        # First, create a basic mobiledoc structure
-        mobiledoc = {
-            "version": "0.3.1",
-            "atoms": [],
-            "cards": [
-                ["html", { "html": content }]  # Use the HTML card to include raw HTML
-            ],
-            "markups": [],
-            "sections": [
-                [10, 0]  # This references the HTML card defined above
-            ]
-        }
-        
-        post_data = {
-            "posts": [{
-                "title": title,
-                "html": content,  # Include HTML for backward compatibility
-                "mobiledoc": json.dumps(mobiledoc),  # Include properly formatted mobiledoc
-                "status": status,
-                "featured": False,
-                "visibility": "public",
-                "slug": slug
-            }]
+        post = {
+            "title": title,
+            "status": status,
+            "featured": False,
+            "visibility": "public",
+            "slug": self.slugify(title)
         }
+        # Send the content once: as mobiledoc, or as HTML that Ghost converts itself
+        params = None
+        if self.content_format == "html":
+            post["html"] = content
+            params = {"source": "html"}
+        else:
+            with stage_timer("convert"):
+                post["mobiledoc"] = json.dumps(html_to_mobiledoc(content), separators=(",", ":"))
+        post_data = {"posts": [post]}
+        if published_at is not None:
+            post_data["posts"][0]["published_at"] = published_at
 
-        async with aiohttp.ClientSession() as session:
+        async def attempt():
+            session = await get_session()
             async with session.post(
                 f"{self.base_url}/ghost/api/admin/posts/",
+                params=params,
                 json=post_data,
-                headers=headers
+                headers=self._auth_headers(),
+                trace_request_ctx=upstream("ghost")
             ) as response:
                 if response.status in (200, 201):
                     data = await response.json()
-                    print(f"\nGhost API Response: {data}\n")
+                    post = (data.get("posts") or [{}])[0]
+                    print(f"\nGhost API Response: post {post.get('id')} ({post.get('url')})\n")
                     return data
-                else:
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, await response.text())
+                error_data = await response.json()
+                error_message = error_data.get('errors', [{}])[0].get('message', 'Unknown error')
+                print(f"Ghost API Error: {error_data}")
+                raise Exception(f"Failed to publish to Ghost: {error_message} (Status: {response.status})")
+
+        # Creating a post is not idempotent; it is only retried when Ghost certainly did not create it
+        try:
+            return await get_upstream("ghost").call(attempt, idempotent=False)
+        except RetryableError as e:
+            raise Exception(f"Failed to publish to Ghost: {e.message[:200]} (Status: {e.status})")
+
+    def post_url(self, slug):
+        return f"{self.base_url}/{slug}/"
+
+    async def list_post_titles(self):
+        """Return the titles of all posts via the Admin API, following pagination"""
+        async def fetch_page(page):
+            session = await get_session()
+            async with session.get(
+                f"{self.base_url}/ghost/api/admin/posts/",
+                params={"limit": "100", "page": str(page), "fields": "title"},
+                headers=self._auth_headers(),
+                trace_request_ctx=upstream("ghost")
+            ) as response:
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, await response.text())
+                if response.status != 200:
                     error_data = await response.json()
                     error_message = error_data.get('errors', [{}])[0].get('message', 'Unknown error')
-                    print(f"Ghost API Error: {error_data}")
-                    raise Exception(f"Failed to publish to Ghost: {error_message} (Status: {response.status})")
\ No newline at end of file
+                    raise Exception(f"Failed to list Ghost posts: {error_message} (Status: {response.status})")
+                return await response.json()
+
+        titles = []
+        page = 1
+        while page:
+            try:
+                data = await get_upstream("ghost").call(lambda: fetch_page(page))
+            except RetryableError as e:
+                raise Exception(f"Failed to list Ghost posts: {e.message[:200]} (Status: {e.status})")
+            titles.extend(post["title"] for post in data.get("posts", []))
+            page = data.get("meta", {}).get("pagination", {}).get("next")
+        return titles
\ No newline at end of file
@@ -0,0 +1,141 @@
+import functools
+import re
+from typing import List, Tuple
+
+GO_BLOCK_RE = re.compile(r'<pre><code class="language-go">\s*(.*?)\s*</code></pre>', re.DOTALL)
+
+# Only the tokens that change lexer state or nesting; regex skips the rest of a line.
+# Quotes may arrive HTML-escaped, and escape sequences are consumed as one token
+# so an escaped quote never ends a string.
+_TOKEN_RE = re.compile(
+    r'\\(?:&quot;|&#39;|&apos;|&#x27;|.)'
+    r'|//|/\*|\*/|`|"|\'|&quot;|&#39;|&apos;|&#x27;'
+    r'|[{}()\[\]]'
+)
+_LABEL_RE = re.compile(r'[A-Za-z_]\w*:$')
+
+_DOUBLE_QUOTES = ('"', '&quot;')
+_SINGLE_QUOTES = ("'", '&#39;', '&apos;', '&#x27;')
+_OPENERS = '{(['
+_CLOSERS = '})]'
+
+# Lexer states that carry over to the next line
+_CODE = 0
+_BLOCK_COMMENT = 1
+_RAW_STRING = 2
+
+
+def _scan_line(line: str, state: int) -> Tuple[int, List[Tuple[int, bool]]]:
+    """Lex one line of Go.
+
+    Returns the state at the end of the line and the (position, is_opener)
+    of every bracket outside strings, runes and comments.
+    """
+    brackets = []
+    quote = None  # Closing delimiters of the string or rune being read
+    for match in _TOKEN_RE.finditer(line):
+        token = match.group()
+        if state == _BLOCK_COMMENT:
+            if token == '*/':
+                state = _CODE
+        elif state == _RAW_STRING:
+            if token == '`':
+                state = _CODE
+        elif quote is not None:
+            if token in quote:
+                quote = None
+        elif token in _OPENERS:
+            brackets.append((match.start(), True))
+        elif token in _CLOSERS:
+            brackets.append((match.start(), False))
+        elif token == '//':
+            break
+        elif token == '/*':
+            state = _BLOCK_COMMENT
+        elif token == '`':
+            state = _RAW_STRING
+        elif token in _DOUBLE_QUOTES:
+            quote = _DOUBLE_QUOTES
+        elif token in _SINGLE_QUOTES:
+            quote = _SINGLE_QUOTES
+    # Interpreted strings and runes cannot span lines, so only `state` carries over
+    return state, brackets
+
+
+def _is_outdented(stripped: str) -> bool:
+    """Switch/select clauses and labels sit one level left of their block"""
+    return (stripped.startswith('case ') or stripped.startswith('default:')
+            or _LABEL_RE.match(stripped) is not None)
+
+
+@functools.lru_cache(maxsize=512)
+def format_go_code(code: str, indent: str = "    ") -> str:
+    """Re-indent Go code the way gofmt lays out its blocks.
+
+    Brackets inside strings, runes, raw strings and comments are ignored.
+    Each line is indented once per earlier line that still has a bracket
+    open, so `foo(func() {` adds a single level, as with gofmt. Lines inside
+    a multi-line raw string are kept verbatim and runs of blank lines are
+    collapsed. Results are cached per code string.
+    """
+    result = []
+    stack = []  # Line number of every open bracket
+    levels = 0  # Distinct line numbers in `stack`
+    state = _CODE
+    previous_blank = False
+
+    for number, line in enumerate(code.splitlines()):
+        starting_state = state
+        state, brackets = _scan_line(line, state)
+
+        if starting_state == _RAW_STRING:
+            result.append(line)
+            previous_blank = False
+            leading = 0
+        else:
+            stripped = line.strip()
+            # Closing brackets that start the line dedent the line itself
+            leading = 0
+            if starting_state == _CODE:
+                offset = len(line) - len(line.lstrip())
+                while (leading < len(brackets) and not brackets[leading][1]
+                       and brackets[leading][0] == offset + leading):
+                    leading += 1
+                    if stack:
+                        opened_on = stack.pop()
+                        if not stack or stack[-1] != opened_on:
+                            levels -= 1
+
+            if not stripped:
+                if result and not previous_blank:
+                    result.append("")
+                previous_blank = True
+            else:
+                previous_blank = False
+                level = levels
+                if starting_state == _CODE and level and _is_outdented(stripped):
+                    level -= 1
+                result.append(indent * level + stripped)
+
+        for _, is_opener in brackets[leading:]:
+            if is_opener:
+                if not stack or stack[-1] != number:
+                    levels += 1
+                stack.append(number)
+            elif stack:
+                opened_on = stack.pop()
+                if not stack or stack[-1] != opened_on:
+                    levels -= 1
+
+    while result and result[-1] == "":
+        result.pop()
+    return "\n".join(result)
+
+
+def _format_block(match) -> str:
+    return f'<pre><code class="language-go">\n{format_go_code(match.group(1))}\n</code></pre>'
+
+
+def beautify_go_code_in_html(html: str) -> str:
+    """Format the code of every `language-go` block in an HTML document"""
+    return GO_BLOCK_RE.sub(_format_block, html)
@@ -0,0 +1,62 @@
+import asyncio
+import weakref
+from typing import TYPE_CHECKING
+from services.metrics import create_trace_config
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class HttpSessionPool:
+    """Shared keep-alive aiohttp sessions for all services.
+
+    aiohttp sessions are bound to the event loop that created them, so the pool
+    keeps one session per running loop. Every service running on that loop
+    reuses the same connector, which keeps TCP/TLS connections and DNS lookups
+    warm between requests to LeetCode, DeepSeek and the blog platform. Every
+    request is counted in the upstream metrics (see `services.metrics`).
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10,
+                 ttl_dns_cache: int = 300, keepalive_timeout: float = 30.0):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self._sessions = weakref.WeakKeyDictionary()
+
+    def _create_session(self) -> "aiohttp.ClientSession":
+        # aiohttp is the slowest import of the web process; it is loaded with the first session
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.ttl_dns_cache,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[create_trace_config()])
+
+    async def get_session(self) -> "aiohttp.ClientSession":
+        """Return the shared session for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._create_session()
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Close the session bound to the running event loop, if any"""
+        loop = asyncio.get_running_loop()
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+http_pool = HttpSessionPool()
+
+
+async def get_session() -> "aiohttp.ClientSession":
+    """Return the default pool's session for the running event loop"""
+    return await http_pool.get_session()
@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import contextvars
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from services.http_session import http_pool
+from services.metrics import STAGE_SECONDS
+
+# The job whose handler is running in the current task (and the tasks it spawns)
+current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class Job:
+    """A unit of work for `JobWorker`, with its state and per-stage timings.
+
+    `state` moves from queued to running to succeeded or failed.
+    """
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.key = json.dumps(params, sort_keys=True)
+        self.state = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stages = {}
+        self.result = None
+        self.error = None
+        self.merged = 0  # Identical submissions folded into this job
+
+    def record_stage(self, name: str, seconds: float):
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        stage["seconds"] += seconds
+        stage["calls"] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "state": self.state,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": (self.started_at or time.time()) - self.created_at,
+            "stages": {name: dict(stage) for name, stage in self.stages.items()},
+            "merged": self.merged,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+@contextlib.contextmanager
+def job_stage(name: str):
+    """Time a block as stage `name` of the current job, if there is one, and in the stage metrics"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        seconds = time.monotonic() - started
+        STAGE_SECONDS.observe(seconds, stage=name)
+        job = current_job.get()
+        if job is not None:
+            job.record_stage(name, seconds)
+
+
+class JobWorker:
+    """Runs jobs on one long-lived event loop in a background thread.
+
+    `submit` can be called from any thread. At most `max_pending` jobs wait
+    in the queue; more raise `JobQueueFull`, and a submission identical to
+    a job that is still queued is merged into it. The loop (and with it the
+    pooled HTTP connections) lives as long as the worker, instead of being
+    created for every run. The last `history` finished jobs stay queryable.
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[Any]], max_pending: int = 10,
+                 concurrency: int = 1, history: int = 100):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.concurrency = concurrency
+        self.history = history
+        self._jobs = OrderedDict()
+        self._pending = {}  # Job key -> queued job
+        self._lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name="job-worker", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the loop; running and queued jobs are abandoned"""
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue()
+        consumers = [self._loop.create_task(self._consume()) for _ in range(self.concurrency)]
+        self._loop.call_soon(self._ready.set)
+        try:
+            self._loop.run_forever()
+        finally:
+            for task in consumers:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*consumers, return_exceptions=True))
+            self._loop.run_until_complete(http_pool.close())
+            self._loop.close()
+
+    def submit(self, params: dict) -> Tuple[Job, bool]:
+        """Queue a job; returns the job and whether it was merged into a pending one"""
+        if not self.running:
+            self.start()
+        job = Job(params)
+        with self._lock:
+            pending = self._pending.get(job.key)
+            if pending is not None:
+                pending.merged += 1
+                return pending, True
+            if len(self._pending) >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self.max_pending} pending jobs)")
+            self._pending[job.key] = job
+            self._jobs[job.id] = job
+            self._trim_history()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, job)
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in ("succeeded", "failed")]
+        for job_id in itertools.islice(finished, max(len(finished) - self.history, 0)):
+            del self._jobs[job_id]
+
+    async def _consume(self):
+        while True:
+            job = await self._queue.get()
+            with self._lock:
+                self._pending.pop(job.key, None)
+                job.state = "running"
+                job.started_at = time.time()
+            token = current_job.set(job)
+            try:
+                job.result = await self.handler(job)
+                job.state = "succeeded"
+            except Exception as e:
+                print(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                job.state = "failed"
+            finally:
+                current_job.reset(token)
+                job.finished_at = time.time()
@@ -0,0 +1,189 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+from services.storage import open_shared_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    acquired_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS shared_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def default_holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """A named lease that at most one process on the host holds at a time.
+
+    Backed by a SQLite file shared by every process (e.g. all gunicorn
+    workers). The holder has to renew the lease within `ttl` seconds; once
+    it expires, because the holder died or hung, any process can take it
+    over. The same database carries small shared state, such as the next
+    scheduled run, so every process reports the same values.
+    """
+
+    def __init__(self, name: str = 'scheduler', conn: Optional[sqlite3.Connection] = None,
+                 ttl: float = 30.0, holder: Optional[str] = None):
+        self.name = name
+        self.conn = conn or open_shared_database('scheduler.db')
+        self.ttl = ttl
+        self.holder = holder or default_holder_id()
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we hold it.
+
+        Returns whether this process holds the lease afterwards.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                # Take the write lock up front so two processes cannot both see an expired lease
+                self.conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                # Another process kept the database busy; what we held is still ours until it expires
+                return self.held
+            try:
+                row = self.conn.execute(
+                    "SELECT holder, acquired_at, expires_at FROM leases WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is not None and row[0] != self.holder and row[2] > now:
+                    self.conn.rollback()
+                    self._expires_at = 0.0
+                    return False
+                acquired_at = row[1] if row is not None and row[0] == self.holder else now
+                self.conn.execute(
+                    """
+                    INSERT INTO leases (name, holder, acquired_at, expires_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        holder = excluded.holder,
+                        acquired_at = excluded.acquired_at,
+                        expires_at = excluded.expires_at
+                    """,
+                    (self.name, self.holder, acquired_at, now + self.ttl)
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self._expires_at = now + self.ttl
+            return True
+
+    @property
+    def held(self) -> bool:
+        """Whether our last successful acquire is still within its TTL"""
+        return self._expires_at > time.time()
+
+    def release(self):
+        """Give the lease up so another process can take over right away"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+            self._expires_at = 0.0
+
+    def current_holder(self) -> Optional[dict]:
+        """The live holder of the lease, or None when it is free or expired"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT holder, acquired_at, expires_at FROM leases WHERE name = ?", (self.name,)
+            ).fetchone()
+        if row is None or row[2] <= time.time():
+            return None
+        return {"holder": row[0], "acquired_at": row[1], "expires_at": row[2]}
+
+    def set_state(self, key: str, value):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO shared_state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, json.dumps(value), time.time())
+            )
+
+    def get_state(self, key: str, default=None):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+
+class LeaderElector:
+    """Keeps trying to hold a `LeaderLease` from a background thread.
+
+    Every `interval` seconds (a third of the lease TTL by default) the
+    leader renews the lease and followers try to take it. `on_elected` runs
+    when this process becomes the leader and `on_demoted` when it loses the
+    lease, e.g. after being stalled for longer than the TTL. `on_heartbeat`
+    runs after every attempt, leader or not.
+    """
+
+    def __init__(self, lease: LeaderLease, on_elected: Callable[[], None],
+                 on_demoted: Callable[[], None], interval: Optional[float] = None,
+                 on_heartbeat: Optional[Callable[[], None]] = None):
+        self.lease = lease
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.on_heartbeat = on_heartbeat
+        self.interval = lease.ttl / 3 if interval is None else interval
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.heartbeat()
+        self._thread = threading.Thread(target=self._run, name="leader-elector", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop heartbeating and hand the lease over if we hold it"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.is_leader:
+            self.is_leader = False
+            self.on_demoted()
+            self.lease.release()
+
+    def heartbeat(self):
+        """Acquire or renew the lease once and fire the callbacks on changes"""
+        try:
+            leader = self.lease.acquire()
+        except Exception as e:
+            print(f"Leader election failed: {str(e)}")
+            leader = self.lease.held
+        if leader and not self.is_leader:
+            self.is_leader = True
+            print(f"Elected leader for {self.lease.name} ({self.lease.holder})")
+            self.on_elected()
+        elif not leader and self.is_leader:
+            self.is_leader = False
+            print(f"Lost leadership for {self.lease.name} ({self.lease.holder})")
+            self.on_demoted()
+        if self.on_heartbeat is not None:
+            try:
+                self.on_heartbeat()
+            except Exception as e:
+                print(f"Heartbeat callback failed: {str(e)}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.heartbeat()
@@ -1,11 +1,91 @@
-import aiohttp
+import asyncio
 import random
 import json
 from services.base_service import BaseService
+from services.http_session import get_session
+from services.metrics import upstream
+from services.resilience import RETRY_STATUSES, RetryableError, get_upstream, retryable_response
+from services.problem_catalog import ProblemCatalog
+from config.config import Config
+
+SAMPLING_MODES = ("page", "uniform")
+
+PROBLEM_QUERY = """
+query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+    problemsetQuestionList: questionList(
+        categorySlug: $categorySlug
+        limit: $limit
+        skip: $skip
+        filters: $filters
+    ) {
+        totalNum
+        data {
+            title
+            titleSlug
+            content
+            difficulty
+            acRate
+            topicTags {
+                name
+                slug
+            }
+        }
+    }
+}
+"""
+
+COUNT_QUERY = """
+query problemsetQuestionCount($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+    problemsetQuestionList: questionList(
+        categorySlug: $categorySlug
+        limit: $limit
+        skip: $skip
+        filters: $filters
+    ) {
+        totalNum
+    }
+}
+"""
+
+CATALOG_QUERY = """
+query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
+    problemsetQuestionList: questionList(
+        categorySlug: $categorySlug
+        limit: $limit
+        skip: $skip
+        filters: $filters
+    ) {
+        totalNum
+        data {
+            title
+            titleSlug
+            difficulty
+            acRate
+            paidOnly
+            topicTags {
+                name
+                slug
+            }
+        }
+    }
+}
+"""
+
+CONTENT_QUERY = """
+query questionContent($titleSlug: String!) {
+    question(titleSlug: $titleSlug) {
+        content
+    }
+}
+"""
 
 class LeetCodeService(BaseService):
-    def __init__(self):
-        self.graphql_url = "https://leetcode.com/graphql"
+    CATALOG_PAGE_SIZE = 100
+    UNIFORM_MAX_ATTEMPTS = 5
+
+    def __init__(self, catalog: ProblemCatalog = None):
+        config = Config()
+        self.graphql_url = config.leetcode_graphql_url
         self.headers = {
             "Content-Type": "application/json",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
@@ -14,32 +94,73 @@ class LeetCodeService(BaseService):
             "Origin": "https://leetcode.com",
             "Referer": "https://leetcode.com/problemset/all/"
         }
+        if catalog is None and config.leetcode_catalog:
+            catalog = ProblemCatalog()
+        self.catalog = catalog
+        self.catalog_max_age = config.leetcode_catalog_max_age
+        self._refresh_task = None
+        # Concurrent selections (batch mode) must not all fill an empty catalog
+        self._initial_sync_lock = asyncio.Lock()
 
-    async def execute(self, difficulty=None, topics=None, company_tags=None):
-        query = """
-        query problemsetQuestionList($categorySlug: String, $limit: Int, $skip: Int, $filters: QuestionListFilterInput) {
-            problemsetQuestionList: questionList(
-                categorySlug: $categorySlug
-                limit: $limit
-                skip: $skip
-                filters: $filters
-            ) {
-                totalNum
-                data {
-                    title
-                    titleSlug
-                    content
-                    difficulty
-                    acRate
-                    topicTags {
-                        name
-                        slug
-                    }
-                }
-            }
+    async def _graphql(self, query, variables):
+        """Send a GraphQL request and return the decoded JSON body.
+
+        Rate limited and retried through the shared "leetcode" upstream.
+        """
+        async def attempt():
+            session = await get_session()
+            async with session.post(
+                self.graphql_url,
+                json={"query": query, "variables": variables},
+                headers=self.headers,
+                trace_request_ctx=upstream("leetcode")
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                error_text = await response.text()
+                try:
+                    error_json = json.loads(error_text)
+                    error_message = error_json.get("errors", [{}])[0].get("message", "Unknown error")
+                except json.JSONDecodeError:
+                    error_message = error_text
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, error_message)
+                raise Exception(f"Failed to fetch LeetCode problem: {response.status}. Error: {error_message}")
+
+        try:
+            return await get_upstream("leetcode").call(attempt)
+        except RetryableError as e:
+            raise Exception(f"Failed to fetch LeetCode problem: {e.status}. Error: {e.message}")
+
+    @staticmethod
+    def _with_interview_metadata(problem):
+        # Add additional interview-specific metadata
+        problem["interview_metadata"] = {
+            "acceptance_rate": problem.get("acRate", 0),
+            "topics": [tag["name"] for tag in problem.get("topicTags", [])],
+            "companies": []  # Public API doesn't provide company tags
         }
+        return problem
+
+    async def execute(self, difficulty=None, topics=None, company_tags=None,
+                      min_acceptance=None, max_acceptance=None, sampling="page", exclude=None):
+        """Select a random problem matching the filters.
+
+        With a catalog the selection is a local lookup. Otherwise `sampling`
+        picks the network strategy: "page" chooses among the first 50 matches,
+        "uniform" reads `totalNum` first and fetches one row at a random offset,
+        so every match is reachable and only one description is downloaded.
+
+        `exclude` is a container of title slugs (e.g. a `PublishedIndex`) that
+        must not be selected. When sampling only finds excluded problems, the
+        remaining matches are searched page by page.
         """
-        
+        if sampling not in SAMPLING_MODES:
+            raise ValueError(f"Unsupported sampling mode: {sampling}")
+
+        if self.catalog is not None:
+            return await self._select_from_catalog(difficulty, topics, min_acceptance, max_acceptance, exclude)
+
         variables = {
             "categorySlug": "",
             "limit": 50,
@@ -49,44 +170,166 @@ class LeetCodeService(BaseService):
 
         if difficulty:
             variables["filters"]["difficulty"] = difficulty.upper()
-        
+
         if topics:
             variables["filters"]["tags"] = topics
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.graphql_url,
-                json={"query": query, "variables": variables},
-                headers=self.headers
-            ) as response:
-                if response.status == 200:
-                    response_json = await response.json()
-                    problems = response_json.get("data", {}).get("problemsetQuestionList", {}).get("data", [])
-                    
-                    if not problems:
-                        raise Exception("No problems found matching the criteria")
-                    
-                    # Validate problem data structure
-                    for problem in problems:
-                        if not all(key in problem for key in ["title", "titleSlug", "content", "difficulty", "acRate", "topicTags"]):
-                            raise Exception("Invalid problem data structure received from LeetCode API")
-                    
-                    # Select a random problem from the filtered list
-                    selected_problem = random.choice(problems)
-                    
-                    # Add additional interview-specific metadata
-                    selected_problem["interview_metadata"] = {
-                        "acceptance_rate": selected_problem.get("acRate", 0),
-                        "topics": [tag["name"] for tag in selected_problem.get("topicTags", [])],
-                        "companies": []  # Public API doesn't provide company tags
-                    }
-                    
-                    return selected_problem
-                else:
-                    error_text = await response.text()
-                    try:
-                        error_json = json.loads(error_text)
-                        error_message = error_json.get("errors", [{}])[0].get("message", "Unknown error")
-                    except json.JSONDecodeError:
-                        error_message = error_text
-                    raise Exception(f"Failed to fetch LeetCode problem: {response.status}. Error: {error_message}") 
\ No newline at end of file
+        if sampling == "uniform":
+            return await self._sample_uniform(variables, exclude)
+
+        problems = await self._fetch_problems(variables)
+        if exclude:
+            listed = len(problems)
+            problems = [problem for problem in problems if problem["titleSlug"] not in exclude]
+            if not problems:
+                if listed < variables["limit"]:
+                    raise Exception("No unpublished problems found matching the criteria")
+                # The whole first page is published; look further
+                return await self._scan_for_unexcluded(variables, exclude, start=listed)
+
+        # Select a random problem from the filtered list
+        selected_problem = random.choice(problems)
+        return self._with_interview_metadata(selected_problem)
+
+    async def _fetch_problems(self, variables):
+        response_json = await self._graphql(PROBLEM_QUERY, variables)
+        problems = response_json.get("data", {}).get("problemsetQuestionList", {}).get("data", [])
+
+        if not problems:
+            raise Exception("No problems found matching the criteria")
+
+        # Validate problem data structure
+        for problem in problems:
+            if not all(key in problem for key in ["title", "titleSlug", "content", "difficulty", "acRate", "topicTags"]):
+                raise Exception("Invalid problem data structure received from LeetCode API")
+        return problems
+
+    async def _sample_uniform(self, variables, exclude):
+        """Fetch one problem at a random offset, retrying offsets that hit excluded slugs"""
+        total = await self.count_problems(variables["filters"])
+        if not total:
+            raise Exception("No problems found matching the criteria")
+
+        offsets = random.sample(range(total), min(total, self.UNIFORM_MAX_ATTEMPTS))
+        for skip in offsets:
+            problems = await self._fetch_problems({**variables, "limit": 1, "skip": skip})
+            if not exclude or problems[0]["titleSlug"] not in exclude:
+                return self._with_interview_metadata(problems[0])
+        if total <= len(offsets):
+            raise Exception("No unpublished problems found matching the criteria")
+        # Most matches are excluded; search from a random offset instead of guessing
+        return await self._scan_for_unexcluded(variables, exclude, start=random.randrange(total))
+
+    async def _scan_for_unexcluded(self, variables, exclude, start=0):
+        """Page through the matches from `start`, wrapping around, for problems not in `exclude`.
+
+        Pages list problems without their descriptions; a random free problem
+        of the first page that has any is picked and only its content is
+        fetched. Paid-only problems are skipped, as their content is not
+        available.
+        """
+        limit = self.CATALOG_PAGE_SIZE
+        skip, wrapped = start, False
+        while not (wrapped and skip >= start):
+            response_json = await self._graphql(CATALOG_QUERY, {**variables, "limit": limit, "skip": skip})
+            rows = ((response_json.get("data") or {}).get("problemsetQuestionList") or {}).get("data") or []
+            candidates = [row for row in rows if row["titleSlug"] not in exclude and not row.get("paidOnly")]
+            if candidates:
+                problem = random.choice(candidates)
+                problem["content"] = await self.fetch_content(problem["titleSlug"])
+                return self._with_interview_metadata(problem)
+            skip += limit
+            if len(rows) < limit:
+                if wrapped or start == 0:
+                    break
+                skip, wrapped = 0, True
+        raise Exception("No unpublished problems found matching the criteria")
+
+    async def count_problems(self, filters):
+        """Return how many problems match the filters without fetching any rows"""
+        response_json = await self._graphql(COUNT_QUERY, {
+            "categorySlug": "",
+            "limit": 1,
+            "skip": 0,
+            "filters": filters
+        })
+        return response_json.get("data", {}).get("problemsetQuestionList", {}).get("totalNum", 0)
+
+    async def _select_from_catalog(self, difficulty, topics, min_acceptance, max_acceptance, exclude):
+        """Pick a problem with a local indexed lookup and fetch only its content"""
+        await self.ensure_catalog()
+
+        slug = self.catalog.select_random(difficulty, topics, min_acceptance, max_acceptance, exclude)
+        if slug is None:
+            raise Exception("No problems found matching the criteria")
+
+        problem = self.catalog.get(slug)
+        if problem["content"] is None:
+            problem["content"] = await self.fetch_content(slug)
+            self.catalog.set_content(slug, problem["content"])
+        return self._with_interview_metadata(problem)
+
+    async def fetch_content(self, title_slug):
+        """Fetch the HTML description of a single problem"""
+        response_json = await self._graphql(CONTENT_QUERY, {"titleSlug": title_slug})
+        question = (response_json.get("data") or {}).get("question")
+        if not question or question.get("content") is None:
+            raise Exception(f"No content available for LeetCode problem: {title_slug}")
+        return question["content"]
+
+    async def ensure_catalog(self):
+        """Fill an empty catalog, and refresh a stale one in the background"""
+        if self.catalog.count() == 0:
+            async with self._initial_sync_lock:
+                if self.catalog.count() == 0:
+                    await self.sync_catalog(full=True)
+            return
+
+        full_age = self.catalog.seconds_since_sync(full=True)
+        full = full_age is None or full_age > self.catalog_max_age * 7
+        age = self.catalog.seconds_since_sync()
+        if full or age is None or age > self.catalog_max_age:
+            self.refresh_catalog_in_background(full=full)
+
+    def refresh_catalog_in_background(self, full=False):
+        """Start a catalog sync on the running loop unless one is already in flight"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return self._refresh_task
+
+        async def refresh():
+            try:
+                await self.sync_catalog(full=full)
+            except Exception as e:
+                print(f"LeetCode catalog refresh failed: {str(e)}")
+
+        self._refresh_task = asyncio.get_running_loop().create_task(refresh())
+        return self._refresh_task
+
+    async def sync_catalog(self, full=False):
+        """Page through the problem list and store its metadata in the catalog.
+
+        A full sync refreshes every problem (acceptance rates drift); an
+        incremental sync starts after the problems already stored, since new
+        problems are appended to the end of the list.
+        """
+        skip = 0 if full else self.catalog.count()
+        total = None
+        synced = 0
+        while total is None or skip < total:
+            response_json = await self._graphql(CATALOG_QUERY, {
+                "categorySlug": "",
+                "limit": self.CATALOG_PAGE_SIZE,
+                "skip": skip,
+                "filters": {}
+            })
+            question_list = response_json.get("data", {}).get("problemsetQuestionList", {})
+            total = question_list.get("totalNum", 0)
+            problems = question_list.get("data", [])
+            if not problems:
+                break
+            self.catalog.upsert_many(problems)
+            skip += len(problems)
+            synced += len(problems)
+        self.catalog.mark_synced(full=full)
+        print(f"LeetCode catalog synced {synced} problems ({'full' if full else 'incremental'})")
+        return synced
@@ -0,0 +1,217 @@
+import bisect
+import contextlib
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, Tuple
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Upper bounds (seconds) of the stage duration buckets: milliseconds for
+# cleaning up to minutes for long DeepSeek generations
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key in sorted(self._values):
+                lines.extend(self._render_series(key, self._values[key]))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_series(self, key, value):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed buckets per label set.
+
+    Memory is one list of bucket counts per label set, however many values
+    are observed.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Bucket counts (the last one is +Inf), then the sum of values
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the duration of a block"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return sum(series[:-1]) if series else 0
+
+    def _render_series(self, key, series):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            le_label = f'le="{le}"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le_label)} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """The metrics of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = STAGE_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "telegraf_stage_duration_seconds", "Duration of post generation stages", ("stage",)
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "telegraf_upstream_requests_total", "HTTP requests to upstream services by response status", ("upstream", "status")
+)
+UPSTREAM_RETRIES = registry.counter(
+    "telegraf_upstream_retries_total", "Requests to upstream services that were retried", ("upstream",)
+)
+UPSTREAM_RATE_LIMITED = registry.counter(
+    "telegraf_upstream_rate_limited_total", "429 responses from upstream services", ("upstream",)
+)
+UPSTREAM_BYTES = registry.counter(
+    "telegraf_upstream_bytes_total", "Body bytes sent to and received from upstream services", ("upstream", "direction")
+)
+
+
+def stage_timer(stage: str):
+    """Time a block into the stage duration histogram"""
+    return STAGE_SECONDS.time(stage=stage)
+
+
+def upstream(name: str) -> dict:
+    """`trace_request_ctx` naming the upstream of a request in the metrics"""
+    return {"upstream": name}
+
+
+def _upstream_of(context) -> str:
+    request_ctx = context.trace_request_ctx
+    if isinstance(request_ctx, dict) and "upstream" in request_ctx:
+        return request_ctx["upstream"]
+    return context.host
+
+
+def create_trace_config() -> "aiohttp.TraceConfig":
+    """Request counts, 429s and body bytes of every request made through a session"""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.host = params.url.host or "unknown"
+
+    async def on_request_chunk_sent(session, context, params):
+        UPSTREAM_BYTES.inc(len(params.chunk), upstream=_upstream_of(context), direction="out")
+
+    async def on_response_chunk_received(session, context, params):
+        UPSTREAM_BYTES.inc(len(params.chunk), upstream=_upstream_of(context), direction="in")
+
+    async def on_request_end(session, context, params):
+        name = _upstream_of(context)
+        UPSTREAM_REQUESTS.inc(upstream=name, status=str(params.response.status))
+        if params.response.status == 429:
+            UPSTREAM_RATE_LIMITED.inc(upstream=name)
+
+    async def on_request_exception(session, context, params):
+        UPSTREAM_REQUESTS.inc(upstream=_upstream_of(context), status="error")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+    trace_config.on_response_chunk_received.append(on_response_chunk_received)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
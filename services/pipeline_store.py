@@ -0,0 +1,232 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+from services.storage import open_database
+from config.config import Config
+
+# Checkpoints of a run, in pipeline order; a post written in several languages
+# keeps one "<stage>:<language>" checkpoint per language (e.g. "html:python")
+STAGES = ("problem", "prompt", "completion", "html", "publish")
+
+
+def _stage_order(stage: str) -> int:
+    return STAGES.index(stage.partition(":")[0])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_key_status ON pipeline_runs (key, status, updated_at);
+
+CREATE TABLE IF NOT EXISTS pipeline_checkpoints (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+) WITHOUT ROWID;
+"""
+
+
+class PipelineRun:
+    """One generation run and the outputs of the stages it has completed"""
+
+    def __init__(self, store: "PipelineStore", run_id: str, key: str, checkpoints: dict):
+        self.store = store
+        self.id = run_id
+        self.key = key
+        self.checkpoints = checkpoints
+
+    def has(self, stage: str) -> bool:
+        return stage in self.checkpoints
+
+    def get(self, stage: str, default=None):
+        return self.checkpoints.get(stage, default)
+
+    @property
+    def last_stage(self) -> Optional[str]:
+        return max(reversed(list(self.checkpoints)), key=_stage_order, default=None)
+
+    def save(self, stage: str, value):
+        if stage.partition(":")[0] not in STAGES:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        self.store._save_checkpoint(self.id, stage, value)
+        self.checkpoints[stage] = value
+
+    def complete(self):
+        self.store._set_status(self.id, "completed")
+
+    def fail(self, error: str):
+        """Mark the run as failed; the next run with the same key resumes it"""
+        self.store._set_status(self.id, "failed", error)
+
+    def abandon(self):
+        """Give up on the run for good"""
+        self.store._set_status(self.id, "abandoned")
+
+    def mark_ready(self):
+        """Park a generated run in the post buffer until it is published"""
+        self.store._set_status(self.id, "ready")
+
+    def mark_scheduled(self):
+        """The post was handed to the platform to go live at a later time"""
+        self.store._set_status(self.id, "scheduled")
+
+
+class PipelineStore:
+    """Durable checkpoints of generation runs, so a failed run can resume.
+
+    Every stage output (selected problem, prompt, raw completion, cleaned
+    HTML, publish result) is stored as soon as it exists. A run with the
+    same key that failed, or that stopped checkpointing for `resume_after`
+    seconds (the process was killed), is picked up again by `resume`
+    instead of starting over, which saves the expensive DeepSeek call when
+    publishing fails. A run that has been attempted `max_attempts` times is
+    abandoned instead, so a run that always fails cannot block new ones.
+
+    Runs that are generated ahead of time wait with status "ready" until
+    `claim_ready` hands them out for publishing, oldest first.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, resume_after: Optional[float] = None,
+                 max_attempts: Optional[int] = None):
+        config = Config()
+        self.conn = conn or open_database('pipeline.db')
+        self.resume_after = config.pipeline_resume_after if resume_after is None else resume_after
+        self.max_attempts = config.pipeline_max_attempts if max_attempts is None else max_attempts
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            self.conn.executescript(SCHEMA)
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pipeline_runs)")}
+            if "attempts" not in columns:
+                # Databases created before runs counted their attempts
+                self.conn.execute("ALTER TABLE pipeline_runs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 1")
+
+    def start(self, key: str) -> PipelineRun:
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO pipeline_runs (id, key, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?)",
+                (run_id, key, now, now)
+            )
+        return PipelineRun(self, run_id, key, {})
+
+    def resume(self, key: str) -> Optional[PipelineRun]:
+        """Claim the most recent unfinished run with this key, if there is one.
+
+        Unfinished runs that were already attempted `max_attempts` times are
+        abandoned rather than resumed.
+        """
+        now = time.time()
+        unfinished = "(status = 'failed' OR (status = 'running' AND updated_at < ?))"
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"UPDATE pipeline_runs SET status = 'abandoned', updated_at = ? "
+                f"WHERE key = ? AND attempts >= ? AND {unfinished}",
+                (now, key, self.max_attempts, now - self.resume_after)
+            )
+            row = self.conn.execute(
+                f"SELECT id FROM pipeline_runs WHERE key = ? AND {unfinished} ORDER BY updated_at DESC LIMIT 1",
+                (key, now - self.resume_after)
+            ).fetchone()
+            if row is None:
+                return None
+            # Conditional, so only one process can claim the run
+            claimed = self.conn.execute(
+                f"UPDATE pipeline_runs SET status = 'running', error = NULL, attempts = attempts + 1, updated_at = ? "
+                f"WHERE id = ? AND {unfinished}",
+                (now, row[0], now - self.resume_after)
+            ).rowcount
+            if not claimed:
+                return None
+            checkpoints = self._load_checkpoints(row[0])
+        return PipelineRun(self, row[0], key, checkpoints)
+
+    def claim_ready(self, key: str) -> Optional[PipelineRun]:
+        """Take the oldest ready run with this key out of the buffer, if there is one"""
+        with self._lock, self.conn:
+            while True:
+                row = self.conn.execute(
+                    "SELECT id FROM pipeline_runs WHERE key = ? AND status = 'ready' ORDER BY updated_at LIMIT 1",
+                    (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                # Conditional, so only one process can claim the run
+                claimed = self.conn.execute(
+                    "UPDATE pipeline_runs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'ready'",
+                    (time.time(), row[0])
+                ).rowcount
+                if claimed:
+                    return PipelineRun(self, row[0], key, self._load_checkpoints(row[0]))
+
+    def count(self, key: str, status: str) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM pipeline_runs WHERE key = ? AND status = ?", (key, status)
+            ).fetchone()[0]
+
+    def checkpoints_of(self, key: str, status: str, stage: str) -> list:
+        """The `stage` checkpoint of every run with this key and status"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT c.value FROM pipeline_checkpoints c JOIN pipeline_runs r ON r.id = c.run_id "
+                "WHERE r.key = ? AND r.status = ? AND c.stage = ?",
+                (key, status, stage)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """Status and checkpoints of a run, or None if unknown"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id, key, status, error, attempts, created_at, updated_at FROM pipeline_runs WHERE id = ?",
+                (run_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            checkpoints = self._load_checkpoints(run_id)
+        return {
+            "id": row[0],
+            "key": row[1],
+            "status": row[2],
+            "error": row[3],
+            "attempts": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "checkpoints": checkpoints
+        }
+
+    def _load_checkpoints(self, run_id: str) -> dict:
+        return {
+            stage: json.loads(value) for stage, value in self.conn.execute(
+                "SELECT stage, value FROM pipeline_checkpoints WHERE run_id = ?", (run_id,)
+            )
+        }
+
+    def _save_checkpoint(self, run_id: str, stage: str, value):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO pipeline_checkpoints (run_id, stage, value, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(run_id, stage) DO UPDATE SET value = excluded.value, created_at = excluded.created_at",
+                (run_id, stage, json.dumps(value), now)
+            )
+            self.conn.execute("UPDATE pipeline_runs SET updated_at = ? WHERE id = ?", (now, run_id))
+
+    def _set_status(self, run_id: str, status: str, error: Optional[str] = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE pipeline_runs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), run_id)
+            )
@@ -0,0 +1,165 @@
+import random
+import sqlite3
+import threading
+import time
+from typing import Optional
+from services.storage import open_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS problems (
+    title_slug TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    difficulty TEXT NOT NULL COLLATE NOCASE,
+    ac_rate REAL NOT NULL,
+    paid_only INTEGER NOT NULL DEFAULT 0,
+    content TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_problems_difficulty_ac_rate ON problems (difficulty, ac_rate);
+CREATE INDEX IF NOT EXISTS idx_problems_ac_rate ON problems (ac_rate);
+
+CREATE TABLE IF NOT EXISTS problem_tags (
+    tag_slug TEXT NOT NULL,
+    title_slug TEXT NOT NULL,
+    tag_name TEXT NOT NULL,
+    PRIMARY KEY (tag_slug, title_slug)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_problem_tags_title_slug ON problem_tags (title_slug);
+
+CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ProblemCatalog:
+    """Local, indexed copy of the LeetCode problem list.
+
+    Problem metadata is filled in bulk by `LeetCodeService.sync_catalog`; the
+    heavy `content` field is only stored once a problem has been selected.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self.conn = conn or open_database('leetcode_catalog.db')
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+
+    def upsert_many(self, problems):
+        """Insert or refresh problem metadata, keeping any stored content"""
+        with self._lock, self.conn:
+            for problem in problems:
+                slug = problem["titleSlug"]
+                self.conn.execute(
+                    """
+                    INSERT INTO problems (title_slug, title, difficulty, ac_rate, paid_only)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(title_slug) DO UPDATE SET
+                        title = excluded.title,
+                        difficulty = excluded.difficulty,
+                        ac_rate = excluded.ac_rate,
+                        paid_only = excluded.paid_only
+                    """,
+                    (slug, problem["title"], problem["difficulty"],
+                     problem.get("acRate") or 0, int(bool(problem.get("paidOnly"))))
+                )
+                self.conn.execute("DELETE FROM problem_tags WHERE title_slug = ?", (slug,))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO problem_tags (tag_slug, title_slug, tag_name) VALUES (?, ?, ?)",
+                    [(tag["slug"], slug, tag["name"]) for tag in problem.get("topicTags") or []]
+                )
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+
+    def find_slugs(self, difficulty=None, topics=None, min_acceptance=None, max_acceptance=None):
+        """Return the slugs of free problems matching every given filter.
+
+        Topics follow LeetCode's filter semantics: a problem must carry all of them.
+        """
+        query = "SELECT p.title_slug FROM problems p"
+        clauses = ["p.paid_only = 0"]
+        params = []
+
+        if topics:
+            topics = list(dict.fromkeys(topics))
+            placeholders = ", ".join("?" for _ in topics)
+            query += (
+                " JOIN (SELECT title_slug FROM problem_tags"
+                f" WHERE tag_slug IN ({placeholders})"
+                " GROUP BY title_slug HAVING COUNT(*) = ?) t ON t.title_slug = p.title_slug"
+            )
+            params.extend(topics)
+            params.append(len(topics))
+        if difficulty:
+            clauses.append("p.difficulty = ?")
+            params.append(difficulty)
+        if min_acceptance is not None:
+            clauses.append("p.ac_rate >= ?")
+            params.append(min_acceptance)
+        if max_acceptance is not None:
+            clauses.append("p.ac_rate <= ?")
+            params.append(max_acceptance)
+
+        query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            return [row[0] for row in self.conn.execute(query, params)]
+
+    def select_random(self, difficulty=None, topics=None, min_acceptance=None, max_acceptance=None,
+                      exclude=None):
+        """Pick a random matching slug not in `exclude`, or None when nothing matches"""
+        slugs = self.find_slugs(difficulty, topics, min_acceptance, max_acceptance)
+        if exclude:
+            slugs = [slug for slug in slugs if slug not in exclude]
+        return random.choice(slugs) if slugs else None
+
+    def get(self, title_slug: str) -> Optional[dict]:
+        """Return a problem in the shape of the LeetCode API, or None if unknown"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT title_slug, title, difficulty, ac_rate, content FROM problems WHERE title_slug = ?",
+                (title_slug,)
+            ).fetchone()
+            if row is None:
+                return None
+            tags = self.conn.execute(
+                "SELECT tag_name, tag_slug FROM problem_tags WHERE title_slug = ? ORDER BY tag_name",
+                (title_slug,)
+            ).fetchall()
+        return {
+            "title": row["title"],
+            "titleSlug": row["title_slug"],
+            "content": row["content"],
+            "difficulty": row["difficulty"],
+            "acRate": row["ac_rate"],
+            "topicTags": [{"name": tag["tag_name"], "slug": tag["tag_slug"]} for tag in tags]
+        }
+
+    def set_content(self, title_slug: str, content: str):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE problems SET content = ? WHERE title_slug = ?", (content, title_slug))
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM catalog_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO catalog_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def mark_synced(self, full: bool):
+        now = str(time.time())
+        self._set_meta("last_sync", now)
+        if full:
+            self._set_meta("last_full_sync", now)
+
+    def seconds_since_sync(self, full: bool = False) -> Optional[float]:
+        """Age of the last (full) sync in seconds, or None if it never ran"""
+        value = self._get_meta("last_full_sync" if full else "last_sync")
+        return time.time() - float(value) if value else None
@@ -0,0 +1,163 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# Elements whose start and end break the text into lines
+_BLOCK_TAGS = {
+    'p', 'div', 'pre', 'ul', 'ol', 'li', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'blockquote', 'table', 'tr', 'hr'
+}
+# Elements dropped with their content
+_SKIPPED_TAGS = {'img', 'svg', 'script', 'style', 'video', 'iframe'}
+
+_TOKEN_RE = re.compile(r'[A-Za-z]+|\d{1,3}|\S')
+_SPACES_RE = re.compile('[ \t\r\f\v\xa0\u200b]+')
+_EXAMPLE_RE = re.compile(r'^Example\s*\d*\s*:', re.IGNORECASE)
+_CONSTRAINTS_RE = re.compile(r'^Constraints\s*:', re.IGNORECASE)
+_FOLLOW_UP_RE = re.compile(r'^Follow[\s-]*up\b', re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough BPE token count: a token per number group, punctuation mark or up to 6 letters"""
+    return sum((len(token) + 5) // 6 if token[0].isalpha() else 1 for token in _TOKEN_RE.findall(text))
+
+
+class _TextExtractor(HTMLParser):
+    """Plain text of LeetCode problem HTML, one line per block"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._pre = 0
+        self._skipped = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            if tag != 'img':
+                self._skipped += 1
+        elif tag == 'pre':
+            self._pre += 1
+            self.parts.append('\n')
+        elif tag == 'li':
+            self.parts.append('\n- ')
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+        elif tag == 'sup':
+            # 10<sup>4</sup> -> 10^4
+            self.parts.append('^')
+        elif tag == 'sub':
+            self.parts.append('_')
+        elif tag in ('td', 'th'):
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            if tag != 'img':
+                self._skipped = max(0, self._skipped - 1)
+        elif tag == 'pre':
+            self._pre = max(0, self._pre - 1)
+            self.parts.append('\n')
+        elif tag in _BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_data(self, data):
+        if self._skipped:
+            return
+        self.parts.append(data if self._pre else data.replace('\n', ' '))
+
+
+def problem_text(content: str) -> str:
+    """LeetCode problem HTML as compact plain text.
+
+    Tags, images and entities are removed, whitespace is collapsed and
+    blank lines are dropped; list items become "- " lines and superscripts
+    "^" (10<sup>4</sup> becomes 10^4).
+    """
+    extractor = _TextExtractor()
+    extractor.feed(content or '')
+    extractor.close()
+    lines = (_SPACES_RE.sub(' ', line).strip() for line in ''.join(extractor.parts).split('\n'))
+    return '\n'.join(line for line in lines if line and line != '-')
+
+
+def _truncate(text: str, budget: int) -> str:
+    """The words of `text` that fit in `budget` tokens"""
+    kept = []
+    used = 0
+    for word in text.split(' '):
+        cost = estimate_tokens(word)
+        if used + cost > budget:
+            return ' '.join(kept).rstrip() + ' ...'
+        kept.append(word)
+        used += cost
+    return text
+
+
+def compact_problem(content: str, token_budget: Optional[int] = None) -> str:
+    """Problem text for a prompt, within `token_budget` estimated tokens.
+
+    The description is always kept (cut off if it alone is over budget);
+    then, while they fit, the first example, the constraints, the other
+    examples and the follow-up. Repeated examples are dropped. No budget
+    (None or 0) keeps everything.
+    """
+    description: List[str] = []
+    examples: List[List[str]] = []
+    constraints: List[str] = []
+    follow_up: List[str] = []
+    section = description
+    for line in problem_text(content).split('\n'):
+        if _EXAMPLE_RE.match(line):
+            examples.append([line])
+            section = examples[-1]
+        elif _CONSTRAINTS_RE.match(line):
+            section = constraints
+        elif _FOLLOW_UP_RE.match(line):
+            section = follow_up
+            section.append(line)
+        elif line:
+            section.append(line)
+
+    unique_examples = []
+    seen = set()
+    for example in examples:
+        body = '\n'.join(example[1:])
+        if body not in seen:
+            seen.add(body)
+            unique_examples.append('\n'.join(example))
+
+    text = '\n'.join(description)
+    if token_budget:
+        used = estimate_tokens(text)
+        if used > token_budget:
+            return _truncate(text, token_budget)
+
+        def fits(piece):
+            nonlocal used
+            cost = estimate_tokens(piece)
+            if used + cost > token_budget:
+                return False
+            used += cost
+            return True
+
+        kept_examples = unique_examples[:1] if unique_examples and fits(unique_examples[0]) else []
+        kept_constraints = []
+        for line in constraints:
+            if not fits(line):
+                break
+            kept_constraints.append(line)
+        if len(kept_constraints) == len(constraints) and kept_examples:
+            for example in unique_examples[1:]:
+                if not fits(example):
+                    break
+                kept_examples.append(example)
+        complete = len(kept_examples) == len(unique_examples) and len(kept_constraints) == len(constraints)
+        follow_up = follow_up if complete and fits('\n'.join(follow_up)) else []
+        unique_examples, constraints = kept_examples, kept_constraints
+
+    parts = [text] + unique_examples
+    if constraints:
+        parts.append('Constraints:\n' + '\n'.join(constraints))
+    if follow_up:
+        parts.append('\n'.join(follow_up))
+    return '\n\n'.join(part for part in parts if part)
@@ -0,0 +1,99 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+from services.storage import open_database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS published (
+    title_slug TEXT PRIMARY KEY,
+    platform TEXT,
+    post_id TEXT,
+    url TEXT,
+    published_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS published_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Post titles look like "Two Sum - Go Solution"; WordPress may render the dash as an en dash
+POST_TITLE_SUFFIX = re.compile(r'\s+[-–—]\s+\w+ Solution$')
+
+
+def problem_slug_from_post_title(title: str) -> str:
+    """Derive the LeetCode titleSlug from a generated post title.
+
+    Mirrors LeetCode's slugs, e.g. "Pow(x, n) - Go Solution" -> "powx-n".
+    """
+    name = POST_TITLE_SUFFIX.sub('', title.strip()).lower()
+    name = re.sub(r'[^a-z0-9\s-]', '', name)
+    return re.sub(r'[\s-]+', '-', name).strip('-')
+
+
+class PublishedIndex:
+    """Persistent set of problem slugs that already have a published post.
+
+    Membership checks hit an in-memory set loaded from SQLite, so they are
+    O(1); writes go to both.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self.conn = conn or open_database('published.db')
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+            self._slugs = {row[0] for row in self.conn.execute("SELECT title_slug FROM published")}
+
+    def __contains__(self, title_slug) -> bool:
+        return title_slug in self._slugs
+
+    def __len__(self) -> int:
+        return len(self._slugs)
+
+    def add(self, title_slug: str, platform: str = None, post_id=None, url: str = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO published (title_slug, platform, post_id, url, published_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(title_slug) DO UPDATE SET
+                    platform = COALESCE(excluded.platform, platform),
+                    post_id = COALESCE(excluded.post_id, post_id),
+                    url = COALESCE(excluded.url, url)
+                """,
+                (title_slug, platform, None if post_id is None else str(post_id), url, time.time())
+            )
+            self._slugs.add(title_slug)
+
+    def record_publish(self, title_slug: str, platform: str, result):
+        """Add a slug from a WordPress or Ghost publish response"""
+        post = result or {}
+        if isinstance(post.get("posts"), list) and post["posts"]:
+            post = post["posts"][0]  # Ghost wraps the created post
+        self.add(title_slug, platform, post.get("id"), post.get("url") or post.get("link"))
+
+    @property
+    def seeded(self) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM published_meta WHERE key = 'seeded_at'").fetchone()
+        return row is not None
+
+    async def seed_from(self, blog_service) -> int:
+        """Add the slugs of every post already on the blog platform"""
+        titles = await blog_service.list_post_titles()
+        before = len(self._slugs)
+        for title in titles:
+            slug = problem_slug_from_post_title(title)
+            if slug and slug not in self._slugs:
+                self.add(slug)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO published_meta (key, value) VALUES ('seeded_at', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (str(time.time()),)
+            )
+        return len(self._slugs) - before
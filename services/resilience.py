@@ -0,0 +1,282 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from services.metrics import UPSTREAM_RETRIES
+from config.config import Config
+
+T = TypeVar("T")
+
+# Statuses that mean "try again later"
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Statuses after which a non-idempotent request (e.g. publishing a post) was certainly not processed
+UNPROCESSED_STATUSES = frozenset({429, 503})
+
+# aiohttp, imported by `_aiohttp` on first use so importing this module stays cheap
+_aiohttp_module = None
+
+
+def _aiohttp():
+    global _aiohttp_module
+    if _aiohttp_module is None:
+        import aiohttp
+        _aiohttp_module = aiohttp
+    return _aiohttp_module
+
+
+class RetryableError(Exception):
+    """An upstream response that is worth retrying, e.g. a 429 or 503"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+        super().__init__(f"Status {status}: {message}")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that keeps failing"""
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delay-seconds or HTTP date)"""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retryable_response(response, message: str) -> RetryableError:
+    """A `RetryableError` for a response, honouring its Retry-After header"""
+    return RetryableError(response.status, message, parse_retry_after(response.headers.get("Retry-After")))
+
+
+class TokenBucket:
+    """Adaptive token bucket limiting the request rate to one upstream.
+
+    Allows bursts of `capacity` requests and `rate` requests per second on
+    average. A 429 halves the rate (down to a tenth of the configured one)
+    and pauses the bucket for the Retry-After delay; successes bring the
+    rate back up step by step. A rate of 0 disables limiting.
+
+    Tokens are reserved up front (the count may go negative) and the caller
+    sleeps until its token is due, so the bucket works from any thread or
+    event loop and serves callers in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it"""
+        if not self.max_rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """Slow down after a 429"""
+        if not self.max_rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.rate / 2, self.max_rate / 10)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def recover(self):
+        """Speed back up after a success"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class CircuitBreaker:
+    """Stops calling an upstream after `failure_threshold` failures in a row.
+
+    While open, calls fail immediately with `CircuitOpenError`. After
+    `reset_timeout` seconds a single trial call is let through; it closes
+    the circuit on success and reopens it on failure. The state is shared by
+    every thread calling the upstream, so changes happen under a lock.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def abort_trial(self):
+        """The trial call was cancelled before it got a result"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class RetryPolicy:
+    """Jittered exponential backoff: attempt n waits up to `base_delay * 2**n` seconds"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retrying after `attempt` (0-based), or None to give up"""
+        if attempt >= self.max_attempts - 1:
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is None:
+            return backoff
+        if retry_after > self.max_delay:
+            # Waiting that long inside a request is worse than failing it
+            return None
+        return max(retry_after, backoff)
+
+
+class Upstream:
+    """Rate limit, circuit breaker and retries shared by every call to one upstream"""
+
+    def __init__(self, name: str, bucket: TokenBucket, breaker: CircuitBreaker,
+                 policy: Optional[RetryPolicy] = None):
+        self.name = name
+        self.bucket = bucket
+        self.breaker = breaker
+        self.policy = policy or RetryPolicy()
+
+    def _should_retry(self, error: Exception, idempotent: bool) -> bool:
+        if isinstance(error, RetryableError):
+            return idempotent or error.status in UNPROCESSED_STATUSES
+        # A request that could not connect was never sent
+        return idempotent or isinstance(error, _aiohttp().ClientConnectorError)
+
+    async def call(self, request: Callable[[], Awaitable[T]], policy: Optional[RetryPolicy] = None,
+                   idempotent: bool = True) -> T:
+        """Run `request` (one attempt) with rate limiting and retries.
+
+        `request` raises `RetryableError` for responses worth retrying; network
+        errors and timeouts are retried too. Requests that are not
+        `idempotent` are only retried when the upstream certainly did not
+        process them. The last error is re-raised once retries run out.
+        """
+        retried = (RetryableError, _aiohttp().ClientError, asyncio.TimeoutError)
+        policy = policy or self.policy
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} is failing; not calling it for up to {self.breaker.reset_timeout:.0f}s")
+            await self.bucket.acquire()
+            try:
+                result = await request()
+            except retried as e:
+                retry_after = e.retry_after if isinstance(e, RetryableError) else None
+                if isinstance(e, RetryableError) and e.status == 429:
+                    # Rate limited, not broken
+                    self.bucket.throttle(retry_after)
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+                delay = policy.delay(attempt, retry_after) if self._should_retry(e, idempotent) else None
+                if delay is None:
+                    raise
+                print(f"{self.name} request failed (attempt {attempt + 1}/{policy.max_attempts}): {str(e)[:200]}; "
+                      f"retrying in {delay:.2f}s")
+                UPSTREAM_RETRIES.inc(upstream=self.name)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except asyncio.CancelledError:
+                self.breaker.abort_trial()
+                raise
+            except Exception:
+                # The upstream answered; the request itself was rejected
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            self.bucket.recover()
+            return result
+
+
+_upstreams: Dict[str, Upstream] = {}
+
+
+def get_upstream(name: str) -> Upstream:
+    """The shared `Upstream` of a service, configured from UPSTREAM_RATE_LIMITS and CIRCUIT_*"""
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        config = Config()
+        upstream = _upstreams[name] = Upstream(
+            name,
+            TokenBucket(config.upstream_rate_limits.get(name, 0)),
+            CircuitBreaker(config.circuit_failure_threshold, config.circuit_reset_timeout)
+        )
+    return upstream
+
+
+def reset_upstreams():
+    """Forget all rate limit and circuit state"""
+    _upstreams.clear()
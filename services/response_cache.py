@@ -0,0 +1,101 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional
+from services.storage import open_database
+from config.config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+"""
+
+
+class ResponseCache:
+    """Disk-backed cache of LLM completions, keyed by a hash of the request.
+
+    Entries expire after `ttl` seconds; once the stored text exceeds
+    `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None,
+                 ttl: Optional[float] = None, max_bytes: Optional[int] = None):
+        config = Config()
+        self.conn = conn or open_database('deepseek_cache.db')
+        self.ttl = config.deepseek_cache_ttl if ttl is None else ttl
+        self.max_bytes = config.deepseek_cache_max_bytes if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """Hash the parts of a chat-completions payload that determine the output"""
+        material = {
+            "model": payload.get("model"),
+            "temperature": payload.get("temperature"),
+            "max_tokens": payload.get("max_tokens"),
+            "messages": payload.get("messages")
+        }
+        encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO responses (key, value, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    size = excluded.size,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                (key, value, size, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
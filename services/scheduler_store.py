@@ -0,0 +1,198 @@
+import pickle
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+from services.storage import open_shared_database
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apscheduler_jobs (
+    id TEXT PRIMARY KEY,
+    next_run_time REAL,
+    job_state BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_apscheduler_jobs_next_run_time ON apscheduler_jobs (next_run_time);
+"""
+
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_runs (
+    job_id TEXT NOT NULL,
+    slot REAL NOT NULL,
+    status TEXT NOT NULL,
+    generation_job_id TEXT,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (job_id, slot)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteJobStore(BaseJobStore):
+    """APScheduler job store in a local SQLite file.
+
+    Works like APScheduler's SQLAlchemyJobStore without the SQLAlchemy
+    dependency. Job definitions and their next run times survive restarts,
+    which is what lets the scheduler tell which cron slots it missed.
+    """
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.conn = conn or open_shared_database('scheduler.db')
+        self.pickle_protocol = pickle_protocol
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(JOBS_SCHEMA)
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            row = self.conn.execute("SELECT job_state FROM apscheduler_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("WHERE next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL "
+                "ORDER BY next_run_time LIMIT 1"
+            ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def stored_next_run_times(self) -> Dict[str, Optional[float]]:
+        """Next run time (UTC timestamp) of every stored job, without unpickling them"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT id, next_run_time FROM apscheduler_jobs"))
+
+    def add_job(self, job):
+        with self._lock:
+            try:
+                with self.conn:
+                    self.conn.execute(
+                        "INSERT INTO apscheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                        (job.id, datetime_to_utc_timestamp(job.next_run_time),
+                         pickle.dumps(job.__getstate__(), self.pickle_protocol))
+                    )
+            except sqlite3.IntegrityError:
+                raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        with self._lock, self.conn:
+            updated = self.conn.execute(
+                "UPDATE apscheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?",
+                (datetime_to_utc_timestamp(job.next_run_time),
+                 pickle.dumps(job.__getstate__(), self.pickle_protocol), job.id)
+            ).rowcount
+        if not updated:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        with self._lock, self.conn:
+            removed = self.conn.execute("DELETE FROM apscheduler_jobs WHERE id = ?", (job_id,)).rowcount
+        if not removed:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM apscheduler_jobs")
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: Tuple = ()) -> List[Job]:
+        jobs = []
+        failed_job_ids = []
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, job_state FROM apscheduler_jobs {where} ORDER BY next_run_time", params
+            ).fetchall()
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append((job_id,))
+        # Remove the jobs we failed to restore
+        if failed_job_ids:
+            with self._lock, self.conn:
+                self.conn.executemany("DELETE FROM apscheduler_jobs WHERE id = ?", failed_job_ids)
+        return jobs
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class RunLedger:
+    """Record of every cron slot the scheduler fired, caught up or skipped"""
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        self.conn = conn or open_shared_database('scheduler.db')
+        self._lock = threading.Lock()
+        with self._lock:
+            self.conn.executescript(LEDGER_SCHEMA)
+
+    def record(self, job_id: str, slot: datetime, status: str, generation_job_id: Optional[str] = None) -> bool:
+        """Record a slot once; returns False if it was already recorded"""
+        with self._lock, self.conn:
+            return self.conn.execute(
+                "INSERT OR IGNORE INTO scheduled_runs (job_id, slot, status, generation_job_id, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, datetime_to_utc_timestamp(slot), status, generation_job_id, time.time())
+            ).rowcount == 1
+
+    def has(self, job_id: str, slot: datetime) -> bool:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM scheduled_runs WHERE job_id = ? AND slot = ?",
+                (job_id, datetime_to_utc_timestamp(slot))
+            ).fetchone() is not None
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT job_id, slot, status, generation_job_id FROM scheduled_runs ORDER BY slot DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"job_id": row[0], "slot": utc_timestamp_to_datetime(row[1]).isoformat(),
+             "status": row[2], "generation_job_id": row[3]}
+            for row in rows
+        ]
+
+
+def find_missed_slots(triggers: Dict[str, object], stored_next_run_times: Dict[str, Optional[float]],
+                      ledger: RunLedger, now: datetime, grace_time: float) -> List[Tuple[str, datetime]]:
+    """Cron slots that passed while no scheduler was running, oldest first.
+
+    A job's stored next run time is the first slot it had not fired yet, so
+    every slot from there up to `now` was missed, unless the ledger shows it
+    ran anyway (e.g. the process died before the job store was updated).
+    Slots older than `grace_time` seconds are left out.
+    """
+    missed = []
+    oldest = now - timedelta(seconds=grace_time)
+    for job_id, trigger in triggers.items():
+        stored = stored_next_run_times.get(job_id)
+        if stored is None:
+            continue
+        slot = utc_timestamp_to_datetime(stored)
+        while slot is not None and slot <= now:
+            if slot >= oldest and not ledger.has(job_id, slot):
+                missed.append((job_id, slot))
+            slot = trigger.get_next_fire_time(slot, slot)
+    missed.sort(key=lambda entry: entry[1])
+    return missed
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import threading
+from typing import Callable, Optional
+
+
+class StatusSnapshot:
+    """Service status as the status endpoints report it, refreshed out of band.
+
+    Writers (scheduler events, the leader election heartbeat) call `update`;
+    readers get an immutable state dict and its weak ETag from a single
+    attribute read, so serving a status request takes no lock and never
+    touches the scheduler or its database. Rendered pages are cached per
+    ETag.
+    """
+
+    def __init__(self, **state):
+        self._lock = threading.Lock()
+        self._current = self._snapshot(state)
+        self._pages = {}
+
+    @staticmethod
+    def _snapshot(state: dict):
+        digest = hashlib.sha1(json.dumps(state, sort_keys=True, default=str).encode()).hexdigest()
+        return state, digest[:16]
+
+    @property
+    def state(self) -> dict:
+        return self._current[0]
+
+    @property
+    def etag(self) -> str:
+        return self._current[1]
+
+    def update(self, **fields) -> bool:
+        """Change some fields; returns whether the snapshot changed"""
+        with self._lock:
+            state = {**self._current[0], **fields}
+            if state == self._current[0]:
+                return False
+            self._current = self._snapshot(state)
+            self._pages = {}
+            return True
+
+    def page(self, name: str, render: Callable[[dict], str]) -> str:
+        """`render(state)` for the current snapshot, rendered once per change"""
+        state, etag = self._current
+        cached: Optional[tuple] = self._pages.get(name)
+        if cached is None or cached[0] != etag:
+            cached = (etag, render(state))
+            self._pages[name] = cached
+        return cached[1]
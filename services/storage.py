@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from typing import Optional
+from config.config import Config
+
+# DATA_DIR value that keeps local stores in memory
+IN_MEMORY = ':memory:'
+
+_connections = {}
+_lock = threading.Lock()
+
+
+def database_path(name: str, shared: bool = False) -> Optional[str]:
+    """Path of a local database in DATA_DIR, or None to keep it in memory.
+
+    Databases `shared` between the processes of the host always need a file;
+    with DATA_DIR=:memory: they go to the system temp directory.
+    """
+    data_dir = Config().data_dir
+    if data_dir == IN_MEMORY:
+        if not shared:
+            return None
+        data_dir = os.path.join(tempfile.gettempdir(), 'telegraf')
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, name)
+
+
+def open_database(name: str) -> sqlite3.Connection:
+    """Open (or reuse) a SQLite database for a local store.
+
+    Databases live in DATA_DIR (`data` by default). With DATA_DIR=:memory:
+    the store is kept in memory for the lifetime of the process. Connections are shared per
+    database so every service in the process sees the same data; callers
+    serialize access with their own lock.
+    """
+    path = database_path(name)
+    key = path or f":memory:{name}"
+
+    with _lock:
+        conn = _connections.get(key)
+        if conn is None:
+            if path:
+                conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+                conn.execute("PRAGMA journal_mode=WAL")
+            else:
+                conn = sqlite3.connect(":memory:", check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            _connections[key] = conn
+        return conn
+
+
+def open_shared_database(name: str) -> sqlite3.Connection:
+    """Open a new connection to a database shared by the processes of the host.
+
+    Unlike `open_database` the connection is not cached or closed by
+    `close_all`, and waits only briefly for locks held by other processes.
+    """
+    conn = sqlite3.connect(database_path(name, shared=True), check_same_thread=False, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def close_all():
+    """Close every shared connection (used on shutdown and between tests)"""
+    with _lock:
+        for conn in _connections.values():
+            conn.close()
+        _connections.clear()
@@ -1,9 +1,21 @@
-import aiohttp
+import asyncio
 import base64
+import html
+from typing import Iterable, List, Optional, Tuple
 from services.blog_service import BlogService
+from services.http_session import get_session
+from services.metrics import upstream
+from services.resilience import RETRY_STATUSES, RetryableError, get_upstream, retryable_response
 from config.config import Config
 
+class BatchUnsupportedError(Exception):
+    """The site has no REST batch endpoint (WordPress before 5.6, or it is disabled)"""
+
+
 class WordPressService(BlogService):
+    # Most requests WordPress accepts in one batch
+    BATCH_SIZE = 25
+
     def __init__(self):
         config = Config()
         self.base_url = config.wp_url.rstrip('/')
@@ -14,24 +26,159 @@ class WordPressService(BlogService):
             "Authorization": f"Basic {self.auth}",
             "Content-Type": "application/json"
         }
+        self.batch_supported = True
 
     async def execute(self, title, content, status="draft"):
         post_data = {
             "title": title,
             "content": content,
-            "status": status
+            "status": status,
+            "slug": self.slugify(title)
         }
 
-        async with aiohttp.ClientSession() as session:
+        async def attempt():
+            session = await get_session()
             async with session.post(
                 f"{self.base_url}/wp-json/wp/v2/posts",
                 json=post_data,
-                headers=self.headers
+                headers=self.headers,
+                trace_request_ctx=upstream("wordpress")
             ) as response:
                 if response.status in (200, 201):
                     data = await response.json()
                     return data
-                else:
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, await response.text())
+                error_data = await response.json()
+                error_message = error_data.get('message', 'Unknown error')
+                raise Exception(f"Failed to publish to WordPress: {error_message} (Status: {response.status})")
+
+        # Creating a post is not idempotent; it is only retried when WordPress certainly did not create it
+        try:
+            return await get_upstream("wordpress").call(attempt, idempotent=False)
+        except RetryableError as e:
+            raise Exception(f"Failed to publish to WordPress: {e.message[:200]} (Status: {e.status})")
+
+    def post_url(self, slug):
+        # Resolves to the post under any permalink structure
+        return f"{self.base_url}/?name={slug}"
+
+    async def publish_many(self, posts: Iterable[Tuple[str, str]], status: Optional[str] = None,
+                           concurrency: Optional[int] = None) -> List[dict]:
+        """Publish several posts through the REST batch endpoint, 25 per request.
+
+        Batches are sent concurrently (see `BlogService.publish_many`), and each
+        post succeeds or fails on its own. Sites without the batch endpoint
+        fall back to concurrent single-post requests.
+        """
+        posts = list(posts)
+        if self.batch_supported and posts:
+            chunks = [posts[i:i + self.BATCH_SIZE] for i in range(0, len(posts), self.BATCH_SIZE)]
+            limit = asyncio.Semaphore(concurrency or Config().batch_publish_concurrency)
+
+            async def publish_chunk(chunk):
+                async with limit:
+                    return await self._publish_batch(chunk, status or "draft")
+
+            try:
+                # The first batch tells whether the endpoint exists before the others are sent
+                results = await publish_chunk(chunks[0])
+            except BatchUnsupportedError:
+                print("WordPress batch endpoint unavailable; publishing posts one by one")
+                self.batch_supported = False
+            else:
+                for chunk_results in await asyncio.gather(*(publish_chunk(chunk) for chunk in chunks[1:])):
+                    results.extend(chunk_results)
+                return results
+        return await super().publish_many(posts, status, concurrency)
+
+    async def _publish_batch(self, posts: List[Tuple[str, str]], status: str) -> List[dict]:
+        batch = {
+            "validation": "normal",
+            "requests": [
+                {
+                    "method": "POST",
+                    "path": "/wp/v2/posts",
+                    "body": {"title": title, "content": content, "status": status, "slug": self.slugify(title)}
+                }
+                for title, content in posts
+            ]
+        }
+
+        async def attempt():
+            session = await get_session()
+            async with session.post(
+                f"{self.base_url}/wp-json/batch/v1",
+                json=batch,
+                headers=self.headers,
+                trace_request_ctx=upstream("wordpress")
+            ) as response:
+                if response.status == 404:
+                    raise BatchUnsupportedError()
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, await response.text())
+                if response.status not in (200, 207):
                     error_data = await response.json()
                     error_message = error_data.get('message', 'Unknown error')
-                    raise Exception(f"Failed to publish to WordPress: {error_message} (Status: {response.status})") 
\ No newline at end of file
+                    raise Exception(f"Failed to publish to WordPress: {error_message} (Status: {response.status})")
+                return await response.json()
+
+        try:
+            # Like single posts, a batch is only retried when WordPress certainly did not process it
+            data = await get_upstream("wordpress").call(attempt, idempotent=False)
+        except BatchUnsupportedError:
+            raise
+        except RetryableError as e:
+            error = f"Failed to publish to WordPress: {e.message[:200]} (Status: {e.status})"
+            return [{"status": "error", "error": error} for _ in posts]
+        except Exception as e:
+            return [{"status": "error", "error": str(e)} for _ in posts]
+
+        results = []
+        responses = data.get("responses", [])
+        for i in range(len(posts)):
+            item = responses[i] if i < len(responses) else {}
+            body = item.get("body") or {}
+            if item.get("status") in (200, 201):
+                results.append({"status": "success", "result": body})
+            else:
+                error_message = body.get('message', 'No response for this post') if isinstance(body, dict) else body
+                results.append({
+                    "status": "error",
+                    "error": f"Failed to publish to WordPress: {error_message} (Status: {item.get('status')})"
+                })
+        return results
+
+    async def list_post_titles(self):
+        """Return the titles of all posts via the REST API, following pagination"""
+        async def fetch_page(page):
+            session = await get_session()
+            async with session.get(
+                f"{self.base_url}/wp-json/wp/v2/posts",
+                params={
+                    "per_page": "100",
+                    "page": str(page),
+                    "status": "publish,future,draft",
+                    "_fields": "title"
+                },
+                headers=self.headers,
+                trace_request_ctx=upstream("wordpress")
+            ) as response:
+                if response.status in RETRY_STATUSES:
+                    raise retryable_response(response, await response.text())
+                if response.status != 200:
+                    error_data = await response.json()
+                    error_message = error_data.get('message', 'Unknown error')
+                    raise Exception(f"Failed to list WordPress posts: {error_message} (Status: {response.status})")
+                return int(response.headers.get("X-WP-TotalPages", page)), await response.json()
+
+        titles = []
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            try:
+                total_pages, data = await get_upstream("wordpress").call(lambda: fetch_page(page))
+            except RetryableError as e:
+                raise Exception(f"Failed to list WordPress posts: {e.message[:200]} (Status: {e.status})")
+            titles.extend(html.unescape(post["title"]["rendered"]) for post in data)
+            page += 1
+        return titles
\ No newline at end of file
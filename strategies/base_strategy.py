@@ -1,7 +1,45 @@
 from abc import ABC, abstractmethod
+from services.problem_normalizer import compact_problem
+from strategies.prompt_template import Prompt, PromptTemplate, compile_template
 
 class BaseStrategy(ABC):
     @abstractmethod
-    def build_prompt(self, problem_data):
+    def build_prompt(self, problem_data) -> Prompt:
         """Build a prompt based on the problem data"""
-        pass 
\ No newline at end of file
+        pass
+
+class TemplateStrategy(BaseStrategy):
+    """A strategy defined by a prompt template.
+
+    PREFIX holds the instructions, identical for every problem; the
+    `template_values` of the class (e.g. the language) are filled into it
+    once, when the template is compiled. BODY receives the problem fields:
+    title, difficulty, tags and the compacted problem content.
+    """
+    PREFIX = ""
+    BODY = ""
+
+    def __init__(self, problem_token_budget=None):
+        # Most estimated tokens of problem text in a prompt (None: no limit)
+        self.problem_token_budget = problem_token_budget
+
+    @classmethod
+    def template_values(cls) -> dict:
+        return {}
+
+    @classmethod
+    def template(cls) -> PromptTemplate:
+        if '_template' not in cls.__dict__:
+            cls._template = compile_template(cls.PREFIX.format(**cls.template_values()), cls.BODY)
+        return cls._template
+
+    def problem_fields(self, problem_data) -> dict:
+        return {
+            'title': problem_data.get('title', ''),
+            'difficulty': problem_data.get('difficulty', ''),
+            'tags': ', '.join(tag['name'] for tag in problem_data.get('topicTags', [])),
+            'content': compact_problem(problem_data.get('content') or '', self.problem_token_budget)
+        }
+
+    def build_prompt(self, problem_data) -> Prompt:
+        return self.template().render(**self.problem_fields(problem_data))
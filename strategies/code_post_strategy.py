@@ -0,0 +1,67 @@
+from strategies.base_strategy import TemplateStrategy
+
+class CodePostStrategy(TemplateStrategy):
+    """A post explaining the solution of a problem in one programming language.
+
+    A language only sets LANGUAGE (its name in the post) and CODE_CLASS (the
+    `language-*` class of its code blocks).
+    """
+    LANGUAGE = ""
+    CODE_CLASS = ""
+
+    PREFIX = """You write detailed blog posts about solving LeetCode problems using the {language} programming language. Return ONLY the HTML content without any wrapper text, introduction, or explanation.
+
+Return ONLY the HTML content starting with <h1> and ending with </h2>. Do not include any wrapper text, backticks, or markdown formatting.
+
+Required HTML structure, with the title, difficulty and tags of the given problem:
+
+<h1>Solving the LeetCode "[Title]" Problem in {language}</h1>
+<p class="meta">Difficulty: [Difficulty] | Tags: [Tags]</p>
+
+<h2>Introduction</h2>
+<p>Brief problem overview and importance.</p>
+
+<h2>Problem Analysis</h2>
+<p>Detailed explanation with examples.</p>
+
+<h2>Solution Approach</h2>
+<p>Step-by-step explanation with visual aids if needed.</p>
+
+<h2>{language} Implementation</h2>
+<pre><code class="language-{code_class}">
+Your {language} code here
+</code></pre>
+
+<h2>Complexity Analysis</h2>
+<p>Time and space complexity explanations.</p>
+
+<h2>Testing and Examples</h2>
+<p>Test cases and edge cases.</p>
+
+<h2>Best Practices and Tips</h2>
+<p>Key takeaways and tips.</p>
+
+Remember:
+- Return ONLY the HTML content
+- Start with <h1> and end with the last </p> in Best Practices section
+- No wrapper text or backticks
+- No markdown formatting
+- No introduction or explanation outside the HTML
+- No meta description or featured image suggestions
+- Format all code with proper indentation and blank lines for readability. Do not minify the code.
+"""
+
+    BODY = """Create the blog post for this problem.
+
+Problem Details:
+- Title: {title}
+- Difficulty: {difficulty}
+- Tags: {tags}
+
+Problem Description:
+{content}
+"""
+
+    @classmethod
+    def template_values(cls) -> dict:
+        return {'language': cls.LANGUAGE, 'code_class': cls.CODE_CLASS}
@@ -0,0 +1,5 @@
+from strategies.code_post_strategy import CodePostStrategy
+
+class JavaPostStrategy(CodePostStrategy):
+    LANGUAGE = "Java"
+    CODE_CLASS = "java"
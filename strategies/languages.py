@@ -0,0 +1,22 @@
+from typing import Optional
+from strategies.code_post_strategy import CodePostStrategy
+from strategies.go_post_strategy import GoPostStrategy
+from strategies.java_post_strategy import JavaPostStrategy
+from strategies.python_post_strategy import PythonPostStrategy
+from strategies.rust_post_strategy import RustPostStrategy
+
+# Post languages by their POST_LANGUAGES name
+LANGUAGE_STRATEGIES = {
+    'go': GoPostStrategy,
+    'python': PythonPostStrategy,
+    'java': JavaPostStrategy,
+    'rust': RustPostStrategy,
+}
+
+
+def create_strategy(language: str, problem_token_budget: Optional[int] = None) -> CodePostStrategy:
+    """The post strategy of a POST_LANGUAGES name"""
+    strategy = LANGUAGE_STRATEGIES.get(language.strip().lower())
+    if strategy is None:
+        raise ValueError(f"Unsupported post language: {language}")
+    return strategy(problem_token_budget)
@@ -0,0 +1,56 @@
+import functools
+from string import Formatter
+from typing import List, NamedTuple, Optional, Tuple, Union
+
+
+class Prompt(NamedTuple):
+    """A prompt split into a static prefix and the problem-specific body.
+
+    The prefix is the same for every problem of a strategy and is sent as
+    the first (system) message, so DeepSeek's context cache can reuse its
+    tokens across requests; only the body changes.
+    """
+    prefix: str
+    body: str
+
+    def messages(self) -> List[dict]:
+        messages = [{"role": "system", "content": self.prefix}] if self.prefix else []
+        return messages + [{"role": "user", "content": self.body}]
+
+    def to_checkpoint(self) -> dict:
+        return {"prefix": self.prefix, "body": self.body}
+
+    @classmethod
+    def from_checkpoint(cls, value: Union[str, dict]) -> "Prompt":
+        """Load a checkpointed prompt; runs checkpointed before prompts had a prefix stored a string"""
+        if isinstance(value, str):
+            return cls("", value)
+        return cls(value["prefix"], value["body"])
+
+
+class PromptTemplate:
+    """A static prefix and a body with `{field}` placeholders, parsed once.
+
+    Rendering joins the precompiled literal parts with the field values,
+    with no format-string parsing per prompt.
+    """
+
+    def __init__(self, prefix: str, body: str):
+        self.prefix = prefix
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(body)
+        ]
+        self.fields = frozenset(field for _, field in self._parts if field)
+
+    def render(self, **fields) -> Prompt:
+        missing = self.fields - fields.keys()
+        if missing:
+            raise ValueError(f"Missing prompt fields: {', '.join(sorted(missing))}")
+        body = ''.join(literal + (str(fields[field]) if field else '') for literal, field in self._parts)
+        return Prompt(self.prefix, body)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(prefix: str, body: str) -> PromptTemplate:
+    """The `PromptTemplate` of a prefix and body, compiled on first use"""
+    return PromptTemplate(prefix, body)
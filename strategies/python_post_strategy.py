@@ -0,0 +1,5 @@
+from strategies.code_post_strategy import CodePostStrategy
+
+class PythonPostStrategy(CodePostStrategy):
+    LANGUAGE = "Python"
+    CODE_CLASS = "python"
@@ -0,0 +1,5 @@
+from strategies.code_post_strategy import CodePostStrategy
+
+class RustPostStrategy(CodePostStrategy):
+    LANGUAGE = "Rust"
+    CODE_CLASS = "rust"
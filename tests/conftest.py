@@ -1 +1,35 @@
- 
\ No newline at end of file
+import os
+import pytest
+from services import storage
+from services.http_session import http_pool
+from services.metrics import registry
+from services.resilience import reset_upstreams
+
+# A scheduler started by a test must never queue real catch-up runs
+os.environ.setdefault('SCHEDULER_CATCHUP_LIMIT', '0')
+# Tests get fresh in-memory local stores instead of files in data/
+os.environ.setdefault('DATA_DIR', ':memory:')
+# Tests call mocked upstreams; don't rate limit them
+os.environ.setdefault('UPSTREAM_RATE_LIMITS', '')
+
+
+@pytest.fixture(autouse=True)
+async def close_http_sessions():
+    """Close the pooled session bound to each test's event loop"""
+    yield
+    await http_pool.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_local_stores():
+    """Give every test fresh local stores"""
+    yield
+    storage.close_all()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics_and_upstreams():
+    """Start every test with empty metrics and fresh upstream rate limit and circuit state"""
+    registry.reset()
+    reset_upstreams()
+    yield
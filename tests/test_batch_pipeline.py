@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from services.batch_pipeline import BatchPipeline, ClaimedSlugs
+
+
+def tracked_stage(delay, active, peaks, name):
+    """A stage that records how many of its calls run at the same time"""
+    async def stage(value):
+        active[name] = active.get(name, 0) + 1
+        peaks[name] = max(peaks.get(name, 0), active[name])
+        await asyncio.sleep(delay)
+        active[name] -= 1
+        return value
+    return stage
+
+
+@pytest.mark.asyncio
+async def test_pipeline_returns_results_in_input_order():
+    async def double(value):
+        await asyncio.sleep(0.01 * (5 - value))
+        return value * 2
+
+    async def describe(value):
+        return f"item {value}"
+
+    pipeline = BatchPipeline([('double', double, 3), ('describe', describe, 1)])
+    results = await pipeline.run(range(5))
+
+    assert [result['result'] for result in results] == [f"item {value * 2}" for value in range(5)]
+    assert all(result['status'] == 'success' for result in results)
+    assert set(results[0]['timings']) == {'double', 'describe'}
+
+
+@pytest.mark.asyncio
+async def test_pipeline_respects_per_stage_concurrency():
+    active, peaks = {}, {}
+    pipeline = BatchPipeline([
+        ('fetch', tracked_stage(0.01, active, peaks, 'fetch'), 4),
+        ('generate', tracked_stage(0.02, active, peaks, 'generate'), 2),
+        ('publish', tracked_stage(0.01, active, peaks, 'publish'), 1),
+    ])
+    await pipeline.run(range(8))
+
+    assert peaks['fetch'] <= 4
+    assert peaks['generate'] == 2
+    assert peaks['publish'] == 1
+
+
+@pytest.mark.asyncio
+async def test_pipeline_overlaps_stages():
+    active, peaks = {}, {}
+    pipeline = BatchPipeline([
+        ('fetch', tracked_stage(0.05, active, peaks, 'fetch'), 1),
+        ('generate', tracked_stage(0.05, active, peaks, 'generate'), 1),
+        ('publish', tracked_stage(0.05, active, peaks, 'publish'), 1),
+    ])
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await pipeline.run(range(6))
+    elapsed = loop.time() - started
+
+    # Sequential runs would take 6 * 3 * 0.05 = 0.9s; pipelined, about (6 + 2) * 0.05
+    assert elapsed < 0.6
+
+
+@pytest.mark.asyncio
+async def test_pipeline_isolates_failures():
+    async def fetch(value):
+        if value == 1:
+            raise Exception("LeetCode unavailable")
+        return value
+
+    async def publish(value):
+        return {"id": value}
+
+    pipeline = BatchPipeline([('fetch', fetch, 2), ('publish', publish, 1)])
+    results = await pipeline.run(range(3))
+
+    assert results[0] == {"status": "success", "result": {"id": 0}, "timings": results[0]['timings']}
+    assert results[1]['status'] == 'error'
+    assert results[1]['stage'] == 'fetch'
+    assert results[1]['error'] == "LeetCode unavailable"
+    assert 'publish' not in results[1]['timings']
+    assert results[2]['result'] == {"id": 2}
+
+
+def test_pipeline_rejects_invalid_stages():
+    async def stage(value):
+        return value
+
+    with pytest.raises(ValueError):
+        BatchPipeline([])
+    with pytest.raises(ValueError):
+        BatchPipeline([('fetch', stage, 0)])
+
+
+def test_claimed_slugs():
+    claimed = ClaimedSlugs({'two-sum'})
+
+    assert 'two-sum' in claimed
+    assert not claimed.claim('two-sum')
+    assert claimed.claim('3sum')
+    assert '3sum' in claimed
+    assert not claimed.claim('3sum')
+    assert len(claimed) == 2
@@ -1,8 +1,9 @@
+import asyncio
 import pytest
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from services.blog_service import BlogServiceFactory
+from services.blog_service import BlogService, BlogServiceFactory
 from services.wordpress_service import WordPressService
 from services.ghost_service import GhostService
 from config.config import Config
@@ -44,4 +45,45 @@ def test_blog_service_factory_create_wordpress_default(mock_config):
     # Test WordPress as default platform
     mock_config.blog_platform = "wordpress"
     service = BlogServiceFactory.create()
-    assert isinstance(service, WordPressService) 
\ No newline at end of file
+    assert isinstance(service, WordPressService) 
+
+
+class FakeBlogService(BlogService):
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def execute(self, title, content, status="draft"):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if title == "bad":
+            raise Exception("Rejected")
+        return {"title": title, "status": status}
+
+
+@pytest.mark.asyncio
+async def test_publish_many_limits_concurrency_and_isolates_failures():
+    service = FakeBlogService()
+    posts = [("one", "A"), ("bad", "B"), ("three", "C"), ("four", "D")]
+
+    results = await service.publish_many(posts, status="publish", concurrency=2)
+
+    assert service.peak == 2
+    assert results[0] == {"status": "success", "result": {"title": "one", "status": "publish"}}
+    assert results[1] == {"status": "error", "error": "Rejected"}
+    assert [result["status"] for result in results[2:]] == ["success", "success"]
+
+@pytest.mark.parametrize("title,expected", [
+    ("Two Sum - Go Solution", "two-sum-go-solution"),
+    ("Pow(x, n) - Python Solution", "powx-n-python-solution"),
+    ("  3Sum  --  Rust Solution ", "3sum-rust-solution"),
+])
+def test_slugify_matches_platform_slugs(title, expected):
+    assert BlogService.slugify(title) == expected
+
+def test_published_slug():
+    assert BlogService.published_slug({"posts": [{"slug": "two-sum-go-solution-2"}]}) == "two-sum-go-solution-2"
+    assert BlogService.published_slug({"id": 1, "slug": "two-sum-go-solution"}) == "two-sum-go-solution"
+    assert BlogService.published_slug({"id": 1}) is None
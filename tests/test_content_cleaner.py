@@ -0,0 +1,112 @@
+import pytest
+import random
+from unittest.mock import patch
+from services.content_cleaner import StreamingPostProcessor, clean_content
+from services.deepseek_service import DeepSeekService
+
+GO_POST = """<h1>Solving "Two Sum" in Go</h1>
+<p class="meta">Difficulty: Easy</p>
+
+<h2>Go Implementation</h2>
+<pre><code class="language-go">
+func twoSum(nums []int, target int) []int {
+seen := map[int]int{}
+for i, n := range nums {
+if j, ok := seen[target-n]; ok {
+return []int{j, i}
+}
+seen[n] = i
+}
+return nil
+}
+</code></pre>
+<h2>Complexity Analysis</h2>
+<p>O(n) time.</p>
+"""
+
+DOCUMENTS = [
+    GO_POST,
+    "Here's a blog post about Two Sum\n" + GO_POST,
+    "HERE'S THE HTML:\n\n  " + GO_POST + "\n\n",
+    '"' + GO_POST + '"',
+    "'\n\"\n" + GO_POST + "x\"\n   \n",
+    "Here's the implementation\n```html\n" + GO_POST + "```\nThanks!",
+    "Intro\n```go\nfunc main() {}\n```",
+    "<p>a</p>\r\n<p>b</p>\r\n\r\n<p>c</p>",
+    "Here's the code",
+    "",
+    "   \n  \n",
+    '"""',
+    "single line",
+    "<pre><code class=\"language-go\">func f() {\nreturn\n}</code></pre><p>x</p>"
+]
+
+
+@pytest.fixture
+def service():
+    with patch('services.deepseek_service.Config') as mock:
+        mock.return_value.deepseek_api_key = 'test_key'
+        yield DeepSeekService()
+
+
+def batch(service, text):
+    return service._beautify_go_code_in_html(service._clean_content(text))
+
+
+def stream(service, text, chunk_sizes):
+    processor = StreamingPostProcessor(service._clean_content, service._beautify_go_code_in_html)
+    position = 0
+    for size in chunk_sizes:
+        processor.feed(text[position:position + size])
+        position += size
+    processor.feed(text[position:])
+    return processor
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+def test_streaming_matches_batch_processing(service, document):
+    rng = random.Random(42)
+    expected = batch(service, document)
+    for _ in range(25):
+        sizes = [rng.randint(1, 40) for _ in range(len(document) // 5 + 1)]
+        processor = stream(service, document, sizes)
+        assert processor.finish() == expected
+        assert processor.text == document
+
+
+def test_go_blocks_are_beautified_before_the_stream_ends(service):
+    processor = stream(service, GO_POST + "<p>more to come", [len(GO_POST)])
+    # Everything up to the last line has already been cleaned and beautified
+    assert any("    seen := map[int]int{}" in segment for segment in processor._segments)
+
+
+def test_line_by_line_cleaning_is_timed_separately_from_beautifying(service, mocker):
+    ticks = iter(range(1000))
+    mocker.patch('services.content_cleaner.time.perf_counter', side_effect=lambda: next(ticks))
+    processor = stream(service, GO_POST + "<p>done</p>", [10, 40, 200])
+    processor.finish()
+    # The line-by-line cleaning of unfenced output counts, not only the fenced fallback
+    assert not processor._fenced
+    assert processor.clean_seconds > 0
+    assert processor.beautify_seconds > 0
+
+
+def test_fence_split_across_chunks_falls_back_to_batch(service):
+    document = "Intro\n``" + "`html\n<p>x</p>\n```"
+    processor = stream(service, document, [len("Intro\n``")])
+    assert processor._fenced
+    assert processor.finish() == batch(service, document)
+
+
+@pytest.mark.parametrize("content,expected", [
+    ("", ""),
+    ("Here's a blog post\nTest content", "Test content"),
+    ("HERE'S THE HTML\n  <h1>Title</h1>  \n\n <p>Body</p>", "<h1>Title</h1>\n<p>Body</p>"),
+    ("Here's a WordPress-formatted HTML blog post about X:\n<p>x</p>", "X:\n<p>x</p>"),
+    ("Intro\n```go\nfunc main() {}\n```\nOutro", "func main() {}"),
+    ("```html\n```\n\"<h1>Kept</h1>\n<p>x</p>\"\n```", "<h1>Kept</h1>"),
+    ("\"  <p>quoted</p>  \"", "<p>quoted</p>"),
+    ("<p>a</p>\r\n\r\n<p>b</p>\u2028<p>c</p>", "<p>a</p>\n<p>b</p>\n<p>c</p>")
+])
+def test_clean_content(content, expected):
+    assert clean_content(content) == expected
@@ -1,7 +1,10 @@
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 import aiohttp
+import asyncio
+import json
 from services.deepseek_service import DeepSeekService, DeepSeekAPIError
+from services.metrics import STAGE_SECONDS, UPSTREAM_RETRIES
 
 @pytest.fixture
 def mock_config():
@@ -75,6 +78,7 @@ async def test_rate_limit_retry(service):
         mock_context = AsyncMock()
         mock_context.status = 429
         mock_context.text = AsyncMock(return_value="Rate limit exceeded")
+        mock_context.headers = {}
         mock_post.return_value.__aenter__.return_value = mock_context
         
         with pytest.raises(DeepSeekAPIError) as exc_info:
@@ -83,6 +87,21 @@ async def test_rate_limit_retry(service):
         assert exc_info.value.status == 429
         assert "Rate limit persisted" in str(exc_info.value)
         assert mock_post.call_count == 2
+        assert UPSTREAM_RETRIES.get(upstream="deepseek") == 1
+
+@pytest.mark.asyncio
+async def test_rate_limit_honours_retry_after(service):
+    """A 429 with Retry-After waits that long before retrying"""
+    limited = AsyncMock(status=429, headers={"Retry-After": "1"}, text=AsyncMock(return_value="Slow down"))
+    ok = AsyncMock(status=200, json=AsyncMock(return_value={"choices": [{"message": {"content": "Test content"}}]}))
+    with patch('aiohttp.ClientSession.post') as mock_post, \
+            patch('services.resilience.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+        mock_post.return_value.__aenter__.side_effect = [limited, ok]
+
+        result = await service.execute("Test prompt")
+
+        assert result == "Test content"
+        assert mock_sleep.await_args.args[0] >= 1
 
 @pytest.mark.asyncio
 async def test_network_error_retry(service):
@@ -155,4 +174,152 @@ async def test_other_api_error(service):
 ])
 def test_content_cleaning(service, input_content, expected_output):
     """Test content cleaning with various input formats"""
-    assert service._clean_content(input_content) == expected_output
\ No newline at end of file
+    assert service._clean_content(input_content) == expected_output
+
+@pytest.fixture
+def cached_service(mock_config):
+    from services.response_cache import ResponseCache
+    return DeepSeekService(max_retries=2, retry_delay=0.1, cache=ResponseCache(ttl=60, max_bytes=10000))
+
+def mock_completion(mock_post, content):
+    mock_context = AsyncMock()
+    mock_context.status = 200
+    mock_context.json = AsyncMock(return_value={"choices": [{"message": {"content": content}}]})
+    mock_post.return_value.__aenter__.return_value = mock_context
+
+@pytest.mark.asyncio
+async def test_cached_completion_skips_api_call(cached_service):
+    """Test that a repeated prompt is served from the cache"""
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_completion(mock_post, "Test content")
+
+        assert await cached_service.execute("Test prompt") == "Test content"
+        assert await cached_service.execute("Test prompt") == "Test content"
+        assert mock_post.call_count == 1
+
+@pytest.mark.asyncio
+async def test_cache_bypass_calls_api_and_refreshes(cached_service):
+    """Test that use_cache=False always calls the model and updates the cache"""
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_completion(mock_post, "First")
+        await cached_service.execute("Test prompt")
+
+        mock_completion(mock_post, "Second")
+        assert await cached_service.execute("Test prompt", use_cache=False) == "Second"
+        assert await cached_service.execute("Test prompt") == "Second"
+        assert mock_post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_on_completion_receives_raw_completion(cached_service):
+    """Test the raw completion is handed out before post-processing, cached or not"""
+    raw = "Here's the HTML\n<p>Body</p>"
+    completions = []
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_completion(mock_post, raw)
+
+        assert await cached_service.execute("Test prompt", on_completion=completions.append) == "<p>Body</p>"
+        await cached_service.execute("Test prompt", on_completion=completions.append)
+
+        assert completions == [raw, raw]
+        assert cached_service.post_process(raw) == "<p>Body</p>"
+
+class FakeStreamContent:
+    """Mimics aiohttp's StreamReader.readline for an SSE body"""
+    def __init__(self, lines, stall_after=None):
+        self.lines = list(lines)
+        self.stall_after = stall_after
+
+    async def readline(self):
+        if self.stall_after is not None and self.stall_after == 0:
+            await asyncio.sleep(10)
+        if self.stall_after is not None:
+            self.stall_after -= 1
+        return self.lines.pop(0) if self.lines else b""
+
+def sse_lines(*deltas):
+    lines = [b": keep-alive\n"]
+    for delta in deltas:
+        lines.append(b"data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}).encode() + b"\n")
+        lines.append(b"\n")
+    lines.append(b"data: [DONE]\n")
+    return lines
+
+@pytest.mark.asyncio
+async def test_streaming_execute(service):
+    """Test streamed completions are assembled and post-processed"""
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_context = AsyncMock()
+        mock_context.status = 200
+        mock_context.content = FakeStreamContent(sse_lines("Here's the HTML\n<h1>Two", " Sum</h1>\n", "<p>Body</p>"))
+        mock_post.return_value.__aenter__.return_value = mock_context
+
+        result = await service.execute("Test prompt", stream=True)
+
+        assert result == "<h1>Two Sum</h1>\n<p>Body</p>"
+        assert mock_post.call_args.kwargs["json"]["stream"] is True
+
+@pytest.mark.asyncio
+async def test_streaming_records_clean_and_beautify_once_per_post(service):
+    """Test the post-processing stages are observed per post, not per streamed segment"""
+    deltas = [f"<h2>Step {i}</h2>\n<pre><code class=\"language-go\">\nfunc f{i}() {{\nreturn\n}}\n</code></pre>\n"
+              for i in range(5)]
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_context = AsyncMock()
+        mock_context.status = 200
+        mock_context.content = FakeStreamContent(sse_lines(*deltas))
+        mock_post.return_value.__aenter__.return_value = mock_context
+
+        await service.execute("Test prompt", stream=True)
+
+    assert STAGE_SECONDS.count(stage="clean") == 1
+    assert STAGE_SECONDS.count(stage="beautify") == 1
+
+@pytest.mark.asyncio
+async def test_streaming_stall_is_retried(service):
+    """Test a stalled stream gives up early and is retried"""
+    service.stall_timeout = 0.05
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        stalled = AsyncMock(status=200, content=FakeStreamContent(sse_lines("<p>partial"), stall_after=1))
+        healthy = AsyncMock(status=200, content=FakeStreamContent(sse_lines("<p>complete</p>")))
+        mock_post.return_value.__aenter__.side_effect = [stalled, healthy]
+
+        result = await service.execute("Test prompt", stream=True)
+
+        assert result == "<p>complete</p>"
+        assert mock_post.call_count == 2
+
+@pytest.mark.asyncio
+async def test_streaming_stall_persists(service):
+    """Test a stream that keeps stalling raises a network error"""
+    service.stall_timeout = 0.05
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [
+            AsyncMock(status=200, content=FakeStreamContent([], stall_after=0)) for _ in range(2)
+        ]
+
+        with pytest.raises(DeepSeekAPIError) as exc_info:
+            await service.execute("Test prompt", stream=True)
+
+        assert "Stream stalled" in str(exc_info.value)
+
+@pytest.mark.asyncio
+async def test_prompt_prefix_is_sent_as_first_message(service):
+    """The static prefix of a templated prompt goes first, as the system message"""
+    from strategies.prompt_template import Prompt
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_context = AsyncMock()
+        mock_context.status = 200
+        mock_context.json = AsyncMock(return_value={"choices": [{"message": {"content": "Test content"}}]})
+        mock_post.return_value.__aenter__.return_value = mock_context
+
+        await service.execute(Prompt("Instructions", "Problem"))
+
+        assert mock_post.call_args.kwargs["json"]["messages"] == [
+            {"role": "system", "content": "Instructions"},
+            {"role": "user", "content": "Problem"}
+        ]
+
+def test_api_url_comes_from_config(mock_config):
+    mock_config.return_value.deepseek_api_url = 'http://127.0.0.1:8080/v1/chat/completions'
+
+    assert DeepSeekService().api_url == 'http://127.0.0.1:8080/v1/chat/completions'
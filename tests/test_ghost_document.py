@@ -0,0 +1,79 @@
+import pytest
+from services.ghost_document import MobiledocBuilder, html_to_mobiledoc
+
+
+def test_headings_paragraphs_and_inline_markups():
+    doc = html_to_mobiledoc(
+        '<h2>Introduction</h2>\n'
+        '<p>Use a <strong>hash <em>map</em></strong> and <a href="https://go.dev">Go</a> &amp; more.<br>Done</p>'
+    )
+
+    assert doc["markups"] == [["strong"], ["em"], ["a", ["href", "https://go.dev"]]]
+    assert doc["atoms"] == [["soft-return", "", {}]]
+    assert doc["sections"] == [
+        [1, "h2", [[0, [], 0, "Introduction"]]],
+        [1, "p", [
+            [0, [], 0, "Use a "],
+            [0, [0], 0, "hash "],
+            [0, [1], 2, "map"],
+            [0, [], 0, " and "],
+            [0, [2], 1, "Go"],
+            [0, [], 0, " & more."],
+            [1, [], 0, 0],
+            [0, [], 0, "Done"],
+        ]],
+    ]
+
+
+def test_code_block_becomes_code_card():
+    doc = html_to_mobiledoc(
+        '<pre><code class="language-go">\nfunc f() bool {\n    return a &lt; b && s == "&quot;"\n}\n</code></pre>'
+    )
+
+    assert doc["cards"] == [["code", {"code": 'func f() bool {\n    return a < b && s == """\n}', "language": "go"}]]
+    assert doc["sections"] == [[10, 0]]
+
+
+def test_lists_become_list_sections():
+    doc = html_to_mobiledoc('<ol>\n<li>First <code>x</code></li>\n<li>Second\n<li>Third</li>\n</ol>')
+
+    assert doc["sections"] == [[3, "ol", [
+        [[0, [], 0, "First "], [0, [0], 1, "x"]],
+        [[0, [], 0, "Second"]],
+        [[0, [], 0, "Third"]],
+    ]]]
+
+
+@pytest.mark.parametrize("html", [
+    '<table><tr><td>1</td></tr></table>',
+    '<p class="meta">Difficulty: Easy</p>',
+    '<ul><li>Outer<ul><li>Inner</li></ul></li></ul>',
+])
+def test_unsupported_blocks_are_kept_as_html_cards(html):
+    doc = html_to_mobiledoc(html)
+
+    assert doc["cards"] == [["html", {"html": html}]]
+    assert doc["sections"] == [[10, 0]]
+
+
+def test_text_outside_blocks_gets_a_paragraph():
+    doc = html_to_mobiledoc('Loose <b>text</b>\n<p>Unclosed\n<h2>Next</h2><hr><img src="/a.png" alt="A">')
+
+    assert doc["sections"] == [
+        [1, "p", [[0, [], 0, "Loose "], [0, [0], 1, "text"]]],
+        [1, "p", [[0, [], 0, "Unclosed"]]],
+        [1, "h2", [[0, [], 0, "Next"]]],
+        [10, 0],
+        [10, 1],
+    ]
+    assert doc["cards"] == [["hr", {}], ["image", {"src": "/a.png", "alt": "A"}]]
+
+
+def test_chunked_feed_matches_single_feed():
+    html = '<h2>Go Implementation</h2><p>The <strong>solution</strong>:</p><pre><code class="language-go">x := 1</code></pre>'
+    builder = MobiledocBuilder()
+    for i in range(0, len(html), 7):
+        builder.feed(html[i:i + 7])
+    builder.close()
+
+    assert builder.mobiledoc == html_to_mobiledoc(html)
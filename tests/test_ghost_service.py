@@ -1,8 +1,11 @@
+import asyncio
+import json
+import jwt
 import pytest
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from services.ghost_service import GhostService
+from services.ghost_service import GhostAdminAuth, GhostService
 from config.config import Config
 
 @pytest.fixture
@@ -80,4 +83,128 @@ async def test_ghost_service_execute_error(ghost_service, mocker):
     # Assert error message
     assert "Failed to publish to Ghost" in str(exc_info.value)
     assert "Invalid API key" in str(exc_info.value)
-    assert "Status: 400" in str(exc_info.value) 
\ No newline at end of file
+    assert "Status: 400" in str(exc_info.value) 
+@pytest.mark.asyncio
+async def test_ghost_service_list_post_titles(ghost_service, mocker):
+    first_page = mocker.AsyncMock()
+    first_page.status = 200
+    first_page.json.return_value = {
+        "posts": [{"title": "Two Sum - Go Solution"}],
+        "meta": {"pagination": {"page": 1, "next": 2}}
+    }
+    second_page = mocker.AsyncMock()
+    second_page.status = 200
+    second_page.json.return_value = {
+        "posts": [{"title": "3Sum - Go Solution"}],
+        "meta": {"pagination": {"page": 2, "next": None}}
+    }
+
+    mock_session = mocker.MagicMock()
+    mock_session.get.return_value.__aenter__.side_effect = [first_page, second_page]
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+
+    titles = await ghost_service.list_post_titles()
+
+    assert titles == ["Two Sum - Go Solution", "3Sum - Go Solution"]
+    assert mock_session.get.call_args_list[1].kwargs["params"]["page"] == "2"
+
+
+def test_admin_auth_decodes_hex_secret():
+    auth = GhostAdminAuth("key_id:" + "ab" * 32)
+    claims = jwt.decode(auth.token(), bytes.fromhex("ab" * 32), algorithms=["HS256"], audience="/admin/")
+    assert claims["exp"] - claims["iat"] == 300
+    assert jwt.get_unverified_header(auth.token())["kid"] == "key_id"
+
+
+def test_admin_auth_reuses_token_until_close_to_expiry(mocker):
+    clock = mocker.patch('services.ghost_service.time.time', return_value=1000)
+    auth = GhostAdminAuth("key_id:" + "ab" * 32, lifetime=300, refresh_margin=60)
+    token = auth.token()
+
+    clock.return_value = 1239
+    assert auth.token() == token
+    clock.return_value = 1240
+    refreshed = auth.token()
+    assert refreshed != token
+    assert jwt.decode(refreshed, options={"verify_signature": False})["iat"] == 1240
+
+
+def test_admin_auth_rejects_malformed_key():
+    with pytest.raises(ValueError, match="<id>:<secret>"):
+        GhostAdminAuth("no-separator").token()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_publishes_share_token(ghost_service, mocker):
+    mock_response = mocker.AsyncMock()
+    mock_response.status = 201
+    mock_response.json.return_value = {"posts": [{"id": "123"}]}
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.return_value = mock_response
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+    sign = mocker.spy(jwt, 'encode')
+
+    await asyncio.gather(*(ghost_service.execute(f"Post {i}", "content") for i in range(20)))
+
+    assert sign.call_count == 1
+    tokens = {call.kwargs["headers"]["Authorization"] for call in mock_session.post.call_args_list}
+    assert len(tokens) == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_many_reports_each_post(ghost_service, mocker):
+    created = mocker.AsyncMock(status=201)
+    created.json.return_value = {"posts": [{"id": "123"}]}
+    rejected = mocker.AsyncMock(status=422)
+    rejected.json.return_value = {"errors": [{"message": "Title is too long"}]}
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.side_effect = [created, rejected]
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+
+    results = await ghost_service.publish_many([("One", "A"), ("Two", "B")], concurrency=1)
+
+    assert results[0] == {"status": "success", "result": {"posts": [{"id": "123"}]}}
+    assert results[1]["status"] == "error"
+    assert "Title is too long" in results[1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_ghost_service_schedules_post(ghost_service, mocker):
+    mock_response = mocker.AsyncMock(status=201)
+    mock_response.json.return_value = {"posts": [{"id": "123", "status": "scheduled"}]}
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.return_value = mock_response
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+
+    await ghost_service.execute("Test Post", "content", status="scheduled",
+                                published_at="2024-05-02T09:00:00+00:00")
+
+    post = mock_session.post.call_args.kwargs["json"]["posts"][0]
+    assert post["status"] == "scheduled"
+    assert post["published_at"] == "2024-05-02T09:00:00+00:00"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content_format", ["mobiledoc", "html"])
+async def test_ghost_service_sends_content_once(mock_config, mocker, content_format):
+    mock_config.ghost_content_format = content_format
+    mock_response = mocker.AsyncMock(status=201)
+    mock_response.json.return_value = {"posts": [{"id": "123"}]}
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.return_value = mock_response
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+
+    await GhostService().execute("Test Post", "<h2>Intro</h2><p>Hello</p>")
+
+    kwargs = mock_session.post.call_args.kwargs
+    post = kwargs["json"]["posts"][0]
+    if content_format == "html":
+        assert post["html"] == "<h2>Intro</h2><p>Hello</p>"
+        assert "mobiledoc" not in post
+        assert kwargs["params"] == {"source": "html"}
+    else:
+        assert "html" not in post
+        assert json.loads(post["mobiledoc"])["sections"] == [
+            [1, "h2", [[0, [], 0, "Intro"]]], [1, "p", [[0, [], 0, "Hello"]]]
+        ]
+        assert kwargs["params"] is None
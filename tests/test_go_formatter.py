@@ -0,0 +1,95 @@
+import pytest
+from services.go_formatter import beautify_go_code_in_html, format_go_code
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    format_go_code.cache_clear()
+    yield
+    format_go_code.cache_clear()
+
+
+@pytest.mark.parametrize("code, expected", [
+    (
+        "func f() {\nreturn 1\n}",
+        "func f() {\n    return 1\n}"
+    ),
+    (
+        # Braces inside strings, runes and comments do not nest
+        'func f() {\ns := "}{"\nr := \'{\'\n// }\n/* { */\nreturn\n}',
+        'func f() {\n    s := "}{"\n    r := \'{\'\n    // }\n    /* { */\n    return\n}'
+    ),
+    (
+        # Escaped quotes do not end a string
+        'func f() {\ns := "\\"{"\nreturn\n}',
+        'func f() {\n    s := "\\"{"\n    return\n}'
+    ),
+    (
+        # Quotes HTML-escaped by the model
+        'func f() {\ns := &quot;}&quot;\nr := &#39;}&#39;\nreturn\n}',
+        'func f() {\n    s := &quot;}&quot;\n    r := &#39;}&#39;\n    return\n}'
+    ),
+    (
+        "switch x {\ncase 1:\nfoo()\ndefault:\nbar()\n}",
+        "switch x {\ncase 1:\n    foo()\ndefault:\n    bar()\n}"
+    ),
+    (
+        "func f() {\nouter:\nfor {\nbreak outer\n}\n}",
+        "func f() {\nouter:\n    for {\n        break outer\n    }\n}"
+    ),
+    (
+        # Several brackets opened on one line add a single level
+        "run(func() {\nwork()\n})",
+        "run(func() {\n    work()\n})"
+    ),
+    (
+        "if a {\nx()\n} else {\ny()\n}",
+        "if a {\n    x()\n} else {\n    y()\n}"
+    ),
+    (
+        "call(a,\nb)\nnext()",
+        "call(a,\n    b)\nnext()"
+    ),
+    (
+        "m := map[string]int{\n\"a\": 1,\n}",
+        "m := map[string]int{\n    \"a\": 1,\n}"
+    ),
+    (
+        # Lines inside a raw string are left untouched
+        "func f() {\nq := `{\n  raw }\n`\nreturn\n}",
+        "func f() {\n    q := `{\n  raw }\n`\n    return\n}"
+    ),
+    (
+        "func f() {\n\n\n\nreturn\n}\n\n",
+        "func f() {\n\n    return\n}"
+    ),
+    (
+        # Unbalanced closers never produce negative indentation
+        "}\n}\nx()",
+        "}\n}\nx()"
+    ),
+])
+def test_format_go_code(code, expected):
+    assert format_go_code(code) == expected
+
+
+def test_format_go_code_is_cached():
+    code = "func f() {\nreturn\n}"
+    format_go_code(code)
+    format_go_code(code)
+    info = format_go_code.cache_info()
+    assert info.hits == 1
+    assert info.misses == 1
+
+
+def test_beautify_go_code_in_html_formats_every_go_block():
+    html = (
+        '<p>One</p><pre><code class="language-go">func a() {\nreturn\n}</code></pre>'
+        '<pre><code class="language-python">def b():\nreturn</code></pre>'
+        '<pre><code class="language-go">\n  func c() {\n  return\n  }\n</code></pre>'
+    )
+    assert beautify_go_code_in_html(html) == (
+        '<p>One</p><pre><code class="language-go">\nfunc a() {\n    return\n}\n</code></pre>'
+        '<pre><code class="language-python">def b():\nreturn</code></pre>'
+        '<pre><code class="language-go">\nfunc c() {\n    return\n}\n</code></pre>'
+    )
@@ -0,0 +1,54 @@
+import pytest
+import asyncio
+from services.http_session import HttpSessionPool
+
+
+@pytest.fixture
+async def pool():
+    pool = HttpSessionPool(limit=20, limit_per_host=5, ttl_dns_cache=60)
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_session_is_reused_on_same_loop(pool):
+    first = await pool.get_session()
+    second = await pool.get_session()
+    assert first is second
+    assert not first.closed
+
+
+@pytest.mark.asyncio
+async def test_connector_settings(pool):
+    session = await pool.get_session()
+    connector = session.connector
+    assert connector.limit == 20
+    assert connector.limit_per_host == 5
+    assert connector.use_dns_cache is True
+
+
+@pytest.mark.asyncio
+async def test_close_releases_session(pool):
+    session = await pool.get_session()
+    await pool.close()
+    assert session.closed
+
+    # A closed session is replaced transparently on next use
+    replacement = await pool.get_session()
+    assert replacement is not session
+    assert not replacement.closed
+
+
+def test_sessions_are_bound_per_loop(pool):
+    async def get():
+        session = await pool.get_session()
+        await pool.close()
+        return session
+
+    first = asyncio.new_event_loop()
+    second = asyncio.new_event_loop()
+    try:
+        assert first.run_until_complete(get()) is not second.run_until_complete(get())
+    finally:
+        first.close()
+        second.close()
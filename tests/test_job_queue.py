@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import pytest
+from services.job_queue import Job, JobQueueFull, JobWorker, current_job, job_stage
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.state not in ("succeeded", "failed"):
+        assert time.monotonic() < deadline, f"job still {job.state}"
+        time.sleep(0.01)
+    return job
+
+
+@pytest.fixture
+def gate():
+    """Blocks job handlers until set, so jobs can be kept queued"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def worker_factory():
+    workers = []
+
+    def create(handler, **kwargs):
+        worker = JobWorker(handler, **kwargs)
+        workers.append(worker)
+        return worker
+    yield create
+    for worker in workers:
+        worker.stop(timeout=5)
+
+
+def test_job_runs_on_worker_loop_with_stage_timings(worker_factory):
+    loops = []
+
+    async def handler(job):
+        loops.append(asyncio.get_running_loop())
+        with job_stage('fetch'):
+            await asyncio.sleep(0.01)
+        with job_stage('fetch'):
+            pass
+        return {'count': job.params['count']}
+
+    worker = worker_factory(handler)
+    first, merged = worker.submit({'count': 1})
+    wait_for(first)
+    second, _ = worker.submit({'count': 2})
+    wait_for(second)
+
+    assert merged is False
+    assert first.state == "succeeded"
+    assert first.result == {'count': 1}
+    assert first.stages['fetch']['calls'] == 2
+    assert first.stages['fetch']['seconds'] >= 0.01
+    assert worker.get(first.id) is first
+    # Both jobs ran on the same long-lived loop
+    assert loops[0] is loops[1]
+
+
+def test_failed_job_records_error(worker_factory):
+    async def handler(job):
+        raise Exception("DeepSeek unavailable")
+
+    worker = worker_factory(handler)
+    job, _ = worker.submit({'count': 1})
+    wait_for(job)
+
+    assert job.state == "failed"
+    assert job.error == "DeepSeek unavailable"
+    assert job.to_dict()['finished_at'] is not None
+
+
+def test_identical_pending_jobs_are_merged(worker_factory, gate):
+    async def handler(job):
+        await asyncio.to_thread(gate.wait)
+
+    worker = worker_factory(handler)
+    running, _ = worker.submit({'count': 1})
+    while running.state != "running":
+        time.sleep(0.01)
+
+    queued, merged_first = worker.submit({'count': 1})
+    again, merged_again = worker.submit({'count': 1})
+    other, merged_other = worker.submit({'count': 2})
+
+    assert queued is not running
+    assert merged_first is False
+    assert again is queued and merged_again is True
+    assert queued.merged == 1
+    assert other is not queued and merged_other is False
+    gate.set()
+    wait_for(queued)
+    wait_for(other)
+
+
+def test_full_queue_rejects_jobs(worker_factory, gate):
+    async def handler(job):
+        await asyncio.to_thread(gate.wait)
+
+    worker = worker_factory(handler, max_pending=2)
+    running, _ = worker.submit({'count': 1})
+    while running.state != "running":
+        time.sleep(0.01)
+    worker.submit({'count': 2})
+    worker.submit({'count': 3})
+
+    with pytest.raises(JobQueueFull):
+        worker.submit({'count': 4})
+    assert worker.pending_count() == 2
+
+
+def test_finished_job_history_is_bounded(worker_factory):
+    async def handler(job):
+        return None
+
+    worker = worker_factory(handler, history=2)
+    jobs = []
+    for count in range(4):
+        job, _ = worker.submit({'count': count})
+        jobs.append(wait_for(job))
+    worker.submit({'count': 99})
+
+    assert worker.get(jobs[0].id) is None
+    assert worker.get(jobs[1].id) is None
+    assert worker.get(jobs[3].id) is jobs[3]
+
+
+def test_job_stage_without_job_is_a_noop():
+    assert current_job.get() is None
+    with job_stage('fetch'):
+        pass
+
+
+def test_job_to_dict():
+    job = Job({'count': 3})
+    data = job.to_dict()
+
+    assert data['id'] == job.id
+    assert data['state'] == "queued"
+    assert data['params'] == {'count': 3}
+    assert data['stages'] == {}
@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+from unittest.mock import MagicMock, patch
+import pytest
+from services.leader_election import LeaderElector, LeaderLease
+
+
+@pytest.fixture
+def lease_path(tmp_path):
+    return str(tmp_path / 'scheduler.db')
+
+
+def make_lease(path, holder, ttl=30.0):
+    # Each lease gets its own connection, like separate worker processes
+    return LeaderLease(conn=sqlite3.connect(path, check_same_thread=False, timeout=5), ttl=ttl, holder=holder)
+
+
+def test_only_one_holder_at_a_time(lease_path):
+    first = make_lease(lease_path, 'worker-1')
+    second = make_lease(lease_path, 'worker-2')
+
+    assert first.acquire()
+    assert not second.acquire()
+    # Renewing keeps the lease
+    assert first.acquire()
+    assert first.current_holder()['holder'] == 'worker-1'
+
+
+def test_expired_lease_is_taken_over(lease_path):
+    first = make_lease(lease_path, 'worker-1', ttl=10)
+    second = make_lease(lease_path, 'worker-2', ttl=10)
+
+    with patch('services.leader_election.time.time', return_value=1000.0):
+        assert first.acquire()
+    with patch('services.leader_election.time.time', return_value=1009.0):
+        assert not second.acquire()
+    with patch('services.leader_election.time.time', return_value=1011.0):
+        assert first.current_holder() is None
+        assert second.acquire()
+        assert not first.acquire()
+        assert not first.held
+
+
+def test_release_hands_over_immediately(lease_path):
+    first = make_lease(lease_path, 'worker-1')
+    second = make_lease(lease_path, 'worker-2')
+
+    assert first.acquire()
+    first.release()
+
+    assert first.current_holder() is None
+    assert second.acquire()
+
+
+def test_concurrent_acquires_elect_one_leader(lease_path):
+    leases = [make_lease(lease_path, f'worker-{i}') for i in range(5)]
+    results = []
+    barrier = threading.Barrier(len(leases))
+
+    def contend(lease):
+        barrier.wait()
+        results.append(lease.acquire())
+
+    threads = [threading.Thread(target=contend, args=(lease,)) for lease in leases]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, False, False, False, True]
+
+
+def test_shared_state_is_visible_to_every_process(lease_path):
+    leader = make_lease(lease_path, 'worker-1')
+    follower = make_lease(lease_path, 'worker-2')
+
+    assert follower.get_state('next_run') is None
+    leader.set_state('next_run', '2024-01-01T12:00:00+00:00')
+
+    assert follower.get_state('next_run') == '2024-01-01T12:00:00+00:00'
+
+
+def test_elector_fires_callbacks_on_changes(lease_path):
+    lease = make_lease(lease_path, 'worker-1')
+    on_elected, on_demoted = MagicMock(), MagicMock()
+    elector = LeaderElector(lease, on_elected, on_demoted)
+
+    elector.heartbeat()
+    elector.heartbeat()
+    assert elector.is_leader
+    on_elected.assert_called_once()
+
+    with patch.object(lease, 'acquire', return_value=False):
+        elector.heartbeat()
+    assert not elector.is_leader
+    on_demoted.assert_called_once()
+
+
+def test_elector_keeps_leadership_on_transient_errors(lease_path):
+    lease = make_lease(lease_path, 'worker-1')
+    on_elected, on_demoted = MagicMock(), MagicMock()
+    elector = LeaderElector(lease, on_elected, on_demoted)
+    elector.heartbeat()
+
+    with patch.object(lease, 'acquire', side_effect=sqlite3.DatabaseError("disk I/O error")):
+        elector.heartbeat()
+
+    assert elector.is_leader
+    on_demoted.assert_not_called()
+
+
+def test_elector_stop_releases_lease(lease_path):
+    lease = make_lease(lease_path, 'worker-1')
+    follower = make_lease(lease_path, 'worker-2')
+    on_elected, on_demoted = MagicMock(), MagicMock()
+    elector = LeaderElector(lease, on_elected, on_demoted, interval=0.01)
+
+    elector.start()
+    elector.stop(timeout=5)
+
+    on_elected.assert_called_once()
+    on_demoted.assert_called_once()
+    assert follower.acquire()
+
+
+def test_elector_runs_heartbeat_callback_as_follower(lease_path):
+    make_lease(lease_path, 'worker-1').acquire()
+    on_heartbeat = MagicMock(side_effect=[RuntimeError("boom"), None])
+    elector = LeaderElector(make_lease(lease_path, 'worker-2'), MagicMock(), MagicMock(),
+                            on_heartbeat=on_heartbeat)
+
+    elector.heartbeat()
+    elector.heartbeat()
+
+    assert not elector.is_leader
+    assert on_heartbeat.call_count == 2
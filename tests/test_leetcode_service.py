@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import sys
 import os
@@ -89,6 +90,25 @@ async def test_leetcode_service_execute_api_error(leetcode_service, mocker):
     with pytest.raises(Exception, match="Failed to fetch LeetCode problem: 400"):
         await leetcode_service.execute()
 
+@pytest.mark.asyncio
+async def test_leetcode_service_retries_unavailable(leetcode_service, mocker):
+    unavailable = mocker.AsyncMock(status=503, headers={}, text=mocker.AsyncMock(return_value="Service Unavailable"))
+    ok = mocker.AsyncMock(status=200, json=mocker.AsyncMock(return_value={
+        "data": {"problemsetQuestionList": {"totalNum": 1, "data": [{
+            "title": "Two Sum", "titleSlug": "two-sum", "content": "<p>...</p>", "difficulty": "Easy",
+            "acRate": 50.0, "topicTags": []
+        }]}}
+    }))
+
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.side_effect = [unavailable, ok]
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+    mocker.patch('services.resilience.asyncio.sleep', new_callable=mocker.AsyncMock)
+
+    problem = await leetcode_service.execute()
+    assert problem["titleSlug"] == "two-sum"
+    assert mock_session.post.call_count == 2
+
 @pytest.mark.asyncio
 async def test_leetcode_service_execute_invalid_data_structure(leetcode_service, mocker):
     # Mock response with invalid problem data structure
@@ -117,4 +137,241 @@ async def test_leetcode_service_execute_invalid_data_structure(leetcode_service,
     with pytest.raises(Exception) as exc_info:
         await leetcode_service.execute()
     
-    assert "Invalid problem data structure received from LeetCode API" in str(exc_info.value) 
\ No newline at end of file
+    assert "Invalid problem data structure received from LeetCode API" in str(exc_info.value) 
+
+@pytest.fixture
+def catalog_service():
+    from services.problem_catalog import ProblemCatalog
+    return LeetCodeService(catalog=ProblemCatalog())
+
+
+def mock_graphql_session(mocker, responses):
+    """Patch the session so successive POSTs return the given JSON bodies"""
+    mock_responses = []
+    for body in responses:
+        mock_response = mocker.AsyncMock()
+        mock_response.status = 200
+        mock_response.json.return_value = body
+        mock_responses.append(mock_response)
+
+    mock_session = mocker.MagicMock()
+    mock_session.post.return_value.__aenter__.side_effect = mock_responses
+    mocker.patch('aiohttp.ClientSession', return_value=mock_session)
+    return mock_session
+
+
+def catalog_page(total, problems):
+    return {"data": {"problemsetQuestionList": {"totalNum": total, "data": problems}}}
+
+
+def catalog_problem(slug, difficulty="Medium"):
+    return {
+        "title": slug.title(),
+        "titleSlug": slug,
+        "difficulty": difficulty,
+        "acRate": 40.0,
+        "paidOnly": False,
+        "topicTags": [{"name": "Array", "slug": "array"}]
+    }
+
+
+@pytest.mark.asyncio
+async def test_catalog_sync_is_paginated(catalog_service, mocker):
+    catalog_service.CATALOG_PAGE_SIZE = 2
+    mock_session = mock_graphql_session(mocker, [
+        catalog_page(3, [catalog_problem("a"), catalog_problem("b")]),
+        catalog_page(3, [catalog_problem("c")])
+    ])
+
+    synced = await catalog_service.sync_catalog(full=True)
+
+    assert synced == 3
+    assert catalog_service.catalog.count() == 3
+    skips = [call.kwargs["json"]["variables"]["skip"] for call in mock_session.post.call_args_list]
+    assert skips == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_catalog_selection_fetches_only_selected_content(catalog_service, mocker):
+    mock_session = mock_graphql_session(mocker, [
+        catalog_page(2, [catalog_problem("a", "Easy"), catalog_problem("b", "Medium")]),
+        {"data": {"question": {"content": "<p>Problem B</p>"}}}
+    ])
+
+    result = await catalog_service.execute(difficulty="medium", topics=["array"])
+
+    assert result["titleSlug"] == "b"
+    assert result["content"] == "<p>Problem B</p>"
+    assert result["interview_metadata"]["topics"] == ["Array"]
+    content_call = mock_session.post.call_args_list[-1]
+    assert content_call.kwargs["json"]["variables"] == {"titleSlug": "b"}
+
+    # Content is stored, so a second selection needs no network round-trip
+    mock_session.post.reset_mock()
+    again = await catalog_service.execute(difficulty="medium")
+    assert again["content"] == "<p>Problem B</p>"
+    mock_session.post.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_catalog_selection_no_match(catalog_service, mocker):
+    mock_graphql_session(mocker, [catalog_page(1, [catalog_problem("a", "Easy")])])
+
+    with pytest.raises(Exception, match="No problems found matching the criteria"):
+        await catalog_service.execute(difficulty="hard")
+
+
+@pytest.mark.asyncio
+async def test_stale_catalog_refreshes_in_background(catalog_service, mocker):
+    catalog_service.catalog.upsert_many([catalog_problem("a")])
+    catalog_service.catalog.mark_synced(full=True)
+    catalog_service.catalog_max_age = 0
+    sync = mocker.patch.object(catalog_service, 'sync_catalog', new=AsyncMock(return_value=0))
+
+    await catalog_service.ensure_catalog()
+    await catalog_service._refresh_task
+
+    sync.assert_awaited_once_with(full=True)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_selections_fill_empty_catalog_once(catalog_service, mocker):
+    async def sync_catalog(full=False):
+        await asyncio.sleep(0.01)
+        catalog_service.catalog.upsert_many([catalog_problem("a")])
+        return 1
+    sync = mocker.patch.object(catalog_service, 'sync_catalog', side_effect=sync_catalog)
+
+    await asyncio.gather(*(catalog_service.ensure_catalog() for _ in range(3)))
+
+    sync.assert_called_once_with(full=True)
+
+
+@pytest.mark.asyncio
+async def test_uniform_sampling_fetches_one_row_at_random_offset(leetcode_service, mocker):
+    mocker.patch('services.leetcode_service.random.sample', return_value=[731])
+    mock_session = mock_graphql_session(mocker, [
+        {"data": {"problemsetQuestionList": {"totalNum": 1200}}},
+        {"data": {"problemsetQuestionList": {"totalNum": 1200, "data": [{
+            "title": "Deep Problem",
+            "titleSlug": "deep-problem",
+            "content": "<p>Deep</p>",
+            "difficulty": "Medium",
+            "acRate": 51.0,
+            "topicTags": [{"name": "Array", "slug": "array"}]
+        }]}}}
+    ])
+
+    result = await leetcode_service.execute(difficulty="medium", topics=["array"], sampling="uniform")
+
+    assert result["titleSlug"] == "deep-problem"
+    count_call, row_call = mock_session.post.call_args_list
+    assert "content" not in count_call.kwargs["json"]["query"]
+    assert count_call.kwargs["json"]["variables"]["filters"] == {"difficulty": "MEDIUM", "tags": ["array"]}
+    assert row_call.kwargs["json"]["variables"]["limit"] == 1
+    assert row_call.kwargs["json"]["variables"]["skip"] == 731
+
+
+@pytest.mark.asyncio
+async def test_uniform_sampling_no_matches(leetcode_service, mocker):
+    mock_session = mock_graphql_session(mocker, [{"data": {"problemsetQuestionList": {"totalNum": 0}}}])
+
+    with pytest.raises(Exception, match="No problems found matching the criteria"):
+        await leetcode_service.execute(sampling="uniform")
+    assert mock_session.post.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_sampling_mode(leetcode_service):
+    with pytest.raises(ValueError, match="Unsupported sampling mode: everything"):
+        await leetcode_service.execute(sampling="everything")
+
+
+def listed_problem(slug):
+    return {
+        "title": slug.title(),
+        "titleSlug": slug,
+        "content": f"<p>{slug}</p>",
+        "difficulty": "Medium",
+        "acRate": 50.0,
+        "topicTags": []
+    }
+
+
+@pytest.mark.asyncio
+async def test_page_sampling_skips_excluded(leetcode_service, mocker):
+    mock_graphql_session(mocker, [catalog_page(2, [listed_problem("a"), listed_problem("b")])])
+
+    result = await leetcode_service.execute(exclude={"a"})
+    assert result["titleSlug"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_page_sampling_all_excluded(leetcode_service, mocker):
+    mock_graphql_session(mocker, [catalog_page(1, [listed_problem("a")])])
+
+    with pytest.raises(Exception, match="No unpublished problems found matching the criteria"):
+        await leetcode_service.execute(exclude={"a"})
+
+
+@pytest.mark.asyncio
+async def test_uniform_sampling_retries_excluded_offsets(leetcode_service, mocker):
+    mock_graphql_session(mocker, [
+        {"data": {"problemsetQuestionList": {"totalNum": 10}}},
+        catalog_page(10, [listed_problem("a")]),
+        catalog_page(10, [listed_problem("b")])
+    ])
+
+    result = await leetcode_service.execute(sampling="uniform", exclude={"a"})
+    assert result["titleSlug"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_page_sampling_looks_past_a_published_first_page(leetcode_service, mocker):
+    first_page = [listed_problem(f"p{i}") for i in range(50)]
+    mock_session = mock_graphql_session(mocker, [
+        catalog_page(60, first_page),
+        catalog_page(60, [catalog_problem(f"p{i}") for i in range(50, 60)]),
+        {"data": {"question": {"content": "<p>Problem 55</p>"}}}
+    ])
+    published = {f"p{i}" for i in range(60)} - {"p55"}
+
+    result = await leetcode_service.execute(exclude=published)
+
+    assert result["titleSlug"] == "p55"
+    assert result["content"] == "<p>Problem 55</p>"
+    assert mock_session.post.call_args_list[1].kwargs["json"]["variables"]["skip"] == 50
+
+
+@pytest.mark.asyncio
+async def test_uniform_sampling_searches_pages_after_excluded_offsets(leetcode_service, mocker):
+    mocker.patch('services.leetcode_service.random.randrange', return_value=0)
+    mock_graphql_session(mocker, [
+        {"data": {"problemsetQuestionList": {"totalNum": 10}}},
+        *[catalog_page(10, [listed_problem("a")]) for _ in range(5)],
+        catalog_page(10, [catalog_problem("a"), catalog_problem("b", "Hard")]),
+        {"data": {"question": {"content": "<p>Problem B</p>"}}}
+    ])
+
+    result = await leetcode_service.execute(sampling="uniform", exclude={"a"})
+    assert result["titleSlug"] == "b"
+
+
+@pytest.mark.asyncio
+async def test_catalog_selection_skips_excluded(catalog_service, mocker):
+    mock_graphql_session(mocker, [
+        catalog_page(2, [catalog_problem("a"), catalog_problem("b")]),
+        {"data": {"question": {"content": "<p>Problem B</p>"}}}
+    ])
+
+    result = await catalog_service.execute(exclude={"a"})
+    assert result["titleSlug"] == "b"
+
+def test_graphql_url_is_configurable(monkeypatch):
+    from config.config import Config
+    monkeypatch.setenv('LEETCODE_GRAPHQL_URL', 'http://127.0.0.1:8080/graphql')
+    Config.reset_instance()
+    try:
+        assert LeetCodeService().graphql_url == 'http://127.0.0.1:8080/graphql'
+    finally:
+        Config.reset_instance()
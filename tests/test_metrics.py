@@ -0,0 +1,91 @@
+import pytest
+from aiohttp import web
+from services.http_session import HttpSessionPool
+from services.metrics import (
+    STAGE_SECONDS, UPSTREAM_BYTES, UPSTREAM_RATE_LIMITED, UPSTREAM_REQUESTS,
+    MetricsRegistry, stage_timer, upstream
+)
+
+
+def test_counter_renders_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('upstream',))
+    requests.inc(upstream='deepseek')
+    requests.inc(2, upstream='deepseek')
+    requests.inc(upstream='leetcode')
+
+    assert requests.get(upstream='deepseek') == 3
+    assert registry.render() == (
+        '# HELP requests_total Requests\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{upstream="deepseek"} 3\n'
+        'requests_total{upstream="leetcode"} 1\n'
+    )
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    durations = registry.histogram('stage_seconds', 'Stage durations', ('stage',), buckets=(0.1, 1))
+    durations.observe(0.05, stage='clean')
+    durations.observe(0.5, stage='clean')
+    durations.observe(3, stage='clean')
+
+    assert durations.count(stage='clean') == 3
+    assert registry.render().splitlines()[2:] == [
+        'stage_seconds_bucket{stage="clean",le="0.1"} 1',
+        'stage_seconds_bucket{stage="clean",le="1"} 2',
+        'stage_seconds_bucket{stage="clean",le="+Inf"} 3',
+        'stage_seconds_sum{stage="clean"} 3.55',
+        'stage_seconds_count{stage="clean"} 3',
+    ]
+
+
+def test_metrics_validate_labels():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('upstream',))
+    with pytest.raises(ValueError):
+        requests.inc(host='leetcode.com')
+    with pytest.raises(ValueError):
+        registry.counter('requests_total', 'Requests again')
+
+
+def test_stage_timer_observes_on_error():
+    with pytest.raises(RuntimeError):
+        with stage_timer('publish'):
+            raise RuntimeError("Ghost is down")
+    assert STAGE_SECONDS.count(stage='publish') == 1
+
+
+@pytest.mark.asyncio
+async def test_session_requests_are_counted():
+    async def completions(request):
+        await request.read()
+        if request.query.get('limited'):
+            return web.Response(status=429, text='slow down')
+        return web.json_response({'ok': True})
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    pool = HttpSessionPool()
+    try:
+        session = await pool.get_session()
+        url = f'http://127.0.0.1:{port}/v1/chat/completions'
+        async with session.post(url, json={'prompt': 'x'}, trace_request_ctx=upstream('deepseek')) as response:
+            body = await response.read()
+        async with session.post(url, params={'limited': '1'}, json={}) as response:
+            await response.read()
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+    assert UPSTREAM_REQUESTS.get(upstream='deepseek', status='200') == 1
+    # Requests without an upstream name are counted under their host
+    assert UPSTREAM_REQUESTS.get(upstream='127.0.0.1', status='429') == 1
+    assert UPSTREAM_RATE_LIMITED.get(upstream='127.0.0.1') == 1
+    assert UPSTREAM_BYTES.get(upstream='deepseek', direction='out') == len(b'{"prompt": "x"}')
+    assert UPSTREAM_BYTES.get(upstream='deepseek', direction='in') == len(body)
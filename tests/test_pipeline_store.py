@@ -0,0 +1,135 @@
+import pytest
+from unittest.mock import patch
+from services.pipeline_store import PipelineStore
+
+
+@pytest.fixture
+def store():
+    return PipelineStore(resume_after=900)
+
+
+def test_checkpoints_are_durable(store):
+    run = store.start('key')
+    run.save('problem', {"titleSlug": "two-sum"})
+    run.save('prompt', "Write a post")
+
+    saved = store.get(run.id)
+    assert saved["status"] == "running"
+    assert saved["checkpoints"] == {"problem": {"titleSlug": "two-sum"}, "prompt": "Write a post"}
+    assert run.last_stage == "prompt"
+
+
+def test_unknown_stage_is_rejected(store):
+    run = store.start('key')
+    with pytest.raises(ValueError):
+        run.save('review', "x")
+    with pytest.raises(ValueError):
+        run.save('review:python', "x")
+
+
+def test_language_checkpoints_follow_their_stage(store):
+    run = store.start('key')
+    run.save('problem', {"titleSlug": "two-sum"})
+    run.save('html:go', "<h1>Go</h1>")
+    run.save('prompt:python', {"prefix": "", "body": "Write a post"})
+
+    assert run.last_stage == "html:go"
+    assert store.get(run.id)["checkpoints"]["html:go"] == "<h1>Go</h1>"
+
+
+def test_failed_run_is_resumed_with_its_checkpoints(store):
+    run = store.start('key')
+    run.save('problem', {"titleSlug": "two-sum"})
+    run.save('completion', "raw")
+    run.fail("Ghost unavailable")
+    assert store.get(run.id)["error"] == "Ghost unavailable"
+
+    resumed = store.resume('key')
+
+    assert resumed.id == run.id
+    assert resumed.get('completion') == "raw"
+    assert resumed.last_stage == "completion"
+    assert store.get(run.id)["status"] == "running"
+    # A claimed run is not handed out twice
+    assert store.resume('key') is None
+
+
+def test_resume_only_matches_the_same_key(store):
+    store.start('easy').fail("boom")
+    assert store.resume('hard') is None
+
+
+def test_finished_runs_are_not_resumed(store):
+    store.start('key').complete()
+    store.start('key').abandon()
+    assert store.resume('key') is None
+
+
+def test_running_run_is_resumed_once_it_stops_checkpointing(store):
+    with patch('services.pipeline_store.time.time', return_value=1000.0):
+        run = store.start('key')
+        run.save('problem', {"titleSlug": "two-sum"})
+
+    with patch('services.pipeline_store.time.time', return_value=1000.0 + 899):
+        assert store.resume('key') is None
+    with patch('services.pipeline_store.time.time', return_value=1000.0 + 901):
+        assert store.resume('key').id == run.id
+
+
+def test_run_is_abandoned_after_max_attempts():
+    store = PipelineStore(resume_after=900, max_attempts=2)
+    run = store.start('key')
+    run.fail("Validation error: 422")
+
+    assert store.resume('key').id == run.id
+    assert store.get(run.id)["attempts"] == 2
+    run.fail("Validation error: 422")
+
+    assert store.resume('key') is None
+    assert store.get(run.id)["status"] == "abandoned"
+
+
+def test_runs_of_older_databases_count_attempts(tmp_path):
+    import sqlite3
+    conn = sqlite3.connect(str(tmp_path / 'pipeline.db'), check_same_thread=False)
+    conn.execute("CREATE TABLE pipeline_runs (id TEXT PRIMARY KEY, key TEXT NOT NULL, status TEXT NOT NULL, "
+                 "error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO pipeline_runs VALUES ('old', 'key', 'failed', 'boom', 0, 0)")
+    conn.commit()
+
+    store = PipelineStore(conn=conn, resume_after=900, max_attempts=3)
+    assert store.resume('key').id == 'old'
+    assert store.get('old')["attempts"] == 2
+
+
+def test_most_recent_unfinished_run_is_resumed_first(store):
+    with patch('services.pipeline_store.time.time', return_value=1000.0):
+        older = store.start('key')
+        older.fail("boom")
+    with patch('services.pipeline_store.time.time', return_value=2000.0):
+        newer = store.start('key')
+        newer.fail("boom")
+
+    assert store.resume('key').id == newer.id
+    assert store.resume('key').id == older.id
+
+
+def test_ready_runs_are_claimed_oldest_first_and_once(store):
+    first = store.start('key')
+    first.save('problem', {"titleSlug": "two-sum"})
+    first.mark_ready()
+    second = store.start('key')
+    second.save('problem', {"titleSlug": "3sum"})
+    second.mark_ready()
+
+    assert store.count('key', 'ready') == 2
+    assert store.checkpoints_of('key', 'ready', 'problem') == [{"titleSlug": "two-sum"}, {"titleSlug": "3sum"}]
+    assert store.resume('key') is None
+
+    claimed = store.claim_ready('key')
+    assert claimed.id == first.id
+    assert claimed.get('problem') == {"titleSlug": "two-sum"}
+    assert store.get(first.id)["status"] == "running"
+    assert store.claim_ready('key').id == second.id
+    assert store.claim_ready('key') is None
+    assert store.count('key', 'ready') == 0
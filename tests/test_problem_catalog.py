@@ -0,0 +1,70 @@
+import pytest
+import sqlite3
+from services.problem_catalog import ProblemCatalog
+
+
+def make_problem(slug, difficulty="Medium", ac_rate=50.0, tags=("array",), paid_only=False):
+    return {
+        "title": slug.replace("-", " ").title(),
+        "titleSlug": slug,
+        "difficulty": difficulty,
+        "acRate": ac_rate,
+        "paidOnly": paid_only,
+        "topicTags": [{"name": tag.title(), "slug": tag} for tag in tags]
+    }
+
+
+@pytest.fixture
+def catalog():
+    catalog = ProblemCatalog(sqlite3.connect(":memory:", check_same_thread=False))
+    catalog.conn.row_factory = sqlite3.Row
+    catalog.upsert_many([
+        make_problem("two-sum", "Easy", 52.1, ("array", "hash-table")),
+        make_problem("3sum", "Medium", 34.0, ("array", "two-pointers")),
+        make_problem("lru-cache", "Medium", 42.5, ("hash-table", "design")),
+        make_problem("median-of-two-sorted-arrays", "Hard", 39.9, ("array", "binary-search")),
+        make_problem("paid-problem", "Medium", 60.0, ("array",), paid_only=True)
+    ])
+    return catalog
+
+
+def test_count(catalog):
+    assert catalog.count() == 5
+
+
+def test_find_by_difficulty_is_case_insensitive(catalog):
+    assert sorted(catalog.find_slugs(difficulty="MEDIUM")) == ["3sum", "lru-cache"]
+
+
+def test_find_requires_all_topics(catalog):
+    assert catalog.find_slugs(topics=["array", "hash-table"]) == ["two-sum"]
+    assert sorted(catalog.find_slugs(topics=["array"])) == ["3sum", "median-of-two-sorted-arrays", "two-sum"]
+
+
+def test_find_by_acceptance_range(catalog):
+    assert sorted(catalog.find_slugs(min_acceptance=40, max_acceptance=55)) == ["lru-cache", "two-sum"]
+
+
+def test_paid_problems_are_excluded(catalog):
+    assert "paid-problem" not in catalog.find_slugs()
+
+
+def test_select_random_returns_none_without_match(catalog):
+    assert catalog.select_random(difficulty="Hard", topics=["design"]) is None
+
+
+def test_upsert_keeps_content(catalog):
+    catalog.set_content("two-sum", "<p>Given an array</p>")
+    catalog.upsert_many([make_problem("two-sum", "Easy", 55.0, ("array",))])
+
+    problem = catalog.get("two-sum")
+    assert problem["content"] == "<p>Given an array</p>"
+    assert problem["acRate"] == 55.0
+    assert problem["topicTags"] == [{"name": "Array", "slug": "array"}]
+
+
+def test_sync_age(catalog):
+    assert catalog.seconds_since_sync() is None
+    catalog.mark_synced(full=True)
+    assert catalog.seconds_since_sync() < 5
+    assert catalog.seconds_since_sync(full=True) < 5
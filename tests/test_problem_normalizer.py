@@ -0,0 +1,90 @@
+from services.problem_normalizer import compact_problem, estimate_tokens, problem_text
+from strategies.go_post_strategy import GoPostStrategy
+
+TWO_SUM = """<p>Given an array of integers&nbsp;<code>nums</code>&nbsp;and an integer&nbsp;<code>target</code>, return <em>indices of the two numbers</em>.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+<img alt="" src="https://assets.leetcode.com/uploads/two-sum.png" style="width: 300px;" />
+<pre>
+<strong>Input:</strong> nums = [2,7,11,15], target = 9
+<strong>Output:</strong> [0,1]
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [3,2,4], target = 6
+<strong>Output:</strong> [1,2]
+</pre>
+
+<p><strong class="example">Example 3:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [3,2,4], target = 6
+<strong>Output:</strong> [1,2]
+</pre>
+
+<p>&nbsp;</p>
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li><code>2 &lt;= nums.length &lt;= 10<sup>4</sup></code></li>
+	<li><code>-10<sup>9</sup> &lt;= nums[i] &lt;= 10<sup>9</sup></code></li>
+</ul>
+
+<p>&nbsp;</p>
+<strong>Follow-up:&nbsp;</strong>Can you do better than <code>O(n<sup>2</sup>)</code>?"""
+
+
+def test_problem_text_strips_markup():
+    assert problem_text(TWO_SUM).split('\n')[:4] == [
+        "Given an array of integers nums and an integer target, return indices of the two numbers.",
+        "Example 1:",
+        "Input: nums = [2,7,11,15], target = 9",
+        "Output: [0,1]",
+    ]
+    assert "- -10^9 <= nums[i] <= 10^9" in problem_text(TWO_SUM)
+
+
+def test_compact_problem_drops_repeated_examples():
+    text = compact_problem(TWO_SUM)
+
+    assert "Example 2:" in text
+    assert "Example 3:" not in text
+    assert text.endswith("Follow-up: Can you do better than O(n^2)?")
+    assert estimate_tokens(text) < estimate_tokens(TWO_SUM) / 2
+
+
+def test_compact_problem_keeps_the_most_useful_parts_within_budget():
+    full = compact_problem(TWO_SUM)
+    description = full.split('\n')[0]
+    first_example = "Example 1:\nInput: nums = [2,7,11,15], target = 9\nOutput: [0,1]"
+    budget = estimate_tokens(description) + estimate_tokens(first_example) + estimate_tokens("- 2 <= nums.length <= 10^4") + 2
+
+    text = compact_problem(TWO_SUM, budget)
+
+    assert text == f"{description}\n\n{first_example}\n\nConstraints:\n- 2 <= nums.length <= 10^4"
+
+
+def test_compact_problem_cuts_a_long_description():
+    text = compact_problem("<p>" + "word " * 100 + "</p>", 10)
+
+    assert text.endswith(" ...")
+    assert estimate_tokens(text) <= 10 + 3
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Two sum") == 2
+    assert estimate_tokens("nums[i] <= 10000") == 8
+
+
+def test_go_strategy_prompt_contains_compact_problem():
+    prompt = GoPostStrategy(problem_token_budget=600).build_prompt({
+        "title": "Two Sum", "content": TWO_SUM, "difficulty": "Easy", "topicTags": [{"name": "Array"}]
+    })
+
+    assert "Input: nums = [2,7,11,15], target = 9" in prompt.body
+    assert "&nbsp;" not in prompt.body
+    assert "<strong>Input:</strong>" not in prompt.body
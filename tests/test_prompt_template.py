@@ -0,0 +1,78 @@
+import pytest
+from strategies.code_post_strategy import CodePostStrategy
+from strategies.go_post_strategy import GoPostStrategy
+from strategies.languages import create_strategy
+from strategies.rust_post_strategy import RustPostStrategy
+from strategies.prompt_template import Prompt, PromptTemplate, compile_template
+
+PROBLEM = {
+    "title": "Two Sum",
+    "difficulty": "Easy",
+    "topicTags": [{"name": "Array"}, {"name": "Hash Table"}],
+    "content": "<p>Return indices of the two numbers.</p>"
+}
+
+
+def test_template_renders_body_fields():
+    template = PromptTemplate("Static instructions", "Title: {title}\nTags: {tags} {{literal}}")
+
+    prompt = template.render(title="Two Sum", tags="Array")
+
+    assert prompt == Prompt("Static instructions", "Title: Two Sum\nTags: Array {literal}")
+    assert template.fields == {"title", "tags"}
+
+
+def test_template_rejects_missing_fields():
+    with pytest.raises(ValueError, match="tags"):
+        PromptTemplate("", "{title} {tags}").render(title="Two Sum")
+
+
+def test_templates_are_compiled_once():
+    assert compile_template("prefix", "{body}") is compile_template("prefix", "{body}")
+    assert GoPostStrategy.template() is GoPostStrategy.template()
+
+
+def test_prompt_messages_and_checkpoints():
+    prompt = Prompt("Instructions", "Problem")
+
+    assert prompt.messages() == [
+        {"role": "system", "content": "Instructions"},
+        {"role": "user", "content": "Problem"},
+    ]
+    assert Prompt.from_checkpoint(prompt.to_checkpoint()) == prompt
+    # Runs checkpointed before prompts had a prefix
+    assert Prompt.from_checkpoint("Old prompt").messages() == [{"role": "user", "content": "Old prompt"}]
+
+
+def test_go_prompt_keeps_problem_data_out_of_the_prefix():
+    strategy = GoPostStrategy()
+    first = strategy.build_prompt(PROBLEM)
+    second = strategy.build_prompt({**PROBLEM, "title": "3Sum", "difficulty": "Medium"})
+
+    assert first.prefix == second.prefix
+    assert "Two Sum" not in first.prefix
+    assert '<pre><code class="language-go">' in first.prefix
+    assert "- Title: Two Sum\n- Difficulty: Easy\n- Tags: Array, Hash Table" in first.body
+    assert "Return indices of the two numbers." in first.body
+
+
+def test_new_language_only_needs_its_name():
+    class KotlinPostStrategy(CodePostStrategy):
+        LANGUAGE = "Kotlin"
+        CODE_CLASS = "kotlin"
+
+    prompt = KotlinPostStrategy().build_prompt(PROBLEM)
+
+    assert "<h2>Kotlin Implementation</h2>" in prompt.prefix
+    assert '<pre><code class="language-kotlin">' in prompt.prefix
+    assert prompt.body == GoPostStrategy().build_prompt(PROBLEM).body
+
+
+def test_post_languages_map_to_strategies():
+    strategy = create_strategy(" Rust ", problem_token_budget=100)
+
+    assert isinstance(strategy, RustPostStrategy)
+    assert strategy.problem_token_budget == 100
+    assert "<h2>Rust Implementation</h2>" in strategy.build_prompt(PROBLEM).prefix
+    with pytest.raises(ValueError, match="Unsupported post language: cobol"):
+        create_strategy("cobol")
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock
+from services.published_index import PublishedIndex, problem_slug_from_post_title
+
+
+@pytest.fixture
+def index():
+    return PublishedIndex()
+
+
+@pytest.mark.parametrize("title,expected", [
+    ("Two Sum - Go Solution", "two-sum"),
+    ("Pow(x, n) - Go Solution", "powx-n"),
+    ("Two Sum II - Input Array Is Sorted - Go Solution", "two-sum-ii-input-array-is-sorted"),
+    ("Two Sum – Go Solution", "two-sum"),
+    ("Hand-Written Post", "hand-written-post")
+])
+def test_problem_slug_from_post_title(title, expected):
+    assert problem_slug_from_post_title(title) == expected
+
+
+def test_add_and_contains(index):
+    assert "two-sum" not in index
+    index.add("two-sum", "ghost", "abc", "https://blog.test/two-sum/")
+    assert "two-sum" in index
+    assert len(index) == 1
+
+
+def test_index_is_persistent(index):
+    index.add("two-sum")
+    # A new index over the same database sees earlier publishes
+    assert "two-sum" in PublishedIndex()
+
+
+def test_record_publish_ghost_response(index):
+    index.record_publish("two-sum", "ghost", {"posts": [{"id": "abc", "url": "https://blog.test/two-sum/"}]})
+    row = index.conn.execute("SELECT post_id, url FROM published WHERE title_slug = 'two-sum'").fetchone()
+    assert tuple(row) == ("abc", "https://blog.test/two-sum/")
+
+
+def test_record_publish_wordpress_response(index):
+    index.record_publish("two-sum", "wordpress", {"id": 123, "link": "https://blog.test/?p=123"})
+    row = index.conn.execute("SELECT post_id, url FROM published WHERE title_slug = 'two-sum'").fetchone()
+    assert tuple(row) == ("123", "https://blog.test/?p=123")
+
+
+@pytest.mark.asyncio
+async def test_seed_from_blog_service(index):
+    blog_service = AsyncMock()
+    blog_service.list_post_titles.return_value = ["Two Sum - Go Solution", "3Sum - Go Solution"]
+
+    assert not index.seeded
+    added = await index.seed_from(blog_service)
+
+    assert added == 2
+    assert "two-sum" in index and "3sum" in index
+    assert index.seeded
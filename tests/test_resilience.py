@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import aiohttp
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+from services.metrics import UPSTREAM_RETRIES
+from services.resilience import (
+    CircuitBreaker, CircuitOpenError, RetryableError, RetryPolicy, TokenBucket, Upstream, parse_retry_after
+)
+
+
+def make_upstream(rate=0, failure_threshold=5, reset_timeout=30.0, max_attempts=3):
+    return Upstream(
+        'test',
+        TokenBucket(rate),
+        CircuitBreaker(failure_threshold, reset_timeout),
+        RetryPolicy(max_attempts=max_attempts, base_delay=0.01, max_delay=1.0)
+    )
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_retry_policy_backs_off_exponentially_with_jitter():
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=3.0)
+    for _ in range(50):
+        assert 0 <= policy.delay(0) <= 1.0
+        assert 0 <= policy.delay(2) <= 3.0
+    assert policy.delay(3) is None
+    assert policy.delay(0, retry_after=2.5) >= 2.5
+    # Retry-After beyond max_delay gives up instead of blocking
+    assert policy.delay(0, retry_after=60) is None
+
+
+def test_token_bucket_spaces_out_requests():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_adapts_to_rate_limiting():
+    bucket = TokenBucket(rate=10)
+    bucket.throttle(retry_after=5)
+    assert bucket.rate == 5
+    assert bucket.reserve() >= 4.9
+    for _ in range(10):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.reserve() == 0 for _ in range(100))
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    with patch('services.resilience.time.monotonic', return_value=breaker.opened_at + 1):
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        # Only one trial call at a time
+        assert not breaker.allow()
+        breaker.record_success()
+    assert breaker.state == "closed"
+
+
+
+def test_circuit_breaker_lets_one_trial_through_across_threads():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    barrier = threading.Barrier(8)
+
+    def allow():
+        barrier.wait()
+        return breaker.allow()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        allowed = list(pool.map(lambda _: allow(), range(8)))
+    assert allowed.count(True) == 1
+
+@pytest.mark.asyncio
+async def test_upstream_retries_retryable_errors():
+    request = AsyncMock(side_effect=[RetryableError(503, "unavailable"), aiohttp.ClientConnectionError(), "ok"])
+    upstream = make_upstream()
+
+    assert await upstream.call(request) == "ok"
+    assert request.await_count == 3
+    assert UPSTREAM_RETRIES.get(upstream='test') == 2
+
+
+@pytest.mark.asyncio
+async def test_upstream_gives_up_after_max_attempts():
+    request = AsyncMock(side_effect=RetryableError(429, "slow down"))
+    upstream = make_upstream(max_attempts=2)
+
+    with pytest.raises(RetryableError):
+        await upstream.call(request)
+    assert request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_upstream_does_not_retry_other_errors():
+    request = AsyncMock(side_effect=ValueError("bad request"))
+    upstream = make_upstream()
+
+    with pytest.raises(ValueError):
+        await upstream.call(request)
+    assert request.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_requests_retry_only_when_unprocessed():
+    upstream = make_upstream()
+    gateway_error = AsyncMock(side_effect=RetryableError(502, "bad gateway"))
+    with pytest.raises(RetryableError):
+        await upstream.call(gateway_error, idempotent=False)
+    assert gateway_error.await_count == 1
+
+    unavailable = AsyncMock(side_effect=[RetryableError(503, "unavailable"), "created"])
+    assert await upstream.call(unavailable, idempotent=False) == "created"
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_fast():
+    upstream = make_upstream(failure_threshold=2, max_attempts=1)
+    request = AsyncMock(side_effect=asyncio.TimeoutError())
+    for _ in range(2):
+        with pytest.raises(asyncio.TimeoutError):
+            await upstream.call(request)
+
+    with pytest.raises(CircuitOpenError):
+        await upstream.call(request)
+    assert request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limiting_does_not_open_circuit():
+    upstream = make_upstream(failure_threshold=1, max_attempts=1)
+    request = AsyncMock(side_effect=RetryableError(429, "slow down"))
+    for _ in range(3):
+        with pytest.raises(RetryableError):
+            await upstream.call(request)
+    assert upstream.breaker.state == "closed"
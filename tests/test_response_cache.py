@@ -0,0 +1,55 @@
+import pytest
+import itertools
+from unittest.mock import patch
+from services.response_cache import ResponseCache
+
+
+def payload(prompt, temperature=0.7):
+    return {
+        "model": "deepseek-chat",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": 2000
+    }
+
+
+@pytest.fixture
+def cache():
+    return ResponseCache(ttl=60, max_bytes=1000)
+
+
+def test_key_depends_on_generation_parameters():
+    assert ResponseCache.make_key(payload("a")) == ResponseCache.make_key(payload("a"))
+    assert ResponseCache.make_key(payload("a")) != ResponseCache.make_key(payload("b"))
+    assert ResponseCache.make_key(payload("a")) != ResponseCache.make_key(payload("a", temperature=0.2))
+
+
+def test_set_and_get(cache):
+    cache.set("k", "completion")
+    assert cache.get("k") == "completion"
+    assert cache.get("missing") is None
+
+
+def test_expired_entries_are_dropped(cache):
+    with patch('services.response_cache.time.time', return_value=1000.0):
+        cache.set("k", "completion")
+    with patch('services.response_cache.time.time', return_value=1061.0):
+        assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction_by_size(cache):
+    with patch('services.response_cache.time.time', side_effect=itertools.count(1.0)):
+        cache.set("a", "x" * 400)
+        cache.set("b", "x" * 400)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", "x" * 400)
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+
+def test_oversized_values_are_not_stored(cache):
+    cache.set("k", "x" * 1001)
+    assert cache.get("k") is None
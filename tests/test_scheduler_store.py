@@ -0,0 +1,111 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import pytest
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.util import datetime_to_utc_timestamp
+from services.scheduler_store import RunLedger, SQLiteJobStore, find_missed_slots
+
+
+def noop():
+    pass
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def scheduler(conn):
+    scheduler = BackgroundScheduler(timezone=timezone.utc, jobstores={'default': SQLiteJobStore(conn)})
+    scheduler.start(paused=True)
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+
+def test_job_store_persists_jobs(conn, scheduler):
+    trigger = CronTrigger(hour=10, minute=0, timezone=timezone.utc)
+    scheduler.add_job(noop, trigger, id='blog_generator_10_00')
+
+    with pytest.raises(ConflictingIdError):
+        scheduler.add_job(noop, trigger, id='blog_generator_10_00')
+
+    # A new store on the same database sees the job and its next run time
+    store = SQLiteJobStore(conn)
+    stored = store.stored_next_run_times()
+    assert list(stored) == ['blog_generator_10_00']
+    assert stored['blog_generator_10_00'] == datetime_to_utc_timestamp(
+        scheduler.get_job('blog_generator_10_00').next_run_time
+    )
+
+
+def test_job_store_updates_and_removes_jobs(scheduler):
+    scheduler.add_job(noop, CronTrigger(hour=10, minute=0, timezone=timezone.utc), id='morning')
+    scheduler.add_job(noop, CronTrigger(hour=18, minute=0, timezone=timezone.utc), id='evening')
+
+    scheduler.modify_job('morning', name='renamed')
+    assert scheduler.get_job('morning').name == 'renamed'
+
+    scheduler.remove_job('evening')
+    assert [job.id for job in scheduler.get_jobs()] == ['morning']
+    with pytest.raises(JobLookupError):
+        scheduler.remove_job('evening')
+
+    scheduler.remove_all_jobs()
+    assert scheduler.get_jobs() == []
+
+
+def test_run_ledger_records_each_slot_once(conn):
+    ledger = RunLedger(conn)
+    slot = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+    assert ledger.record('blog_generator_10_00', slot, 'fired')
+    assert not ledger.record('blog_generator_10_00', slot, 'caught_up', 'job-1')
+    assert ledger.has('blog_generator_10_00', slot)
+    assert not ledger.has('blog_generator_10_00', slot + timedelta(days=1))
+    assert ledger.recent() == [{
+        'job_id': 'blog_generator_10_00',
+        'slot': slot.isoformat(),
+        'status': 'fired',
+        'generation_job_id': None
+    }]
+
+
+def test_find_missed_slots(conn):
+    ledger = RunLedger(conn)
+    triggers = {
+        'morning': CronTrigger(hour=10, minute=0, timezone=timezone.utc),
+        'evening': CronTrigger(hour=18, minute=0, timezone=timezone.utc),
+        'new': CronTrigger(hour=12, minute=0, timezone=timezone.utc),
+    }
+    stored = {
+        'morning': datetime_to_utc_timestamp(datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)),
+        'evening': datetime_to_utc_timestamp(datetime(2024, 5, 1, 18, 0, tzinfo=timezone.utc)),
+    }
+    # The process died after firing this slot but before storing the next run time
+    ledger.record('morning', datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc), 'fired')
+    now = datetime(2024, 5, 2, 19, 0, tzinfo=timezone.utc)
+
+    missed = find_missed_slots(triggers, stored, ledger, now, grace_time=2 * 86400)
+
+    assert missed == [
+        ('evening', datetime(2024, 5, 1, 18, 0, tzinfo=timezone.utc)),
+        ('morning', datetime(2024, 5, 2, 10, 0, tzinfo=timezone.utc)),
+        ('evening', datetime(2024, 5, 2, 18, 0, tzinfo=timezone.utc)),
+    ]
+
+
+def test_find_missed_slots_honours_grace_time(conn):
+    ledger = RunLedger(conn)
+    triggers = {'morning': CronTrigger(hour=10, minute=0, timezone=timezone.utc)}
+    stored = {'morning': datetime_to_utc_timestamp(datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc))}
+    now = datetime(2024, 5, 3, 11, 0, tzinfo=timezone.utc)
+
+    assert find_missed_slots(triggers, stored, ledger, now, grace_time=3600) == [
+        ('morning', datetime(2024, 5, 3, 10, 0, tzinfo=timezone.utc))
+    ]
+    assert find_missed_slots(triggers, stored, ledger, now, grace_time=60) == []
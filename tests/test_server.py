@@ -1,9 +1,14 @@
+import asyncio
 import pytest
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from server import app, generate_blog_post
+from server import app, generate_blog_post, generate_blog_posts
 import json
+from services.job_queue import Job, JobQueueFull
+from services.leader_election import LeaderLease
+import sqlite3
+import subprocess
 
 @pytest.fixture
 def client():
@@ -22,7 +27,8 @@ def mock_config(mocker):
         'WP_USERNAME': 'test_wp_user',
         'WP_APP_PASS': 'test_wp_pass',
         'WP_URL': 'https://test.wordpress.com',
-        'CRON_SCHEDULE': '00:00'
+        'CRON_SCHEDULE': '00:00',
+        'DATA_DIR': ':memory:'
     }
     
     # Mock os.getenv to return our test values
@@ -42,25 +48,168 @@ def test_health_check(client):
     assert response.status_code == 200
     assert response.json == {"status": "healthy"}
 
+def test_api_status_reports_shared_scheduler_state(client, mocker, tmp_path):
+    lease = LeaderLease(conn=sqlite3.connect(str(tmp_path / 'scheduler.db'), check_same_thread=False),
+                        holder='worker-1')
+    lease.acquire()
+    lease.set_state('next_run', '2024-01-01T12:00:00+00:00')
+    mocker.patch('server.scheduler_lease', lease)
+    import server
+    server.refresh_status()
+
+    response = client.get('/api/status')
+
+    assert response.status_code == 200
+    assert response.json["next_run"] == '2024-01-01T12:00:00+00:00'
+    assert response.json["scheduler_leader"] == 'worker-1'
+
+@pytest.mark.parametrize("path", ['/', '/api/status'])
+def test_status_endpoints_answer_304_until_the_snapshot_changes(client, mocker, path):
+    import server
+    mocker.patch('server.status_snapshot', server.StatusSnapshot(next_run=None, scheduler_leader=None))
+    mocker.patch('server.scheduler_lease')
+    mocker.patch('server.scheduler', mocker.Mock(get_jobs=lambda: []))
+
+    first = client.get(path)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    # A scheduler event that does not move the next run keeps the snapshot
+    server._publish_next_run()
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+
+    server.status_snapshot.update(next_run='2024-01-01T12:00:00+00:00')
+    changed = client.get(path, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+def test_home_page_is_rendered_once_per_snapshot(client, mocker):
+    import server
+    mocker.patch('server.status_snapshot', server.StatusSnapshot(next_run=None, scheduler_leader=None))
+    render = mocker.spy(server, 'render_template')
+
+    client.get('/')
+    client.get('/')
+    assert render.call_count == 1
+    server.status_snapshot.update(next_run='2024-01-01T12:00:00+00:00')
+    client.get('/')
+    assert render.call_count == 2
+
+def test_home_page_renders_the_request_time(client, mocker):
+    import server
+    mocker.patch('server.status_snapshot', server.StatusSnapshot(next_run='2024-01-01T12:00:00+00:00',
+                                                                 scheduler_leader=None))
+    page = client.get('/').get_data(as_text=True)
+    assert '2024-01-01T12:00:00+00:00' in page
+    assert server._CURRENT_TIME_MARK not in page
+
 def test_home_endpoint(client):
     response = client.get('/')
     assert response.status_code == 200
     assert b"LeetCode Blog Generator" in response.data
 
-def test_trigger_endpoint_success(client, mocker):
-    mock_thread = mocker.patch('threading.Thread')
+@pytest.fixture
+def mock_worker(mocker):
+    return mocker.patch('server.job_worker')
+
+@pytest.fixture
+def mock_publish_worker(mocker):
+    return mocker.patch('server.publish_worker')
+
+def test_importing_server_loads_no_heavy_dependencies_and_starts_nothing():
+    code = (
+        "import sys, server\n"
+        "print(sorted(m for m in ('aiohttp', 'apscheduler', 'jwt', 'dotenv') if m in sys.modules))\n"
+        "print(server.scheduler_elector, server.job_worker.running)"
+    )
+    # A fresh interpreter, so nothing imported by the other tests counts
+    result = subprocess.run([sys.executable, '-c', code], cwd=os.path.join(os.path.dirname(__file__), '..'),
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == ["[]", "None False"]
+
+def test_create_app_sizes_the_queue_and_starts_the_scheduler(mock_config, mock_worker, mock_publish_worker, mocker):
+    import server
+    mock_config.job_queue_size = 3
+    start = mocker.patch('server.start_scheduler')
+    register = mocker.patch('server.atexit.register')
+    mocker.patch('server._worker_stop_registered', False)
+
+    assert server.create_app(start_scheduling=False) is app
+    start.assert_not_called()
+    assert mock_worker.max_pending == mock_publish_worker.max_pending == 3
+    # The worker loops are stopped at exit, which closes their pooled sessions
+    assert [call.args for call in register.call_args_list] == [(mock_worker.stop, 5), (mock_publish_worker.stop, 5)]
+
+    assert server.create_app() is app
+    start.assert_called_once()
+    assert register.call_count == 2
+
+def test_trigger_endpoint_success(client, mock_worker):
+    job = Job({'count': 1})
+    mock_worker.submit.return_value = (job, False)
     response = client.post('/trigger')
-    assert response.status_code == 200
+    assert response.status_code == 202
+    assert response.json["status"] == "success"
+    assert response.json["job_id"] == job.id
+    assert response.json["merged"] is False
+    assert response.headers["Location"] == f"/jobs/{job.id}"
+    mock_worker.submit.assert_called_once_with({'count': 1})
+
+def test_trigger_endpoint_merges_identical_jobs(client, mock_worker):
+    job = Job({'count': 1})
+    mock_worker.submit.return_value = (job, True)
+    response = client.post('/trigger')
+    assert response.status_code == 202
+    assert response.json["job_id"] == job.id
+    assert response.json["merged"] is True
+
+def test_trigger_endpoint_batch(client, mock_worker):
+    mock_worker.submit.return_value = (Job({'count': 5}), False)
+    response = client.post('/trigger?count=5')
+    assert response.status_code == 202
     assert response.json["status"] == "success"
-    mock_thread.assert_called_once()
+    mock_worker.submit.assert_called_once_with({'count': 5})
+
+@pytest.mark.parametrize("count", ["0", "51", "many"])
+def test_trigger_endpoint_invalid_count(client, mock_worker, count):
+    response = client.post(f'/trigger?count={count}')
+    assert response.status_code == 400
+    assert response.json["status"] == "error"
+    mock_worker.submit.assert_not_called()
+
+def test_trigger_endpoint_queue_full(client, mock_worker):
+    mock_worker.submit.side_effect = JobQueueFull("Job queue is full (10 pending jobs)")
+    response = client.post('/trigger')
+    assert response.status_code == 429
+    assert response.json["status"] == "error"
+    assert response.headers["Retry-After"] == "60"
 
-def test_trigger_endpoint_error(client, mocker):
-    mock_thread = mocker.patch('threading.Thread')
-    mock_thread.side_effect = Exception("Test error")
+def test_trigger_endpoint_error(client, mock_worker):
+    mock_worker.submit.side_effect = Exception("Test error")
     response = client.post('/trigger')
     assert response.status_code == 500
     assert response.json["status"] == "error"
 
+def test_job_status_endpoint(client, mock_worker):
+    job = Job({'count': 1})
+    job.record_stage('fetch', 0.5)
+    mock_worker.get.return_value = job
+    response = client.get(f'/jobs/{job.id}')
+    assert response.status_code == 200
+    assert response.json["state"] == "queued"
+    assert response.json["stages"] == {"fetch": {"seconds": 0.5, "calls": 1}}
+    mock_worker.get.assert_called_once_with(job.id)
+
+def test_job_status_endpoint_unknown_job(client, mock_worker):
+    mock_worker.get.return_value = None
+    response = client.get('/jobs/missing')
+    assert response.status_code == 404
+    assert response.json["status"] == "error"
+
 @pytest.mark.asyncio
 async def test_generate_blog_post_ghost(mock_config, mocker):
     # Set platform to Ghost
@@ -132,4 +281,347 @@ async def test_generate_blog_post_wordpress(mock_config, mocker):
     assert result["id"] == 123
     mock_leetcode.execute.assert_called_once()
     mock_deepseek.execute.assert_called_once()
-    mock_wordpress.execute.assert_called_once() 
\ No newline at end of file
+    mock_wordpress.execute.assert_called_once() 
+
+@pytest.mark.asyncio
+async def test_generate_blog_posts_batch(mock_config, mocker):
+    mock_config.blog_platform = "ghost"
+
+    # The second selection repeats the first problem, as a concurrent fetch could
+    problems = [
+        {"title": "Two Sum", "titleSlug": "two-sum"},
+        {"title": "Two Sum", "titleSlug": "two-sum"},
+        {"title": "3Sum", "titleSlug": "3sum"},
+        {"title": "Valid Parentheses", "titleSlug": "valid-parentheses"},
+    ]
+    for problem in problems:
+        problem.update({
+            "difficulty": "MEDIUM",
+            "interview_metadata": {"acceptance_rate": 45.5, "companies": [], "topics": ["Array"]}
+        })
+    mock_leetcode = mocker.AsyncMock()
+    mock_leetcode.execute.side_effect = problems
+    mocker.patch('server.LeetCodeService', return_value=mock_leetcode)
+
+    mock_deepseek = mocker.AsyncMock()
+    mock_deepseek.execute.return_value = "Test blog content"
+    mocker.patch('server.DeepSeekService', return_value=mock_deepseek)
+
+    mock_ghost = mocker.AsyncMock()
+    mock_ghost.execute.side_effect = [{"id": 1}, {"id": 2}, Exception("Ghost unavailable")]
+    mocker.patch('services.ghost_service.GhostService', return_value=mock_ghost)
+
+    results = await generate_blog_posts(3)
+
+    assert [result["status"] for result in results] == ["success", "success", "error"]
+    assert results[2]["stage"] == "publish"
+    published_titles = sorted(call.args[0] for call in mock_ghost.execute.call_args_list)
+    assert published_titles == ["3Sum - Go Solution", "Two Sum - Go Solution",
+                                "Valid Parentheses - Go Solution"]
+    assert mock_leetcode.execute.call_count == 4
+    assert mock_deepseek.execute.call_count == 3
+
+@pytest.mark.asyncio
+async def test_generate_blog_post_resumes_after_failed_publish(mock_config, mocker):
+    mock_config.blog_platform = "ghost"
+
+    mock_leetcode = mocker.AsyncMock()
+    mock_leetcode.execute.return_value = {
+        "title": "Two Sum",
+        "titleSlug": "two-sum",
+        "difficulty": "EASY",
+        "interview_metadata": {"acceptance_rate": 50.0, "companies": [], "topics": ["Array"]}
+    }
+    mocker.patch('server.LeetCodeService', return_value=mock_leetcode)
+
+    async def execute(prompt, use_cache=True, on_completion=None):
+        on_completion("raw completion")
+        return "<p>Generated</p>"
+    mock_deepseek = mocker.AsyncMock()
+    mock_deepseek.execute.side_effect = execute
+    mocker.patch('server.DeepSeekService', return_value=mock_deepseek)
+
+    mock_ghost = mocker.AsyncMock()
+    mock_ghost.execute.side_effect = [Exception("Ghost unavailable"), {"id": 123}]
+    mocker.patch('services.ghost_service.GhostService', return_value=mock_ghost)
+
+    with pytest.raises(Exception, match="Ghost unavailable"):
+        await generate_blog_post()
+    result = await generate_blog_post()
+
+    assert result["id"] == 123
+    # The second run picked up the generated post instead of starting over
+    mock_leetcode.execute.assert_called_once()
+    mock_deepseek.execute.assert_called_once()
+    assert mock_ghost.execute.call_args.args == ("Two Sum - Go Solution", "<p>Generated</p>")
+
+@pytest.mark.asyncio
+async def test_run_that_keeps_failing_is_abandoned_for_a_new_problem(mock_config, mocker):
+    mock_config.blog_platform = "ghost"
+    mock_config.pipeline_max_attempts = 2
+    mock_leetcode, mock_deepseek, mock_ghost = mock_generation_services(mocker, ["two-sum", "3sum"])
+
+    async def publish(title, content, **kwargs):
+        if title.startswith("Two Sum"):
+            raise Exception("Validation error: 422")
+        return {"id": 123}
+    mock_ghost.execute.side_effect = publish
+
+    for _ in range(2):
+        with pytest.raises(Exception, match="422"):
+            await generate_blog_post()
+    result = await generate_blog_post()
+
+    assert result["id"] == 123
+    # The failing run was attempted twice, then the next run moved on
+    assert mock_leetcode.execute.call_count == 2
+    assert [call.args[0] for call in mock_ghost.execute.call_args_list] == [
+        "Two Sum - Go Solution", "Two Sum - Go Solution", "3Sum - Go Solution"]
+
+def mock_linked_ghost(mocker):
+    from services.blog_service import BlogService
+    mock_ghost = mocker.AsyncMock()
+    mock_ghost.slugify = BlogService.slugify
+    mock_ghost.published_slug = BlogService.published_slug
+    mock_ghost.post_url = lambda slug: f"https://test.ghost.com/{slug}/"
+    mocker.patch('services.ghost_service.GhostService', return_value=mock_ghost)
+    return mock_ghost
+
+@pytest.mark.asyncio
+async def test_languages_are_generated_concurrently_and_published_as_a_linked_set(mock_config, mocker):
+    mock_config.post_languages = ['go', 'python']
+    mock_config.generate_concurrency = 2
+    mock_leetcode, mock_deepseek, _ = mock_generation_services(mocker, ["two-sum"])
+    mock_ghost = mock_linked_ghost(mocker)
+    mock_ghost.execute.side_effect = [{"id": 1}, {"id": 2}]
+
+    in_flight = []
+    async def execute(prompt, use_cache=True, on_completion=None):
+        in_flight.append(prompt)
+        await asyncio.sleep(0.01)
+        language = "Python" if "Python" in prompt.prefix else "Go"
+        assert len(in_flight) == 2, "the languages are generated concurrently"
+        return f"<p>{language}</p>"
+    mock_deepseek.execute.side_effect = execute
+
+    result = await generate_blog_post()
+
+    mock_leetcode.execute.assert_called_once()
+    assert result["posts"] == {"go": {"id": 1}, "python": {"id": 2}}
+    posts = {call.args[0]: call.args[1] for call in mock_ghost.execute.call_args_list}
+    assert set(posts) == {"Two Sum - Go Solution", "Two Sum - Python Solution"}
+    assert posts["Two Sum - Go Solution"].startswith("<p>Go</p>")
+    assert ('<a href="https://test.ghost.com/two-sum-python-solution/">Two Sum - Python Solution</a>'
+            in posts["Two Sum - Go Solution"])
+    assert ('<a href="https://test.ghost.com/two-sum-go-solution/">Two Sum - Go Solution</a>'
+            in posts["Two Sum - Python Solution"])
+
+@pytest.mark.asyncio
+async def test_linked_set_retry_only_redoes_the_failed_language(mock_config, mocker):
+    mock_config.post_languages = ['go', 'rust']
+    mock_leetcode, mock_deepseek, _ = mock_generation_services(mocker, ["two-sum"])
+    mock_ghost = mock_linked_ghost(mocker)
+
+    rust_attempts = []
+    async def execute(prompt, use_cache=True, on_completion=None):
+        if "Rust" in prompt.prefix:
+            rust_attempts.append(prompt)
+            if len(rust_attempts) == 1:
+                raise Exception("DeepSeek timed out")
+        return "<p>Generated</p>"
+    mock_deepseek.execute.side_effect = execute
+    mock_ghost.execute.side_effect = [{"id": 1}, Exception("Ghost unavailable"), {"id": 2}]
+
+    with pytest.raises(Exception, match="rust: DeepSeek timed out"):
+        await generate_blog_post()
+    with pytest.raises(Exception, match="rust: Ghost unavailable"):
+        await generate_blog_post()
+    result = await generate_blog_post()
+
+    assert result["posts"] == {"go": {"id": 1}, "rust": {"id": 2}}
+    mock_leetcode.execute.assert_called_once()
+    # Go was generated and published once; only Rust was retried
+    assert mock_deepseek.execute.call_count == 3
+    assert [call.args[0] for call in mock_ghost.execute.call_args_list] == [
+        "Two Sum - Go Solution", "Two Sum - Rust Solution", "Two Sum - Rust Solution"
+    ]
+
+def test_catch_up_missed_runs_queues_recent_slots(mocker, mock_worker):
+    from datetime import datetime, timezone
+    import server
+    from services.scheduler_store import RunLedger
+    ledger = RunLedger(sqlite3.connect(':memory:'))
+    mocker.patch('server.run_ledger', ledger)
+    mocker.patch.object(server.Config(), 'scheduler_catchup_limit', 2)
+    job = Job({'count': 2})
+    mock_worker.submit.return_value = (job, False)
+    missed = [('blog_generator_10_00', datetime(2024, 5, day, 10, 0, tzinfo=timezone.utc)) for day in (1, 2, 3)]
+
+    server._catch_up_missed_runs(missed)
+
+    mock_worker.submit.assert_called_once_with({
+        'count': 2,
+        'slots': ['2024-05-02T10:00:00+00:00', '2024-05-03T10:00:00+00:00']
+    })
+    assert [(run['slot'][:10], run['status'], run['generation_job_id']) for run in ledger.recent()] == [
+        ('2024-05-03', 'caught_up', job.id),
+        ('2024-05-02', 'caught_up', job.id),
+        ('2024-05-01', 'skipped', None),
+    ]
+
+def test_catch_up_runs_every_slot_under_the_limit(mocker, mock_worker):
+    from datetime import datetime, timezone
+    import server
+    from services.scheduler_store import RunLedger
+    ledger = RunLedger(sqlite3.connect(':memory:'))
+    mocker.patch('server.run_ledger', ledger)
+    mocker.patch.object(server.Config(), 'scheduler_catchup_limit', 3)
+    job = Job({'count': 2})
+    mock_worker.submit.return_value = (job, False)
+    missed = [('blog_generator_10_00', datetime(2024, 5, day, 10, 0, tzinfo=timezone.utc)) for day in (1, 2)]
+
+    server._catch_up_missed_runs(missed)
+
+    mock_worker.submit.assert_called_once_with({
+        'count': 2,
+        'slots': ['2024-05-01T10:00:00+00:00', '2024-05-02T10:00:00+00:00']
+    })
+    assert [run['status'] for run in ledger.recent()] == ['caught_up', 'caught_up']
+
+def test_catch_up_publishes_from_the_buffer_in_prefetch_mode(mocker, mock_worker, mock_publish_worker):
+    from datetime import datetime, timezone
+    import server
+    from services.scheduler_store import RunLedger
+    ledger = RunLedger(sqlite3.connect(':memory:'))
+    mocker.patch('server.run_ledger', ledger)
+    mocker.patch.object(server.Config(), 'scheduler_catchup_limit', 2)
+    mocker.patch.object(server.Config(), 'prefetch_posts', 2)
+    jobs = [Job({'buffered': True}), Job({'buffered': True})]
+    mock_publish_worker.submit.side_effect = [(job, False) for job in jobs]
+    missed = [('blog_generator_10_00', datetime(2024, 5, day, 10, 0, tzinfo=timezone.utc)) for day in (2, 3)]
+
+    server._catch_up_missed_runs(missed)
+
+    # One buffered publish per slot instead of a batch generation
+    mock_worker.submit.assert_not_called()
+    assert [call.args[0] for call in mock_publish_worker.submit.call_args_list] == [
+        {'buffered': True, 'slot': '2024-05-02T10:00:00+00:00'},
+        {'buffered': True, 'slot': '2024-05-03T10:00:00+00:00'},
+    ]
+    assert [(run['slot'][:10], run['status'], run['generation_job_id']) for run in ledger.recent()] == [
+        ('2024-05-03', 'caught_up', jobs[1].id),
+        ('2024-05-02', 'caught_up', jobs[0].id),
+    ]
+
+def test_metrics_endpoint(client):
+    from services.metrics import STAGE_SECONDS
+    STAGE_SECONDS.observe(0.2, stage='fetch')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE telegraf_stage_duration_seconds histogram' in body
+    assert 'telegraf_stage_duration_seconds_count{stage="fetch"} 1' in body
+
+def mock_generation_services(mocker, slugs):
+    problems = [{
+        "title": slug.replace('-', ' ').title(),
+        "titleSlug": slug,
+        "difficulty": "EASY",
+        "interview_metadata": {"acceptance_rate": 50.0, "companies": [], "topics": ["Array"]}
+    } for slug in slugs]
+    mock_leetcode = mocker.AsyncMock()
+    mock_leetcode.execute.side_effect = problems
+    mocker.patch('server.LeetCodeService', return_value=mock_leetcode)
+    mock_deepseek = mocker.AsyncMock()
+    mock_deepseek.execute.return_value = "<p>Generated</p>"
+    mocker.patch('server.DeepSeekService', return_value=mock_deepseek)
+    mock_ghost = mocker.AsyncMock()
+    mock_ghost.execute.return_value = {"id": 123}
+    mocker.patch('services.ghost_service.GhostService', return_value=mock_ghost)
+    return mock_leetcode, mock_deepseek, mock_ghost
+
+def test_slot_publish_does_not_wait_for_a_running_refill(mock_config, mocker):
+    import threading
+    import time
+    import server
+    from services.job_queue import JobWorker
+    mock_config.prefetch_posts = 2
+    refilling = threading.Event()
+    release = threading.Event()
+
+    async def refill_post_buffer():
+        refilling.set()
+        await asyncio.get_running_loop().run_in_executor(None, release.wait, 5)
+        return {'generated': 1}
+    mocker.patch('server.refill_post_buffer', side_effect=refill_post_buffer)
+    mocker.patch('server.publish_from_buffer', return_value={'published': 1})
+    workers = [JobWorker(server.run_generation_job), JobWorker(server.run_generation_job)]
+    mocker.patch('server.job_worker', workers[0])
+    mocker.patch('server.publish_worker', workers[1])
+    enqueue_publish = mocker.spy(server, 'enqueue_buffered_publish')
+    try:
+        server.enqueue_buffer_refill()
+        assert refilling.wait(5)
+        server.run_scheduled_generation()
+        publish, _ = enqueue_publish.spy_return
+        deadline = time.monotonic() + 5
+        while publish.state != 'succeeded':
+            assert time.monotonic() < deadline, f"slot publish still {publish.state}"
+            time.sleep(0.01)
+        # The refill is still generating while the slot has been published
+        assert not release.is_set()
+    finally:
+        release.set()
+        for worker in workers:
+            worker.stop(timeout=5)
+
+@pytest.mark.asyncio
+async def test_prefetched_posts_are_published_at_the_slot(mock_config, mock_worker, mocker):
+    import server
+    mock_config.prefetch_posts = 2
+    mock_worker.submit.return_value = (Job({'refill': True}), False)
+    mock_leetcode, mock_deepseek, mock_ghost = mock_generation_services(mocker, ["two-sum", "3sum"])
+
+    result = await server.refill_post_buffer()
+    assert result["generated"] == 2
+    assert result["buffered"] == 2
+    mock_ghost.execute.assert_not_called()
+
+    # A full buffer needs no more generations
+    assert (await server.refill_post_buffer())["generated"] == 0
+
+    result = await server.publish_from_buffer()
+    assert result["published"] == 1
+    assert mock_ghost.execute.call_args.args == ("Two Sum - Go Solution", "<p>Generated</p>")
+    assert mock_leetcode.execute.call_count == 2
+    assert mock_deepseek.execute.call_count == 2
+    mock_worker.submit.assert_called_with({'refill': True})
+
+@pytest.mark.asyncio
+async def test_prefetched_posts_are_scheduled_on_ghost(mock_config, mock_worker, mocker):
+    import server
+    mock_config.prefetch_posts = 2
+    mock_config.prefetch_schedule = True
+    mock_config.cron_schedules = ['09:00', '21:00']
+    mock_worker.submit.return_value = (Job({'refill': True}), False)
+    _, _, mock_ghost = mock_generation_services(mocker, ["two-sum", "3sum", "valid-parentheses"])
+    slots = server.upcoming_slots(2)
+
+    result = await server.refill_post_buffer()
+
+    assert result["scheduled"] == 2
+    assert [call.kwargs for call in mock_ghost.execute.call_args_list] == [
+        {"status": "scheduled", "published_at": slot} for slot in slots
+    ]
+    # Both upcoming slots are covered, so nothing else is generated
+    assert (await server.refill_post_buffer())["generated"] == 0
+
+def test_upcoming_slots(mock_config):
+    from datetime import datetime, timezone
+    import server
+    mock_config.cron_schedules = ['09:00', '21:00']
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    assert server.upcoming_slots(3, now) == [
+        '2024-05-01T21:00:00+00:00', '2024-05-02T09:00:00+00:00', '2024-05-02T21:00:00+00:00'
+    ]
@@ -0,0 +1,27 @@
+from services.status_snapshot import StatusSnapshot
+
+
+def test_etag_changes_only_with_the_state():
+    snapshot = StatusSnapshot(next_run=None, scheduler_leader='worker-1')
+    etag = snapshot.etag
+
+    assert not snapshot.update(scheduler_leader='worker-1')
+    assert snapshot.etag == etag
+    assert snapshot.update(next_run='2024-01-01T12:00:00+00:00')
+    assert snapshot.etag != etag
+    assert snapshot.state == {'next_run': '2024-01-01T12:00:00+00:00', 'scheduler_leader': 'worker-1'}
+
+
+def test_pages_are_rendered_once_per_state():
+    snapshot = StatusSnapshot(next_run=None)
+    renders = []
+
+    def render(state):
+        renders.append(state)
+        return f"next run: {state['next_run']}"
+
+    assert snapshot.page('index', render) == "next run: None"
+    assert snapshot.page('index', render) == "next run: None"
+    snapshot.update(next_run='tomorrow')
+    assert snapshot.page('index', render) == "next run: tomorrow"
+    assert len(renders) == 2
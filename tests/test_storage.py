@@ -0,0 +1,40 @@
+import os
+import pytest
+from config.config import Config
+from services import storage
+
+
+@pytest.fixture
+def data_dir_env(monkeypatch, tmp_path):
+    """Run with a fresh Config in an empty working directory"""
+    monkeypatch.chdir(tmp_path)
+
+    def configure(value=None):
+        if value is None:
+            monkeypatch.delenv('DATA_DIR', raising=False)
+        else:
+            monkeypatch.setenv('DATA_DIR', value)
+        Config.reset_instance()
+
+    yield configure
+    storage.close_all()
+    Config.reset_instance()
+
+
+def test_databases_default_to_data_dir(data_dir_env, tmp_path):
+    data_dir_env()
+    assert storage.database_path('published.db') == os.path.join('data', 'published.db')
+
+    conn = storage.open_database('published.db')
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    assert (tmp_path / 'data' / 'published.db').exists()
+
+
+def test_memory_data_dir_keeps_local_stores_in_memory(data_dir_env, tmp_path):
+    data_dir_env(storage.IN_MEMORY)
+    assert storage.database_path('published.db') is None
+    storage.open_database('published.db')
+    assert not (tmp_path / 'data').exists()
+    # Databases shared between processes still need a file
+    assert storage.database_path('scheduler.db', shared=True).endswith(os.path.join('telegraf', 'scheduler.db'))
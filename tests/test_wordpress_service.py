@@ -79,4 +79,71 @@ async def test_network_error_handling(wordpress_service):
                 content="Test Content"
             )
         
-        assert "Network error" in str(exc_info.value) 
\ No newline at end of file
+        assert "Network error" in str(exc_info.value) 
+
+@pytest.mark.asyncio
+async def test_list_post_titles(wordpress_service):
+    first_page = AsyncMock()
+    first_page.status = 200
+    first_page.headers = {"X-WP-TotalPages": "2"}
+    first_page.json = AsyncMock(return_value=[{"title": {"rendered": "Two Sum &#8211; Go Solution"}}])
+    second_page = AsyncMock()
+    second_page.status = 200
+    second_page.headers = {"X-WP-TotalPages": "2"}
+    second_page.json = AsyncMock(return_value=[{"title": {"rendered": "3Sum &#8211; Go Solution"}}])
+
+    with patch('aiohttp.ClientSession.get') as mock_get:
+        mock_get.return_value.__aenter__.side_effect = [first_page, second_page]
+
+        titles = await wordpress_service.list_post_titles()
+
+        assert titles == ["Two Sum – Go Solution", "3Sum – Go Solution"]
+        assert mock_get.call_count == 2
+
+def batch_response(statuses):
+    response = AsyncMock()
+    response.status = 207
+    response.json = AsyncMock(return_value={"responses": [
+        {"status": status, "body": {"id": i} if status == 201 else {"message": "Invalid title"}}
+        for i, status in enumerate(statuses)
+    ]})
+    return response
+
+@pytest.mark.asyncio
+async def test_publish_many_uses_batch_endpoint(wordpress_service):
+    posts = [(f"Post {i}", "Content") for i in range(30)]
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [
+            batch_response([201] * 24 + [400]),
+            batch_response([201] * 5)
+        ]
+
+        results = await wordpress_service.publish_many(posts, status="publish", concurrency=2)
+
+    assert mock_post.call_count == 2
+    first_batch = mock_post.call_args_list[0]
+    assert first_batch.args[0] == "https://example.com/wp-json/batch/v1"
+    assert len(first_batch.kwargs["json"]["requests"]) == 25
+    assert first_batch.kwargs["json"]["requests"][0]["body"] == {
+        "title": "Post 0", "content": "Content", "status": "publish", "slug": "post-0"
+    }
+    assert len(results) == 30
+    assert results[0] == {"status": "success", "result": {"id": 0}}
+    assert results[24] == {"status": "error", "error": "Failed to publish to WordPress: Invalid title (Status: 400)"}
+    assert all(result["status"] == "success" for result in results[25:])
+
+@pytest.mark.asyncio
+async def test_publish_many_falls_back_without_batch_endpoint(wordpress_service):
+    not_found = AsyncMock(status=404)
+    created = AsyncMock(status=201, json=AsyncMock(return_value={"id": 1}))
+    failed = AsyncMock(status=400, json=AsyncMock(return_value={"message": "Invalid post data"}))
+    with patch('aiohttp.ClientSession.post') as mock_post:
+        mock_post.return_value.__aenter__.side_effect = [not_found, created, failed]
+
+        results = await wordpress_service.publish_many([("One", "A"), ("Two", "B")], concurrency=1)
+
+    assert wordpress_service.batch_supported is False
+    assert [call.args[0] for call in mock_post.call_args_list[1:]] == ["https://example.com/wp-json/wp/v2/posts"] * 2
+    assert results[0] == {"status": "success", "result": {"id": 1}}
+    assert results[1]["status"] == "error"
+    assert "Invalid post data" in results[1]["error"]